@@ -0,0 +1,122 @@
+import asyncio
+import json
+import threading
+
+from market_http import RETRY_STATUSES, RetryState, shared_http_client
+
+try:
+    import aiohttp
+except ImportError:  # Optional: without aiohttp requests run on worker threads over the pooled sync client
+    aiohttp = None
+
+
+class AsyncResponse:
+    """The subset of requests.Response used by the analyzer and rate limiter"""
+
+    def __init__(self, status_code, headers, body):
+        self.status_code = status_code
+        self.headers = headers
+        self._body = body
+
+    @property
+    def content(self):
+        return self._body
+
+    @property
+    def text(self):
+        return self._body.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self._body)
+
+
+class _LoopThread:
+    """A private event loop on a daemon thread that owns the aiohttp session
+
+    Callers on any event loop (Streamlit creates a new one per run) share its
+    connection pool.
+    """
+
+    def __init__(self, limit, limit_per_host):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.loop = asyncio.new_event_loop()
+        self.session = None
+        self._ready = threading.Event()
+        threading.Thread(target=self._run, name="async-http", daemon=True).start()
+        self._ready.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._open())
+        self._ready.set()
+        self.loop.run_forever()
+
+    async def _open(self):
+        connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(connector=connector)
+
+    async def call(self, coro):
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+
+class AsyncMarketDataClient:
+    """Async counterpart of MarketDataClient
+
+    With aiohttp installed, requests go through one pooled aiohttp session
+    under the sync client's retry/backoff/Retry-After, weight and timeout
+    policy (RetryState); latency and counters are recorded into its per-host
+    stats. Without aiohttp each
+    request runs on a worker thread through the sync client's pooled session.
+    """
+
+    def __init__(self, sync_client=shared_http_client, limit=64, limit_per_host=32):
+        self.sync_client = sync_client
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self._loop_thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def native(self):
+        return aiohttp is not None
+
+    async def get(self, url, timeout=10, retry_statuses=RETRY_STATUSES, **kwargs):
+        """GET with retries on `retry_statuses`; returns the final response (callers still check status_code)"""
+        if aiohttp is None:
+            return await asyncio.to_thread(self.sync_client.get, url, timeout, retry_statuses=retry_statuses, **kwargs)
+        return await self._session_loop().call(self._get(url, timeout, retry_statuses, **kwargs))
+
+    def _session_loop(self):
+        with self._lock:
+            if self._loop_thread is None:
+                self._loop_thread = _LoopThread(self.limit, self.limit_per_host)
+            return self._loop_thread
+
+    async def _get(self, url, timeout, retry_statuses, **kwargs):
+        session = self._loop_thread.session
+        retry = RetryState(self.sync_client, url, timeout, retry_statuses)
+        while True:
+            delay = retry.weight_delay()
+            if delay:
+                await asyncio.sleep(delay)
+            if retry.expired():
+                raise asyncio.TimeoutError(f"{url}: {retry.budget}s timeout used up by retries")
+            retry.start()
+            try:
+                async with session.get(url, timeout=aiohttp.ClientTimeout(total=retry.remaining()), **kwargs) as raw:
+                    response = AsyncResponse(raw.status, raw.headers, await raw.read())
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                delay = retry.after_error()
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            delay = retry.after_response(response)
+            if delay is None:
+                return response
+            await asyncio.sleep(delay)
+
+
+# Process-wide async client sharing one connection pool across event loops
+shared_async_http_client = AsyncMarketDataClient()
@@ -0,0 +1,299 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from numpy_indicators import (
+    OHLCV_COLUMNS, OUTPUT_COLUMNS, add_indicators_numpy, compute_indicator_array, ema, rolling, _rsi,
+)
+from vectorized_confluence import ConfluenceHistory
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+# Indicator windows a sweep can vary; each recomputes the columns the rules read
+DEFAULT_INDICATOR_PARAMS = {
+    "rsi_window": 14,
+    "stoch_window": 14,
+    "ema_fast": 9,
+    "ema_mid": 21,
+    "ema_slow": 50,
+    "bb_window": 20,
+    "bb_dev": 2.0,
+    "volume_window": 20,
+}
+
+
+def load_ohlcv(path):
+    """Read a fixture or cached OHLCV frame (.csv, .parquet or .pkl) indexed by open time"""
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path)
+    elif path.endswith(".pkl"):
+        df = pd.read_pickle(path)
+    else:
+        df = pd.read_csv(path, index_col=0, parse_dates=True)
+    missing = [name for name in OHLCV_COLUMNS if name not in df.columns]
+    if missing:
+        raise ValueError(f"OHLCV data in {path} is missing columns: {missing}")
+    return df
+
+
+def indicator_frame(df, **indicator_params):
+    """Indicator frame for `df` with the given DEFAULT_INDICATOR_PARAMS overrides
+
+    Raw OHLCV goes through the NumPy backend, with overrides applied before
+    the warm-up rows are dropped. An existing indicator frame is overridden
+    in place of its remaining rows, so swept windows see a shorter warm-up.
+    """
+    if "RSI_14" in df.columns:
+        return apply_indicator_params(df, **indicator_params)
+    if not indicator_params:
+        return add_indicators_numpy(df)
+    return _drop_warmup(apply_indicator_params(_full_indicator_frame(df), **indicator_params))
+
+
+def _full_indicator_frame(df):
+    """Indicator frame that keeps the NaN warm-up rows"""
+    arrays = [np.ascontiguousarray(df[name].to_numpy(dtype=np.float64)) for name in OHLCV_COLUMNS]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = compute_indicator_array(*arrays)
+    return pd.DataFrame(out, index=df.index, columns=OUTPUT_COLUMNS, copy=False)
+
+
+def _drop_warmup(frame):
+    keep = ~np.isnan(frame.to_numpy()).any(axis=1)
+    return frame if keep.all() else frame[keep]
+
+
+def apply_indicator_params(frame, **params):
+    """Recompute the rule inputs of an indicator frame with non-default windows
+
+    Column names stay the same (RSI_14 holds the RSI for `rsi_window`), so the
+    confluence rules read the swept values unchanged. Returns a new frame.
+    """
+    unknown = set(params) - set(DEFAULT_INDICATOR_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown indicator parameters: {sorted(unknown)}")
+    changed = {k: v for k, v in params.items() if DEFAULT_INDICATOR_PARAMS[k] != v}
+    if not changed:
+        return frame
+    p = dict(DEFAULT_INDICATOR_PARAMS, **params)
+    frame = frame.copy()
+    close = frame["Close"].to_numpy(dtype=np.float64)
+    high = frame["High"].to_numpy(dtype=np.float64)
+    low = frame["Low"].to_numpy(dtype=np.float64)
+    volume = frame["Volume"].to_numpy(dtype=np.float64)
+    n = len(close)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if "rsi_window" in changed:
+            diff = np.r_[0.0, np.diff(close)]
+            frame["RSI_14"] = _rsi(diff, p["rsi_window"])
+        if "stoch_window" in changed:
+            highest = rolling(high, p["stoch_window"], np.max)
+            lowest = rolling(low, p["stoch_window"], np.min)
+            stoch_k = 100 * (close - lowest) / (highest - lowest)
+            frame["Stoch_K"] = stoch_k
+            frame["Stoch_D"] = rolling(stoch_k, 3, np.mean)
+            frame["Williams_R"] = -100 * (highest - close) / (highest - lowest)
+        for key, column in (("ema_fast", "EMA_9"), ("ema_mid", "EMA_21"), ("ema_slow", "EMA_50")):
+            if key in changed:
+                frame[column] = ema(close, p[key], min_periods=p[key])
+        if "bb_window" in changed or "bb_dev" in changed:
+            window = p["bb_window"]
+            middle = np.full(n, np.nan)
+            std = np.full(n, np.nan)
+            if n >= window:
+                windows = sliding_window_view(close, window)
+                middle[window - 1:] = windows.mean(axis=1)
+                std[window - 1:] = windows.std(axis=1)
+            upper = middle + p["bb_dev"] * std
+            lower = middle - p["bb_dev"] * std
+            frame["BB_Upper"] = upper
+            frame["BB_Middle"] = middle
+            frame["BB_Lower"] = lower
+            frame["BB_Width"] = (upper - lower) / middle * 100
+            frame["BB_Position"] = (close - lower) / (upper - lower)
+        if "volume_window" in changed:
+            volume_sma = rolling(volume, p["volume_window"], np.mean)
+            frame["Volume_SMA"] = volume_sma
+            frame["Volume_Ratio"] = volume / volume_sma
+    return frame
+
+
+def positions_from_counts(bullish, bearish, threshold=3, long_only=False):
+    """Target position per bar from confluence counts (the overall_signal rule as +1/-1/0)"""
+    long_ = (bullish >= threshold) & (bullish > bearish)
+    short = (bearish >= threshold) & (bearish > bullish)
+    position = long_.astype(np.int8)
+    if not long_only:
+        position -= short.astype(np.int8)
+    return position
+
+
+def periods_per_year(index):
+    """Bars per year estimated from the median spacing of a DatetimeIndex"""
+    if not isinstance(index, pd.DatetimeIndex) or len(index) < 2:
+        return None
+    step = np.median((index[1:] - index[:-1]).total_seconds())
+    return SECONDS_PER_YEAR / step if step > 0 else None
+
+
+def _trade_returns(position, returns):
+    """Compounded return of each contiguous run of the same non-zero position (exit costs included)"""
+    held = np.r_[0, position[:-1]]  # position earning each bar's return
+    starts = np.flatnonzero((held != 0) & (held != np.r_[0, held[:-1]]))
+    if len(starts) == 0:
+        return np.empty(0)
+    run_id = np.cumsum(held != np.r_[0, held[:-1]])
+    in_trade = held != 0
+    log_growth = np.log1p(returns)
+    sums = np.bincount(run_id[in_trade], weights=log_growth[in_trade], minlength=run_id[-1] + 1)
+    return np.expm1(sums[run_id[starts]])
+
+
+class BacktestResult:
+    """Per-bar position, returns and equity of a backtest plus summary metrics"""
+
+    def __init__(self, index, close, position, returns, costs, annualization=None):
+        self.index = index
+        self.position = position
+        self.returns = returns
+        self.costs = costs
+        self.equity = np.cumprod(1 + returns)
+        self.metrics = self._metrics(close, annualization)
+
+    def _metrics(self, close, annualization):
+        bars = len(self.returns)
+        equity = self.equity
+        peak = np.maximum.accumulate(equity) if bars else equity
+        drawdown = equity / peak - 1 if bars else equity
+        turnover = np.abs(np.diff(np.r_[0, self.position]))
+        trades = _trade_returns(self.position, self.returns)
+        total = float(equity[-1] - 1) if bars else 0.0
+        std = self.returns.std()
+        metrics = {
+            "bars": bars,
+            "total_return": total,
+            "buy_and_hold_return": float(close[-1] / close[0] - 1) if bars else 0.0,
+            "max_drawdown": float(drawdown.min()) if bars else 0.0,
+            "trades": len(trades),
+            "hit_rate": float((trades > 0).mean()) if len(trades) else None,
+            "avg_trade_return": float(trades.mean()) if len(trades) else None,
+            "turnover": float(turnover.sum()),
+            "turnover_per_bar": float(turnover.mean()) if bars else 0.0,
+            "exposure": float((self.position != 0).mean()) if bars else 0.0,
+            "total_costs": float(self.costs.sum()),
+            "annualized_return": None,
+            "sharpe": None,
+        }
+        if annualization and bars:
+            years = bars / annualization
+            metrics["annualized_return"] = float((1 + total) ** (1 / years) - 1) if total > -1 else -1.0
+            metrics["sharpe"] = float(self.returns.mean() / std * np.sqrt(annualization)) if std > 0 else None
+        return metrics
+
+    def to_frame(self):
+        return pd.DataFrame({
+            "position": self.position,
+            "returns": self.returns,
+            "costs": self.costs,
+            "equity": self.equity,
+        }, index=self.index)
+
+
+def backtest_positions(close, position, fee_bps=10.0, slippage_bps=5.0, index=None, annualization=None):
+    """Replay target positions decided at each bar's close over the next bar's return
+
+    Every unit of position change pays `fee_bps + slippage_bps` of notional.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    position = np.asarray(position, dtype=np.int8)
+    asset_returns = np.zeros(len(close))
+    asset_returns[1:] = close[1:] / close[:-1] - 1
+    held = np.zeros(len(close))
+    held[1:] = position[:-1]
+    costs = np.abs(np.diff(np.r_[0, position])) * (fee_bps + slippage_bps) / 10000.0
+    returns = held * asset_returns - costs
+    return BacktestResult(index, close, position, returns, costs, annualization)
+
+
+def run_backtest(df, threshold=3, fee_bps=10.0, slippage_bps=5.0, long_only=False, rule_set=None,
+                 annualization=None, **indicator_params):
+    """Backtest the confluence overall_signal over a full OHLCV or indicator frame
+
+    The signal is evaluated for every bar at once with ConfluenceHistory;
+    indicator windows can be overridden with the DEFAULT_INDICATOR_PARAMS keys.
+    """
+    frame = indicator_frame(df, **indicator_params)
+    bullish, bearish, _ = ConfluenceHistory(frame, rule_set=rule_set).counts
+    position = positions_from_counts(bullish, bearish, threshold, long_only)
+    if annualization is None:
+        annualization = periods_per_year(frame.index)
+    return backtest_positions(frame["Close"].to_numpy(dtype=np.float64), position, fee_bps, slippage_bps,
+                              frame.index, annualization)
+
+
+# Per-worker indicator frame, computed once from the OHLCV passed to the initializer
+_sweep_frame = None
+
+
+def _init_sweep_worker(df):
+    global _sweep_frame
+    _sweep_frame = df if "RSI_14" in df.columns else _full_indicator_frame(df)
+
+
+def _run_sweep_group(indicator_params, thresholds, costs, long_only, annualization):
+    """All thresholds and cost settings for one indicator-parameter combination"""
+    frame = _drop_warmup(apply_indicator_params(_sweep_frame, **indicator_params))
+    bullish, bearish, _ = ConfluenceHistory(frame).counts
+    close = frame["Close"].to_numpy(dtype=np.float64)
+    rows = []
+    for threshold in thresholds:
+        position = positions_from_counts(bullish, bearish, threshold, long_only)
+        for fee_bps, slippage_bps in costs:
+            result = backtest_positions(close, position, fee_bps, slippage_bps, annualization=annualization)
+            rows.append(dict(indicator_params, threshold=threshold, fee_bps=fee_bps,
+                             slippage_bps=slippage_bps, **result.metrics))
+    return rows
+
+
+def parameter_sweep(df, grid=None, fee_bps=10.0, slippage_bps=5.0, long_only=False, processes=None,
+                    sort_by="sharpe"):
+    """Backtest every combination in `grid` and return one metrics row per combination
+
+    `grid` maps "threshold", "fee_bps", "slippage_bps" and DEFAULT_INDICATOR_PARAMS
+    keys to lists of values. Indicator combinations are spread over a process
+    pool (`processes=0` runs inline); each worker computes the base indicator
+    frame once and evaluates every threshold/cost setting on one set of
+    confluence counts.
+    """
+    grid = dict(grid or {})
+    thresholds = list(grid.pop("threshold", [3]))
+    costs = list(itertools.product(grid.pop("fee_bps", [fee_bps]), grid.pop("slippage_bps", [slippage_bps])))
+    unknown = set(grid) - set(DEFAULT_INDICATOR_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+    keys = list(grid)
+    combos = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    annualization = periods_per_year(df.index)
+
+    rows = []
+    if processes == 0 or len(combos) == 1:
+        _init_sweep_worker(df)
+        for combo in combos:
+            rows.extend(_run_sweep_group(combo, thresholds, costs, long_only, annualization))
+    else:
+        workers = min(processes or os.cpu_count() or 1, len(combos))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_sweep_worker, initargs=(df,)) as pool:
+            futures = [pool.submit(_run_sweep_group, combo, thresholds, costs, long_only, annualization)
+                       for combo in combos]
+            for future in futures:
+                rows.extend(future.result())
+
+    results = pd.DataFrame(rows)
+    if sort_by and sort_by in results.columns:
+        results = results.sort_values(sort_by, ascending=False, na_position="last", ignore_index=True)
+    return results
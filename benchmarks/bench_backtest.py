@@ -0,0 +1,47 @@
+"""Time a full-history confluence backtest and a small parameter sweep
+
+Run from the repository root, on synthetic data or a cached/fixture OHLCV file:
+
+    python benchmarks/bench_backtest.py [--bars 1000000] [--data path.csv] [--processes N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backtest import load_ohlcv, parameter_sweep, run_backtest  # noqa: E402
+from bench_indicator_backends import synthetic_ohlcv  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bars", type=int, default=1000000)
+    parser.add_argument("--data", help="OHLCV file (.csv, .parquet or .pkl) instead of synthetic data")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--sweep-bars", type=int, default=200000)
+    args = parser.parse_args()
+
+    df = load_ohlcv(args.data) if args.data else synthetic_ohlcv(args.bars)
+
+    start = time.perf_counter()
+    result = run_backtest(df)
+    elapsed = time.perf_counter() - start
+    print(f"backtest: {len(df)} bars in {elapsed:.2f}s")
+    for name, value in result.metrics.items():
+        print(f"  {name:>20}: {value}")
+
+    grid = {"threshold": [2, 3, 4, 5], "rsi_window": [10, 14, 21], "bb_dev": [2.0, 2.5]}
+    sweep_df = df.iloc[-args.sweep_bars:]
+    start = time.perf_counter()
+    results = parameter_sweep(sweep_df, grid, processes=args.processes)
+    elapsed = time.perf_counter() - start
+    print(f"\nsweep: {len(results)} combinations over {len(sweep_df)} bars in {elapsed:.2f}s")
+    columns = list(grid) + ["total_return", "sharpe", "max_drawdown", "hit_rate", "trades"]
+    print(results[columns].head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
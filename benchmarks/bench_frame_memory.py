@@ -0,0 +1,55 @@
+"""Bytes per analysis frame in each TradingAnalyzer storage mode
+
+For each mode this reports the size of the indicator frame returned by
+add_comprehensive_indicators, the largest float32 rounding error seen, and how
+many bars' confluence signals differ from the full-precision frame.
+Run from the repository root:
+
+    python benchmarks/bench_frame_memory.py [--bars 1000] [--backend numpy]
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from betterpredictormodule import TradingAnalyzer  # noqa: E402
+from bench_indicator_backends import synthetic_ohlcv  # noqa: E402
+from compact_frames import FLOAT32_RELATIVE_ERROR, STORAGE_MODES, frame_memory_bytes  # noqa: E402
+
+
+def max_relative_error(frame, reference):
+    exact = reference[frame.columns].to_numpy()
+    stored = frame.to_numpy(dtype=np.float64)
+    scale = np.maximum(np.abs(exact), np.finfo(np.float64).tiny)
+    return float(np.max(np.abs(stored - exact) / scale))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bars", type=int, default=1000)
+    parser.add_argument("--backend", choices=["ta", "numpy"], default="numpy")
+    args = parser.parse_args()
+
+    # Indicator warm-up drops the first ~50 bars
+    df = synthetic_ohlcv(args.bars + 60)
+    reference = None
+    print(f"{args.bars} bars, {args.backend} backend, float32 bound {FLOAT32_RELATIVE_ERROR:.1e}")
+    print(f"{'mode':>8} {'columns':>8} {'bytes':>10} {'vs full':>8} {'max rel err':>12} {'signal diffs':>13}")
+    for mode in STORAGE_MODES:
+        analyzer = TradingAnalyzer(ohlcv_cache=None, indicator_backend=args.backend, storage=mode)
+        frame = analyzer.add_comprehensive_indicators(df.copy()).iloc[-args.bars:]
+        if reference is None:
+            reference = frame
+            reference_signals = analyzer.confluence_history(reference).signals["overall_signal"].to_numpy()
+        signals = analyzer.confluence_history(frame).signals["overall_signal"].to_numpy()
+        nbytes = frame_memory_bytes(frame)
+        print(f"{mode:>8} {frame.shape[1]:>8} {nbytes:>10,} {nbytes / frame_memory_bytes(reference):>7.0%} "
+              f"{max_relative_error(frame, reference):>12.1e} {int((signals != reference_signals).sum()):>13}")
+
+
+if __name__ == "__main__":
+    main()
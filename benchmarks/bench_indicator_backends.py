@@ -0,0 +1,69 @@
+"""Compare the ta-based and NumPy indicator backends of TradingAnalyzer
+
+Run from the repository root:
+
+    python benchmarks/bench_indicator_backends.py [--sizes 1000 10000 100000] [--repeat 3] [--subset RSI_14 MACD]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from betterpredictormodule import TradingAnalyzer  # noqa: E402
+
+
+def synthetic_ohlcv(bars, seed=7):
+    """Random-walk OHLCV frame shaped like fetch_binance_ohlcv output"""
+    rng = np.random.default_rng(seed)
+    close = 60000 * np.exp(np.cumsum(rng.normal(0, 0.003, bars)))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.002, bars))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.002, bars))
+    volume = rng.uniform(10, 100, bars)
+    index = pd.date_range("2020-01-01", periods=bars, freq="15min", name="Open Time")
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}, index=index)
+
+
+def best_time(func, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        frame = df.copy()
+        start = time.perf_counter()
+        result = func(frame)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--subset", nargs="+", default=["RSI_14", "MACD", "MACD_Signal"],
+                        help="indicators for the screener-style subset column")
+    args = parser.parse_args()
+
+    ta_backend = TradingAnalyzer(ohlcv_cache=None, indicator_backend="ta")
+    numpy_backend = TradingAnalyzer(ohlcv_cache=None, indicator_backend="numpy")
+
+    def subset(frame):
+        return numpy_backend.add_comprehensive_indicators(frame, args.subset)
+
+    print(f"subset: {', '.join(args.subset)}")
+    print(f"{'bars':>8} {'ta (ms)':>10} {'numpy (ms)':>11} {'speedup':>8} {'max rel diff':>13} {'subset (ms)':>12}")
+    for bars in args.sizes:
+        df = synthetic_ohlcv(bars)
+        ta_time, ta_frame = best_time(ta_backend.add_comprehensive_indicators, df, args.repeat)
+        np_time, np_frame = best_time(numpy_backend.add_comprehensive_indicators, df, args.repeat)
+        subset_time, _ = best_time(subset, df, args.repeat)
+        diff = ((np_frame - ta_frame).abs() / np.maximum(1, ta_frame.abs())).max().max()
+        print(f"{bars:>8} {ta_time * 1000:>10.1f} {np_time * 1000:>11.1f} {ta_time / np_time:>7.1f}x {diff:>13.2e} "
+              f"{subset_time * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
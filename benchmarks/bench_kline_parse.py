@@ -0,0 +1,101 @@
+"""Time and peak memory of turning a /klines payload into the OHLCV frame
+
+Compares the previous path (response.json() -> 12-column object DataFrame ->
+astype) with parse_klines + array_to_frame, with orjson and with stdlib json.
+Run from the repository root:
+
+    python benchmarks/bench_kline_parse.py [--klines 1000] [--repeat 200]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import kline_sync  # noqa: E402
+from kline_sync import array_to_frame, parse_klines  # noqa: E402
+
+
+def synthetic_payload(klines, seed=7):
+    """Raw /klines response body shaped like Binance's (prices and volumes as strings)"""
+    rng = np.random.default_rng(seed)
+    close = 60000 * np.exp(np.cumsum(rng.normal(0, 0.003, klines)))
+    start = 1700000000000
+    rows = []
+    for i, price in enumerate(close):
+        open_time = start + i * 900000
+        rows.append([
+            open_time, f"{price * 0.999:.8f}", f"{price * 1.002:.8f}", f"{price * 0.997:.8f}", f"{price:.8f}",
+            f"{rng.uniform(10, 100):.8f}", open_time + 899999, f"{rng.uniform(1e5, 1e6):.8f}",
+            int(rng.integers(100, 5000)), f"{rng.uniform(5, 50):.8f}", f"{rng.uniform(1e5, 5e5):.8f}", "0",
+        ])
+    return json.dumps(rows, separators=(",", ":")).encode()
+
+
+def legacy_frame(body):
+    """The previous TradingAnalyzer._klines_frame over response.json()"""
+    df = pd.DataFrame(json.loads(body), columns=[
+        "Open Time", "Open", "High", "Low", "Close", "Volume",
+        "Close Time", "Quote Asset Volume", "Number of Trades",
+        "Taker Buy Base", "Taker Buy Quote", "Ignore"
+    ])
+    df['Open Time'] = pd.to_datetime(df['Open Time'], unit='ms')
+    df = df[["Open Time", "Open", "High", "Low", "Close", "Volume"]].astype({
+        "Open": float, "High": float, "Low": float, "Close": float, "Volume": float
+    })
+    df.set_index('Open Time', inplace=True)
+    return df
+
+
+def fast_frame(body):
+    return array_to_frame(parse_klines(body), copy=False)
+
+
+def fast_frame_stdlib(body):
+    loads, kline_sync._loads = kline_sync._loads, json.loads
+    try:
+        return fast_frame(body)
+    finally:
+        kline_sync._loads = loads
+
+
+def measure(func, body, repeat):
+    func(body)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(body)
+    elapsed = (time.perf_counter() - start) / repeat
+    tracemalloc.start()
+    func(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--klines", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    body = synthetic_payload(args.klines)
+    pd.testing.assert_frame_equal(legacy_frame(body), fast_frame(body))
+    print(f"payload: {args.klines} klines, {len(body) / 1024:.0f} KiB "
+          f"(orjson {'available' if kline_sync._loads is not json.loads else 'not installed'})")
+
+    paths = [("legacy", legacy_frame), ("parse_klines", fast_frame), ("parse_klines/json", fast_frame_stdlib)]
+    baseline = None
+    for name, func in paths:
+        elapsed, peak = measure(func, body, args.repeat)
+        baseline = baseline or elapsed
+        print(f"{name:>18}: {elapsed * 1e6:8.0f} us  peak {peak / 1024:7.0f} KiB  ({baseline / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
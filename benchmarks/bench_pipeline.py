@@ -0,0 +1,182 @@
+"""Offline benchmark suite for the betterpredictormodule prediction pipeline
+
+Every stage is timed on its own against the local fixture stub (market_stub.py):
+Binance and CoinGecko fetch + parse, add_comprehensive_indicators, each
+analyze_*_confluence method and format_confluence_analysis, over several bar
+counts, plus end-to-end get_comprehensive_analysis over several symbol counts.
+Results are written as JSON. With --baseline, the run exits with status 1 when
+any stage's best time is more than --threshold slower than in the baseline.
+
+Run from the repository root:
+
+    python benchmarks/bench_pipeline.py [--bars 1000 10000 100000] [--symbols 1 50 500]
+        [--output results.json] [--baseline baseline.json] [--threshold 0.25] [--min-delta 0.02] [--quick]
+
+`--record` replaces the fixtures with live API responses first.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import kline_sync  # noqa: E402
+from betterpredictormodule import TradingAnalyzer  # noqa: E402
+from circuit_breaker import SourceHealth  # noqa: E402
+from market_stub import StubClient, StubServer, record_fixtures  # noqa: E402
+
+CONFLUENCE_METHODS = [
+    "analyze_momentum_confluence", "analyze_trend_confluence",
+    "analyze_volatility_confluence", "analyze_volume_confluence",
+]
+
+
+def measure(func, setup=None, repeat=5, budget=10.0, min_run_seconds=0.05):
+    """Best/median seconds per call; fast calls are looped until one run lasts `min_run_seconds`"""
+    args = setup() if setup else ()
+    start = time.perf_counter()
+    func(*args)
+    number = max(1, int(min_run_seconds / max(time.perf_counter() - start, 1e-9)))
+    timings = []
+    spent = 0.0
+    while len(timings) < repeat and (not timings or spent < budget):
+        calls = [setup() if setup else () for _ in range(number)]
+        start = time.perf_counter()
+        for call_args in calls:
+            func(*call_args)
+        elapsed = time.perf_counter() - start
+        spent += elapsed
+        timings.append(elapsed / number)
+    return {"min": min(timings), "median": statistics.median(timings), "runs": len(timings), "number": number}
+
+
+def make_analyzer(stub_url, backend):
+    return TradingAnalyzer(ohlcv_cache=None, indicator_backend=backend, http_client=StubClient(stub_url),
+                           weight_budget=None, candle_store=None, source_health=SourceHealth(), symbol_index=None)
+
+
+def bar_stages(analyzer, bars, repeat, budget):
+    """Per-stage timings for one BTCUSDT series of `bars` candles"""
+    results = {}
+    results["fetch_parse"] = measure(lambda: analyzer.fetch_binance_ohlcv("BTCUSDT", "15m", bars),
+                                     repeat=repeat, budget=budget)
+    df = analyzer.fetch_binance_ohlcv("BTCUSDT", "15m", bars)
+    if len(df) != bars:
+        raise Exception(f"Stub returned {len(df)} bars instead of {bars}")
+
+    results["add_comprehensive_indicators"] = measure(analyzer.add_comprehensive_indicators,
+                                                      setup=lambda: (df.copy(),), repeat=repeat, budget=budget)
+    latest = analyzer.add_comprehensive_indicators(df.copy()).iloc[-1]
+    for name in CONFLUENCE_METHODS:
+        results[name] = measure(lambda method=getattr(analyzer, name): method(latest), repeat=repeat, budget=budget)
+
+    analysis = analyzer.build_analysis("BTCUSDT", latest)
+    results["format_confluence_analysis"] = measure(lambda: analyzer.format_confluence_analysis(analysis),
+                                                    repeat=repeat, budget=budget)
+    return results
+
+
+def symbol_stage(analyzer, symbols, repeat, budget):
+    """End-to-end get_comprehensive_analysis over `symbols` distinct symbols (default 1000 bars each)"""
+    names = ["BTCUSDT"] + [f"S{i:03d}USDT" for i in range(1, symbols)]
+
+    def run():
+        for name in names:
+            analysis = analyzer.get_comprehensive_analysis(name, "15m")
+            if "error" in analysis:
+                raise Exception(f"{name}: {analysis['error']}")
+
+    result = measure(run, repeat=repeat, budget=budget)
+    result["per_symbol"] = result["min"] / symbols
+    return result
+
+
+def compare(results, baseline, threshold, min_delta=0.0):
+    """Stages whose best time regressed by more than `threshold` (and `min_delta` seconds) against the baseline"""
+    regressions = []
+    for stage, current in results.items():
+        previous = baseline.get(stage)
+        if previous is None:
+            continue
+        ratio = current["min"] / previous["min"]
+        if ratio > 1 + threshold and current["min"] - previous["min"] > min_delta:
+            regressions.append((stage, previous["min"], current["min"], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bars", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--symbols", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--quick", action="store_true", help="only 1k/10k bars and 1/50 symbols")
+    parser.add_argument("--backend", choices=["ta", "numpy"], default="ta")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=10.0, help="seconds per stage before repeats stop")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, e.g. 0.25 = 25%%")
+    parser.add_argument("--min-delta", type=float, default=0.02,
+                        help="ignore slowdowns smaller than this many milliseconds (timer noise on µs stages)")
+    parser.add_argument("--record", action="store_true", help="re-record the fixtures from the live APIs")
+    args = parser.parse_args()
+    if args.quick:
+        args.bars = [bars for bars in args.bars if bars <= 10000]
+        args.symbols = [symbols for symbols in args.symbols if symbols <= 50]
+
+    if args.record:
+        record_fixtures()
+
+    results = {}
+    with StubServer() as stub:
+        analyzer = make_analyzer(stub.url, args.backend)
+        results["coingecko_fetch_parse"] = measure(lambda: analyzer.fetch_coingecko_ohlcv("bitcoin", 30),
+                                                   repeat=args.repeat, budget=args.budget)
+        for bars in args.bars:
+            for stage, result in bar_stages(analyzer, bars, args.repeat, args.budget).items():
+                results[f"{stage}/bars={bars}"] = result
+        for symbols in args.symbols:
+            results[f"get_comprehensive_analysis/symbols={symbols}"] = symbol_stage(
+                analyzer, symbols, args.repeat, args.budget)
+
+    for stage, result in results.items():
+        print(f"{stage:>50}: {result['min'] * 1000:10.3f} ms  (median {result['median'] * 1000:.3f}, "
+              f"{result['runs']} runs)")
+
+    report = {
+        "meta": {
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "json_decoder": kline_sync._loads.__module__,
+            "backend": args.backend,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold, args.min_delta / 1000)
+        for stage, before, after, ratio in regressions:
+            print(f"REGRESSION {stage}: {before * 1000:.3f} ms -> {after * 1000:.3f} ms ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"no stage regressed by more than {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Cold import time of the app entry point and analysis modules, with a budget
+
+Each module is imported in a fresh interpreter under `python -X importtime`
+(--repeat times, keeping the fastest run) and its cumulative import time is
+compared with its budget. The welcome screen and the analysis module itself
+must also not pull in the analysis stack (pandas, NumPy, ta, requests), which
+betterpredictormodule only loads when an analyzer is built. Exits with status 1
+when a budget is exceeded or a forbidden module is imported. Run from the
+repository root:
+
+    python benchmarks/bench_startup.py [--module app betterpredictormodule]
+        [--budget app=1500] [--repeat 5] [--top 8]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Milliseconds of cumulative import time allowed per module
+DEFAULT_BUDGETS_MS = {
+    "app": 1500,
+    "betterpredictormodule": 100,
+}
+
+# Modules that must stay out of a module's import graph
+HEAVY_MODULES = ("pandas", "numpy", "ta", "requests")
+FORBIDDEN = {
+    "app": HEAVY_MODULES + ("betterpredictormodule",),
+    "betterpredictormodule": HEAVY_MODULES,
+}
+
+
+def import_profile(module):
+    """(cumulative ms, {module: cumulative ms} of its direct imports, all modules it imported) for one cold import"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise Exception(f"import {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    # Lines come in post-order: a module's imports are listed, indented one level deeper, just before it
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((depth, name.strip(), int(cumulative_us) / 1000))
+    end = max(i for i, row in enumerate(rows) if row[1] == module and row[0] == 0)
+    start = end
+    while start > 0 and rows[start - 1][0] > 0:
+        start -= 1
+    subtree = rows[start:end]
+    children = {name: ms for depth, name, ms in subtree if depth == 1}
+    return rows[end][2], children, {name for _, name, _ in subtree}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", nargs="+", default=list(DEFAULT_BUDGETS_MS))
+    parser.add_argument("--budget", action="append", default=[], metavar="MODULE=MS",
+                        help="override a module's budget in milliseconds")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="largest imports to list per module")
+    args = parser.parse_args()
+
+    budgets = dict(DEFAULT_BUDGETS_MS)
+    for item in args.budget:
+        name, ms = item.split("=")
+        budgets[name] = float(ms)
+
+    failures = []
+    for module in args.module:
+        try:
+            runs = [import_profile(module) for _ in range(args.repeat)]
+        except Exception as e:
+            print(f"{module}: {e}")
+            failures.append(module)
+            continue
+        total, children, imported = min(runs, key=lambda run: run[0])
+        budget = budgets.get(module)
+        status = "" if budget is None else f" (budget {budget:.0f} ms)"
+        print(f"{module}: {total:.1f} ms cold import{status}")
+        for name, cumulative in sorted(children.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {name:<30} {cumulative:8.1f} ms")
+        if budget is not None and total > budget:
+            print(f"OVER BUDGET {module}: {total:.1f} ms > {budget:.0f} ms")
+            failures.append(module)
+        leaked = [name for name in FORBIDDEN.get(module, ()) if name in imported]
+        if leaked:
+            print(f"HEAVY IMPORT {module}: pulls in {', '.join(leaked)}")
+            failures.append(module)
+
+    if failures:
+        sys.exit(1)
+    print("all modules within their import budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Symbol index build time and lookup latency over a 15k-coin list
+
+Builds a SymbolIndex from a synthetic CoinGecko coin list (or a real
+/coins/list payload via --coins-file) with Binance pairs for part of it, then
+reports p50/p99 latency of pair, id, prefix, fuzzy and resolve lookups. The
+O(N) per-lookup scan it replaces (fuzzywuzzy's extractOne when installed,
+otherwise difflib) is timed on a few queries for comparison.
+Run from the repository root:
+
+    python benchmarks/bench_symbol_index.py [--coins 15000] [--queries 2000] [--coins-file coins.json]
+"""
+import argparse
+import difflib
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from symbol_index import SymbolIndex  # noqa: E402
+
+try:
+    from fuzzywuzzy import process as fuzzy_process
+except ImportError:
+    fuzzy_process = None
+
+SYLLABLES = ["bit", "coin", "chain", "lin", "sol", "ana", "meta", "doge", "ape", "fin", "net", "ver", "tera",
+             "nova", "pol", "dot", "link", "moon", "swap", "dex", "bridge", "gold", "avax", "cos", "mos", "ar"]
+
+
+def synthetic_coins(n, seed=0):
+    """CoinGecko-style {id, symbol, name} entries with the ticker collisions real lists have"""
+    rng = random.Random(seed)
+    coins = []
+    seen = set()
+    while len(coins) < n:
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3))).capitalize()
+        if rng.random() < 0.2:
+            name += " " + rng.choice(["Token", "Protocol", "Finance", "Bridged", "Wrapped"])
+        coin_id = name.lower().replace(" ", "-")
+        suffix = 2
+        while coin_id in seen:
+            coin_id = f"{name.lower().replace(' ', '-')}-{suffix}"
+            suffix += 1
+        seen.add(coin_id)
+        ticker = "".join(ch for ch in name.lower() if ch.isalpha())[:rng.randint(2, 5)]
+        coins.append({"id": coin_id, "symbol": ticker, "name": name})
+    return coins
+
+
+def synthetic_pairs(coins, n, seed=0):
+    rng = random.Random(seed)
+    pairs = {}
+    for coin in rng.sample(coins, min(n, len(coins))):
+        base = coin["symbol"].upper()
+        for quote in ("USDT", "BTC"):
+            pairs[base + quote] = {"symbol": base + quote, "baseAsset": base, "quoteAsset": quote}
+    return list(pairs.values())
+
+
+def typo(text, rng):
+    i = rng.randrange(len(text))
+    return text[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + text[i + 1:]
+
+
+def latency(func, queries):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        func(query)
+        timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--coins", type=int, default=15000)
+    parser.add_argument("--pairs", type=int, default=2000, help="coins listed on Binance (USDT and BTC pairs)")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--coins-file", help="real CoinGecko /coins/list JSON instead of synthetic coins")
+    args = parser.parse_args()
+
+    if args.coins_file:
+        with open(args.coins_file) as f:
+            coins = json.load(f)
+    else:
+        coins = synthetic_coins(args.coins)
+    pairs = synthetic_pairs(coins, args.pairs)
+
+    start = time.perf_counter()
+    index = SymbolIndex(coins, pairs)
+    build = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "symbol_index.json")
+        index.save(path)
+        size = os.path.getsize(path)
+        start = time.perf_counter()
+        SymbolIndex.load(path)
+        load = time.perf_counter() - start
+    print(f"{len(index)} coins, {len(index.pairs)} pairs: build {build * 1000:.0f} ms, "
+          f"load {load * 1000:.0f} ms, {size / 1024:.0f} KiB on disk")
+
+    rng = random.Random(1)
+    sample = [rng.choice(coins) for _ in range(args.queries)]
+    cases = {
+        "pair -> id": (index.coingecko_id, [rng.choice(pairs)["symbol"] for _ in range(args.queries)]),
+        "id -> id": (index.coingecko_id, [coin["id"] for coin in sample]),
+        "id -> pair": (index.binance_pair, [coin["id"] for coin in sample]),
+        "prefix": (index.prefix, [coin["name"].lower()[:3] for coin in sample]),
+        "fuzzy (typo)": (index.fuzzy, [typo(coin["name"].lower(), rng) for coin in sample]),
+        "resolve (typo)": (index.resolve, [typo(coin["name"].lower(), rng) for coin in sample]),
+    }
+    print(f"{'lookup':>16} {'p50 us':>9} {'p99 us':>9}")
+    for name, (func, queries) in cases.items():
+        p50, p99 = latency(func, queries)
+        print(f"{name:>16} {p50:>9.1f} {p99:>9.1f}")
+
+    names = [coin["name"].lower() for coin in coins]
+    queries = [typo(coin["name"].lower(), rng) for coin in sample[:5]]
+    if fuzzy_process is not None:
+        label, scan = "fuzzywuzzy scan", lambda query: fuzzy_process.extractOne(query, names)
+    else:
+        label, scan = "difflib scan", lambda query: difflib.get_close_matches(query, names, n=1)
+    p50, _ = latency(scan, queries)
+    print(f"{label:>16} {p50:>9.1f}           (O(N) per lookup, {len(queries)} queries)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Local HTTP stand-in for the Binance klines and CoinGecko OHLC endpoints
+
+Responses are built from the payload fixtures in benchmarks/fixtures: any
+symbol, interval and startTime/endTime/limit window is answered by tiling
+the recorded klines (each repeat scaled to continue from the previous close),
+so benchmarks run offline with the same wire format and paging behaviour as
+the real APIs. The server runs in a child process so serving requests does
+not compete with the code being measured for the GIL.
+"""
+import json
+import multiprocessing
+import os
+import sys
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from market_http import MarketDataClient  # noqa: E402
+from ohlcv_cache import candle_open_time, interval_to_seconds  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+BINANCE_FIXTURE = "binance_klines_BTCUSDT_15m.json"
+COINGECKO_FIXTURE = "coingecko_ohlc_bitcoin_30d.json"
+
+BINANCE_URL = "https://api.binance.com"
+COINGECKO_URL = "https://api.coingecko.com"
+
+
+def load_fixture(name, fixtures_dir=FIXTURES_DIR):
+    with open(os.path.join(fixtures_dir, name)) as f:
+        return json.load(f)
+
+
+class FixtureMarket:
+    """Kline and OHLC payloads for arbitrary windows, derived from the fixtures"""
+
+    def __init__(self, fixtures_dir=FIXTURES_DIR):
+        klines = load_fixture(BINANCE_FIXTURE, fixtures_dir)
+        first_open = float(klines[0][1])
+        # Prices relative to the first open; each repeat of the fixture is scaled by `growth`
+        self.shape = [
+            [float(row[i]) / first_open for i in range(1, 5)] + [float(row[5]), row[8]] for row in klines
+        ]
+        self.growth = float(klines[-1][4]) / first_open
+        self.ohlc = load_fixture(COINGECKO_FIXTURE, fixtures_dir)
+        # Rendered bodies, so repeated benchmark requests measure the client rather than the stub
+        self._payloads = {}
+
+    def payload(self, path, query):
+        """Encoded JSON body for a request, or None for an unknown path"""
+        key = (path, tuple(sorted(query.items())), int(candle_open_time("1m")))
+        body = self._payloads.get(key)
+        if body is None:
+            if path == "/api/v3/klines":
+                data = self.klines(query["symbol"], query["interval"], int(query.get("limit", 500)),
+                                   query.get("startTime"), query.get("endTime"))
+            elif path.startswith("/api/v3/coins/") and path.endswith("/ohlc"):
+                data = self.coingecko_ohlc(path.split("/")[4], query.get("days"))
+            else:
+                return None
+            body = self._payloads[key] = json.dumps(data, separators=(",", ":")).encode()
+        return body
+
+    def klines(self, symbol, interval, limit=500, start_time=None, end_time=None):
+        step = interval_to_seconds(interval) * 1000
+        current = int(candle_open_time(interval) * 1000)
+        end = current if end_time is None else min(int(end_time) // step * step, current)
+        if start_time is None:
+            start = end - (limit - 1) * step
+        else:
+            start = -(-int(start_time) // step) * step
+            end = min(end, start + (limit - 1) * step)
+        base = 1000 + zlib.crc32(symbol.encode()) % 50000  # Per-symbol price level
+        rows = []
+        n = len(self.shape)
+        for open_time in range(start, end + 1, step):
+            bar = open_time // step
+            scale = base * self.growth ** (bar // n)
+            o, h, l, c, volume, trades = self.shape[bar % n]
+            rows.append([
+                open_time, f"{o * scale:.8f}", f"{h * scale:.8f}", f"{l * scale:.8f}", f"{c * scale:.8f}",
+                f"{volume:.8f}", open_time + step - 1, f"{volume * c * scale:.8f}", trades, "0", "0", "0",
+            ])
+        return rows
+
+    def coingecko_ohlc(self, coin_id, days):
+        now = int(time.time() * 1000)
+        last = self.ohlc[-1][0]
+        return [[now - (last - row[0])] + row[1:] for row in self.ohlc]
+
+
+def _handler(market):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+            payload = market.payload(parts.path, query)
+            if payload is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def _serve(fixtures_dir, ready):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(FixtureMarket(fixtures_dir)))
+    server.daemon_threads = True
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+class StubServer:
+    """Context manager running the stub in a child process; `url` is its base URL"""
+
+    def __init__(self, fixtures_dir=FIXTURES_DIR):
+        self.fixtures_dir = fixtures_dir
+        self.process = None
+        self.url = None
+
+    def __enter__(self):
+        ready = multiprocessing.Queue()
+        self.process = multiprocessing.Process(target=_serve, args=(self.fixtures_dir, ready), daemon=True)
+        self.process.start()
+        self.url = f"http://127.0.0.1:{ready.get(timeout=30)}"
+        return self
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.join()
+
+
+class StubClient(MarketDataClient):
+    """MarketDataClient that sends Binance and CoinGecko requests to a StubServer"""
+
+    def __init__(self, stub_url, **kwargs):
+        super().__init__(**kwargs)
+        self.stub_url = stub_url
+
+    def get(self, url, timeout=10, **kwargs):
+        for real in (BINANCE_URL, COINGECKO_URL):
+            if url.startswith(real):
+                url = self.stub_url + url[len(real):]
+        return super().get(url, timeout, **kwargs)
+
+
+def record_fixtures(fixtures_dir=FIXTURES_DIR, client=None):
+    """Replace the fixtures with live Binance and CoinGecko responses"""
+    client = client or MarketDataClient()
+    sources = [
+        (BINANCE_FIXTURE, f"{BINANCE_URL}/api/v3/klines?symbol=BTCUSDT&interval=15m&limit=1000"),
+        (COINGECKO_FIXTURE, f"{COINGECKO_URL}/api/v3/coins/bitcoin/ohlc?vs_currency=usd&days=30"),
+    ]
+    for name, url in sources:
+        response = client.get(url, timeout=30)
+        if response.status_code != 200:
+            raise Exception(f"Recording {name} failed: {response.status_code} {response.text[:200]}")
+        with open(os.path.join(fixtures_dir, name), "wb") as f:
+            f.write(response.content)
+        print(f"recorded {name} ({len(response.content)} bytes)")
@@ -1,100 +1,474 @@
-import requests
-import pandas as pd
-import numpy as np
-from ta.momentum import RSIIndicator, StochasticOscillator, WilliamsRIndicator
-from ta.trend import EMAIndicator, SMAIndicator, MACD, ADXIndicator, IchimokuIndicator
-from ta.volatility import BollingerBands, AverageTrueRange, KeltnerChannel
-from ta.volume import OnBalanceVolumeIndicator, ChaikinMoneyFlowIndicator
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager, nullcontext
+import asyncio
+import copy
+import os
+import threading
+import time
 import warnings
 warnings.filterwarnings('ignore')
 
+# pandas, NumPy, requests and the analysis submodules (with the shared clients, budgets and
+# caches they construct) are imported inside the methods that use them, so importing this
+# module stays cheap for pages that only need it once a user asks for an analysis
+
+# Marks constructor arguments that default to a process-wide shared instance
+_SHARED = object()
+
+_analyzer_lock = threading.Lock()
+_analyzer = None
+
+
+
+def _analyze_scan_frame(symbol, interval, df, indicator_backend, confluence_threshold):
+    """Process-pool entry point for TradingAnalyzer.scan"""
+    analyzer = TradingAnalyzer(ohlcv_cache=None, indicator_backend=indicator_backend)
+    analyzer.confluence_threshold = confluence_threshold
+    analysis = analyzer.analyze_ohlcv(symbol, interval, df)
+    if "error" not in analysis:
+        counts = analysis["confluence_counts"]
+        analysis["interval"] = interval
+        analysis["confluence_score"] = counts["bullish"] - counts["bearish"]
+    return analysis
+
+
+class _RequestPacer:
+    """Spaces out requests so a scan stays under a requests-per-second budget"""
+
+    def __init__(self, requests_per_second):
+        self.min_interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
 class TradingAnalyzer:
-    def __init__(self):
+    def __init__(self, ohlcv_cache=_SHARED, incremental=False, streaming_indicators=False,
+                 indicator_backend="ta", http_client=_SHARED, weight_budget=_SHARED,
+                 request_priority=None, candle_store=_SHARED, kline_stream=None,
+                 async_http_client=_SHARED, source_health=_SHARED, storage="full",
+                 metrics=_SHARED, debug=None, profile_hook=None, precompute=None,
+                 result_cache=_SHARED, symbol_index=_SHARED):
+        from ohlcv_cache import shared_ohlcv_cache
+        from kline_sync import shared_kline_sync
+        from candle_store import shared_candle_store
+        from streaming_indicators import shared_indicator_store
+        from compact_frames import STORAGE_MODES
+        from market_http import shared_http_client
+        from async_http import shared_async_http_client
+        from rate_limiter import shared_weight_budget, PRIORITY_INTERACTIVE
+        from circuit_breaker import shared_source_health
+        from instrumentation import shared_metrics
+        from result_cache import shared_result_cache
+        from symbol_index import shared_symbol_index
+        # Arguments left at _SHARED use the process-wide instance; None still disables
+        ohlcv_cache = shared_ohlcv_cache if ohlcv_cache is _SHARED else ohlcv_cache
+        http_client = shared_http_client if http_client is _SHARED else http_client
+        weight_budget = shared_weight_budget if weight_budget is _SHARED else weight_budget
+        candle_store = shared_candle_store if candle_store is _SHARED else candle_store
+        async_http_client = shared_async_http_client if async_http_client is _SHARED else async_http_client
+        source_health = shared_source_health if source_health is _SHARED else source_health
+        metrics = shared_metrics if metrics is _SHARED else metrics
+        result_cache = shared_result_cache if result_cache is _SHARED else result_cache
+        symbol_index = shared_symbol_index if symbol_index is _SHARED else symbol_index
         self.confluence_threshold = 3  # Minimum confluences for strong signals
+        self.http = http_client  # Pooled keep-alive sessions with retry/backoff
+        self.ahttp = async_http_client  # Same policy for the a* coroutine methods
+        # Per-source circuit breakers (None disables); open sources are skipped without a request
+        self.source_health = source_health
+        # Binance request-weight budget (None disables); background work should use PRIORITY_BACKGROUND
+        self.weight_budget = weight_budget
+        self.request_priority = PRIORITY_INTERACTIVE if request_priority is None else request_priority
+        self.ohlcv_cache = ohlcv_cache  # None disables caching
+        # Incremental mode keeps rolling kline buffers and only fetches new candles
+        self.kline_sync = shared_kline_sync if incremental else None
+        # On-disk candle history (None disables); only missing bars are downloaded
+        self.candle_store = candle_store
+        # Live WebSocket klines; subscribed series are answered from memory (see start_kline_stream)
+        self.kline_stream = kline_stream
+        # Analyses refreshed after each candle close for a watchlist (see start_precompute)
+        self.precompute = precompute
+        # Analyses shared with the other processes on this host (None disables); see result_cache.py
+        self.result_cache = result_cache
+        # Pair/ticker/name -> CoinGecko id lookups (None falls back to guessing from the pair)
+        self.symbol_index = symbol_index
+        # Streaming mode updates indicators per new candle instead of recomputing the frame
+        self.indicator_store = shared_indicator_store if streaming_indicators else None
+        if indicator_backend not in ("ta", "numpy"):
+            raise ValueError(f"Unknown indicator backend: {indicator_backend}")
+        self.indicator_backend = indicator_backend
+        # Storage mode of frames returned by add_comprehensive_indicators (see compact_frames.py);
+        # signals are always computed at full precision
+        if storage not in STORAGE_MODES:
+            raise ValueError(f"Unknown storage mode: {storage}")
+        self.storage = storage
+        # Stage timers and counters (None disables); see instrumentation.py
+        self.metrics = metrics
+        # Debug mode attaches per-stage timings to every analysis dict
+        self.debug = os.environ.get("ANALYSIS_DEBUG", "").lower() in ("1", "true", "yes") if debug is None else debug
+        # Called as profile_hook(symbol, interval) for a context manager around each analysis
+        self.profile_hook = profile_hook
+        # In-flight async analyses by (event loop, symbol, interval)
+        self._inflight = {}
     
     def fetch_coingecko_ohlcv(self, symbol="bitcoin", days=30):
         """Fetch OHLCV data from CoinGecko (global alternative)"""
-        # Convert common trading symbols to CoinGecko IDs
-        symbol_map = {
-            "BTCUSDT": "bitcoin",
-            "ETHUSDT": "ethereum", 
-            "ADAUSDT": "cardano",
-            "SOLUSDT": "solana",
-            "DOTUSDT": "polkadot",
-            "LINKUSDT": "chainlink",
-            "MATICUSDT": "polygon",
-            "AVAXUSDT": "avalanche-2",
-            "ATOMUSDT": "cosmos",
-            "LTCUSDT": "litecoin"
-        }
-        
-        coin_id = symbol_map.get(symbol.upper(), symbol.lower().replace("usdt", ""))
-        
-        url = f"https://api.coingecko.com/api/v3/coins/{coin_id}/ohlc?vs_currency=usd&days={days}"
+        coin_id, url = self._coingecko_request(symbol, days)
         try:
-            response = requests.get(url, timeout=10)
-            if response.status_code != 200:
-                raise Exception(f"CoinGecko API Error {response.status_code}: {response.text}")
-            
-            data = response.json()
-            
-            # CoinGecko returns [timestamp, open, high, low, close]
-            df = pd.DataFrame(data, columns=["timestamp", "Open", "High", "Low", "Close"])
-            
-            # Convert timestamp and set index
-            df['Open Time'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df = df[["Open Time", "Open", "High", "Low", "Close"]].astype({
-                "Open": float, "High": float, "Low": float, "Close": float
-            })
-            
-            # Add synthetic volume (CoinGecko OHLC doesn't include volume)
-            # Use price volatility as volume proxy
-            df['Volume'] = (df['High'] - df['Low']) * df['Close'] * 1000
-            
-            df.set_index('Open Time', inplace=True)
-            return df
-            
+            return self._source_call("coingecko", self._coingecko_ohlcv, coin_id, days, url)
+        except Exception as e:
+            return self._stored_coingecko_ohlcv(coin_id, days, e)
+
+    def _coingecko_ohlcv(self, coin_id, days, url):
+        return self._parse_coingecko_response(coin_id, days, self.http.get(url, timeout=10))
+
+    async def afetch_coingecko_ohlcv(self, symbol="bitcoin", days=30):
+        """Async fetch_coingecko_ohlcv"""
+        coin_id, url = self._coingecko_request(symbol, days)
+        try:
+            return await self._asource_call("coingecko", self._acoingecko_ohlcv, coin_id, days, url)
         except Exception as e:
-            raise Exception(f"Failed to fetch data from CoinGecko: {str(e)}")
+            return self._stored_coingecko_ohlcv(coin_id, days, e)
+
+    async def _acoingecko_ohlcv(self, coin_id, days, url):
+        return self._parse_coingecko_response(coin_id, days, await self.ahttp.get(url, timeout=10))
+
+    def _source_call(self, source, func, *args):
+        """func(*args) through the source's circuit breaker, if enabled, timed as a stage"""
+        with self._stage(source):
+            if self.source_health is None:
+                result = func(*args)
+            else:
+                result = self.source_health.call(source, func, *args)
+        self._count("source", source=source)
+        return result
+
+    async def _asource_call(self, source, func, *args):
+        with self._stage(source):
+            if self.source_health is None:
+                result = await func(*args)
+            else:
+                result = await self.source_health.acall(source, func, *args)
+        self._count("source", source=source)
+        return result
+
+    def _stage(self, name):
+        return nullcontext() if self.metrics is None else self.metrics.stage(name)
+
+    def _count(self, name, value=1, **labels):
+        if self.metrics is not None:
+            self.metrics.count(name, value, **labels)
+
+    @contextmanager
+    def _instrumented(self, symbol, interval):
+        """Trace, time and (optionally) profile one analysis; yields its {stage: ms} timings"""
+        trace = nullcontext({}) if self.metrics is None else self.metrics.trace()
+        hook = nullcontext() if self.profile_hook is None else self.profile_hook(symbol, interval)
+        with trace as timings, hook, self._stage("total"):
+            yield timings
+
+    def _with_timings(self, analysis, timings):
+        if not self.debug:
+            return analysis
+        # Stream analyses are shared objects, so attach to a copy
+        analysis = dict(analysis)
+        analysis["timings_ms"] = {stage: round(ms, 3) for stage, ms in timings.items()}
+        return analysis
+
+    def _coingecko_request(self, symbol, days):
+        """CoinGecko coin id and OHLC URL for a trading symbol (or coin id, ticker or name)"""
+        from symbol_index import guess_coingecko_id
+        coin_id = None
+        if self.symbol_index is not None:
+            coin_id = self.symbol_index.get().coingecko_id(symbol)
+        if coin_id is None:
+            coin_id = guess_coingecko_id(symbol)
+        
+        return coin_id, f"https://api.coingecko.com/api/v3/coins/{coin_id}/ohlc?vs_currency=usd&days={days}"
+
+    def _parse_coingecko_response(self, coin_id, days, response):
+        import pandas as pd
+        from market_http import APIStatusError
+        if response.status_code != 200:
+            raise APIStatusError(f"CoinGecko API Error {response.status_code}: {response.text}", response.status_code)
+        self._count("payload_bytes", len(response.content), source="coingecko")
+        
+        data = response.json()
+        
+        # CoinGecko returns [timestamp, open, high, low, close]
+        df = pd.DataFrame(data, columns=["timestamp", "Open", "High", "Low", "Close"])
+        
+        # Convert timestamp and set index
+        df['Open Time'] = pd.to_datetime(df['timestamp'], unit='ms')
+        df = df[["Open Time", "Open", "High", "Low", "Close"]].astype({
+            "Open": float, "High": float, "Low": float, "Close": float
+        })
+        
+        # Add synthetic volume (CoinGecko OHLC doesn't include volume)
+        # Use price volatility as volume proxy
+        df['Volume'] = (df['High'] - df['Low']) * df['Close'] * 1000
+        
+        df.set_index('Open Time', inplace=True)
+        if self.candle_store is not None:
+            try:
+                # The newest candle may still be forming, so it is not persisted
+                self.candle_store.store_frame("coingecko", coin_id, f"{days}d", df,
+                                              closed_before=df.index[-1].timestamp())
+            except OSError as e:
+                print(f"Candle store unavailable ({e}), not persisting {coin_id}")
+        return df
+
+    def _stored_coingecko_ohlcv(self, coin_id, days, error):
+        """Stored CoinGecko candles after a failed request, or the error re-raised"""
+        if self.candle_store is not None:
+            stored = self.candle_store.read("coingecko", coin_id, f"{days}d",
+                                            start=(time.time() - days * 86400) * 1000)
+            if len(stored):
+                print(f"CoinGecko request failed, serving stored candles for {coin_id}")
+                self._count("source", source="coingecko_stored")
+                return stored
+        raise Exception(f"Failed to fetch data from CoinGecko: {str(error)}")
 
     def fetch_binance_ohlcv(self, symbol="BTCUSDT", interval="15m", limit=1000):
-        """Fetch OHLCV data from Binance with CoinGecko fallback"""
+        """Fetch OHLCV data from Binance with CoinGecko fallback, served from the shared cache"""
+        from ohlcv_cache import next_candle_close
+        if self.ohlcv_cache is None:
+            return self._download_binance_ohlcv(symbol, interval, limit)
+        
+        loaded = []
+        
+        def load():
+            loaded.append(True)
+            df = self._download_binance_ohlcv(symbol, interval, limit)
+            # Valid until the currently forming candle closes
+            return df, next_candle_close(interval)
+        
+        key = ("binance", symbol.upper(), interval, limit)
+        # Callers mutate the frame in place, so never hand out the cached object
+        df = self.ohlcv_cache.get_or_load(key, load).copy()
+        self._count("cache", result="miss" if loaded else "hit")
+        return df
+
+    async def afetch_binance_ohlcv(self, symbol="BTCUSDT", interval="15m", limit=1000, race=False):
+        """Async fetch_binance_ohlcv; with `race=True` Binance and CoinGecko are queried concurrently"""
+        from ohlcv_cache import next_candle_close
+        from history_loader import coingecko_days_for
+        from circuit_breaker import SourceUnavailable
+        key = ("binance", symbol.upper(), interval, limit)
+        if self.ohlcv_cache is not None:
+            cached = self.ohlcv_cache.get(key)
+            self._count("cache", result="miss" if cached is None else "hit")
+            if cached is not None:
+                return cached.copy()
+        
+        if race:
+            df = await self._arace_ohlcv(symbol, interval, limit)
+        else:
+            try:
+                df = await self._asource_call("binance", self._abinance_ohlcv, symbol, interval, limit)
+            except Exception as e:
+                try:
+                    self._count("fallback", reason="circuit_open" if isinstance(e, SourceUnavailable) else "error")
+                    if not isinstance(e, SourceUnavailable):
+                        print(f"Binance API failed, trying CoinGecko fallback for {symbol}")
+                    df = await self.afetch_coingecko_ohlcv(symbol, days=coingecko_days_for(interval, limit))
+                except:
+                    raise Exception(f"Failed to fetch data from both Binance and CoinGecko: {str(e)}")
+        
+        if self.ohlcv_cache is not None:
+            self.ohlcv_cache.put(key, df, next_candle_close(interval))
+        return df.copy()
+
+    async def _arace_ohlcv(self, symbol, interval, limit, binance_grace=0.5):
+        """First valid frame from Binance or CoinGecko
+        
+        Binance candles match the requested interval, so it is asked first;
+        CoinGecko is only queried once Binance has failed or spent
+        `binance_grace` seconds without answering, and from then on the first
+        valid response wins.
+        """
+        from history_loader import coingecko_days_for
+        # A source with an open circuit fails at once, leaving the other to answer
+        binance = asyncio.ensure_future(self._asource_call("binance", self._abinance_ohlcv, symbol, interval, limit))
+        pending = {binance}
+        coingecko = None
+        errors = []
+        try:
+            while pending:
+                timeout = binance_grace if coingecko is None else None
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        errors.append(str(task.exception()))
+                    elif task.result().empty:
+                        errors.append("empty response")
+                    else:
+                        return task.result()
+                if coingecko is None:
+                    # Binance failed or missed the grace period
+                    coingecko = asyncio.ensure_future(
+                        self.afetch_coingecko_ohlcv(symbol, days=coingecko_days_for(interval, limit)))
+                    pending.add(coingecko)
+            raise Exception(f"Failed to fetch data from both Binance and CoinGecko: {'; '.join(errors)}")
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _binance_klines_url(self, symbol, interval, limit, start_time=None, end_time=None):
         url = f"https://api.binance.com/api/v3/klines?symbol={symbol.upper()}&interval={interval}&limit={limit}"
+        if start_time is not None:
+            url += f"&startTime={int(start_time)}"
+        if end_time is not None:
+            url += f"&endTime={int(end_time)}"
+        return url
+
+    def _request_binance_klines(self, symbol, interval, limit, start_time=None, end_time=None):
+        """Request klines from Binance as an (n, 6) array, optionally only those opening in [start_time, end_time] (ms)"""
+        from rate_limiter import klines_weight
+        url = self._binance_klines_url(symbol, interval, limit, start_time, end_time)
+        if self.weight_budget is not None:
+            # Raises TimeoutError when the budget is exhausted, which triggers the CoinGecko fallback
+            self.weight_budget.acquire(klines_weight(limit), self.request_priority, timeout=10)
+        response = self.http.get(url, timeout=10, retry_statuses=self._binance_retry_statuses())
+        return self._binance_response_klines(symbol, response)
+
+    async def _arequest_binance_klines(self, symbol, interval, limit, start_time=None, end_time=None):
+        """Async _request_binance_klines"""
+        from rate_limiter import klines_weight
+        url = self._binance_klines_url(symbol, interval, limit, start_time, end_time)
+        if self.weight_budget is not None:
+            await asyncio.to_thread(self.weight_budget.acquire, klines_weight(limit), self.request_priority, 10)
+        response = await self.ahttp.get(url, timeout=10, retry_statuses=self._binance_retry_statuses())
+        return self._binance_response_klines(symbol, response)
+
+    def _binance_retry_statuses(self):
+        from market_http import RETRY_STATUSES, BUDGETED_RETRY_STATUSES
+        # A client-level 429 retry would spend weight the budget never granted and hide the 429 from it
+        return RETRY_STATUSES if self.weight_budget is None else BUDGETED_RETRY_STATUSES
+
+    def _binance_response_klines(self, symbol, response):
+        from kline_sync import parse_klines
+        from market_http import APIStatusError
+        if self.weight_budget is not None:
+            self.weight_budget.observe_response(response)
+        if response.status_code != 200:
+            if response.status_code == 451:  # Restricted location
+                print(f"Binance restricted in your location, falling back to CoinGecko for {symbol}")
+            raise APIStatusError(f"API Error {response.status_code}: {response.text}", response.status_code)
+        self._count("payload_bytes", len(response.content), source="binance")
+        return parse_klines(response.content)
+
+    def _download_binance_ohlcv(self, symbol, interval, limit):
+        """Download OHLCV data from Binance, falling back to CoinGecko"""
+        from history_loader import coingecko_days_for
+        from circuit_breaker import SourceUnavailable
         try:
-            response = requests.get(url, timeout=10)
-            if response.status_code != 200:
-                # If Binance fails, try CoinGecko fallback
-                if response.status_code == 451:  # Restricted location
-                    print(f"Binance restricted in your location, falling back to CoinGecko for {symbol}")
-                    return self.fetch_coingecko_ohlcv(symbol, days=30)
-                raise Exception(f"API Error {response.status_code}: {response.text}")
-            
-            data = response.json()
-            df = pd.DataFrame(data, columns=[
-                "Open Time", "Open", "High", "Low", "Close", "Volume",
-                "Close Time", "Quote Asset Volume", "Number of Trades",
-                "Taker Buy Base", "Taker Buy Quote", "Ignore"
-            ])
-            
-            # Convert timestamps and prices
-            df['Open Time'] = pd.to_datetime(df['Open Time'], unit='ms')
-            df = df[["Open Time", "Open", "High", "Low", "Close", "Volume"]].astype({
-                "Open": float, "High": float, "Low": float, "Close": float, "Volume": float
-            })
-            df.set_index('Open Time', inplace=True)
-            return df
-            
+            return self._source_call("binance", self._binance_ohlcv, symbol, interval, limit)
         except Exception as e:
-            # Try CoinGecko as fallback for any error
+            # Try CoinGecko as fallback for any error; an open Binance circuit goes straight there
             try:
-                print(f"Binance API failed, trying CoinGecko fallback for {symbol}")
-                return self.fetch_coingecko_ohlcv(symbol, days=30)
+                self._count("fallback", reason="circuit_open" if isinstance(e, SourceUnavailable) else "error")
+                if not isinstance(e, SourceUnavailable):
+                    print(f"Binance API failed, trying CoinGecko fallback for {symbol}")
+                return self.fetch_coingecko_ohlcv(symbol, days=coingecko_days_for(interval, limit))
             except:
                 raise Exception(f"Failed to fetch data from both Binance and CoinGecko: {str(e)}")
+
+    def _binance_ohlcv(self, symbol, interval, limit):
+        """OHLCV frame from Binance only (rolling buffer, candle store, paged or single request)"""
+        from ohlcv_cache import candle_open_time, interval_to_seconds
+        from candle_store import CandleStoreError
+        from history_loader import MAX_PAGE_SIZE
+        if self.kline_sync is not None and limit <= self.kline_sync.capacity:
+            # Only request klines newer than the last synced bar
+            return self.kline_sync.sync(symbol, interval, limit, self._request_binance_klines)
+        
+        if self.candle_store is not None:
+            try:
+                return self.candle_store.sync("binance", symbol, interval, limit, self._request_binance_klines)
+            except CandleStoreError as e:
+                print(f"{e}, downloading {symbol} directly")
+        
+        if limit > MAX_PAGE_SIZE:
+            # Beyond one request: page backwards from the current candle
+            step = interval_to_seconds(interval) * 1000
+            start = candle_open_time(interval) * 1000 - (limit - 1) * step
+            return self.fetch_binance_history(symbol, interval, start).iloc[-limit:]
+        
+        return self._klines_frame(self._request_binance_klines(symbol, interval, limit))
+
+    async def _abinance_ohlcv(self, symbol, interval, limit):
+        """Async _binance_ohlcv; the rolling buffer and deep-history paths run on a worker thread"""
+        from candle_store import CandleStoreError
+        from history_loader import MAX_PAGE_SIZE
+        if self.kline_sync is not None and limit <= self.kline_sync.capacity:
+            return await asyncio.to_thread(self._binance_ohlcv, symbol, interval, limit)
+        
+        if self.candle_store is not None:
+            try:
+                return await self.candle_store.async_sync("binance", symbol, interval, limit,
+                                                          self._arequest_binance_klines)
+            except CandleStoreError as e:
+                print(f"{e}, downloading {symbol} directly")
+        
+        if limit > MAX_PAGE_SIZE:
+            return await asyncio.to_thread(self._binance_ohlcv, symbol, interval, limit)
+        
+        return self._klines_frame(await self._arequest_binance_klines(symbol, interval, limit))
+
+    def _klines_frame(self, data):
+        """OHLCV DataFrame from a parsed kline array or raw Binance kline rows"""
+        from kline_sync import klines_to_array, array_to_frame
+        # The array is freshly built for this request, so the frame can take it over without a copy
+        return array_to_frame(klines_to_array(data), copy=False)
     
-    def add_comprehensive_indicators(self, df):
-        """Add comprehensive technical indicators"""
+    def iter_binance_history(self, symbol, interval, start, end=None, workers=4):
+        """Stream klines opening in [start, end] as DataFrame pages, fetched in parallel within the weight budget
+        
+        `start`/`end` accept datetimes, date strings or epoch milliseconds; `end`
+        defaults to the current candle.
+        """
+        from history_loader import iter_kline_pages
+        return iter_kline_pages(self._request_binance_klines, symbol, interval, start, end, workers=workers)
+    
+    def fetch_binance_history(self, symbol, interval, start, end=None, workers=4):
+        """Klines for an arbitrary date range as one de-duplicated DataFrame"""
+        from history_loader import load_klines
+        return load_klines(self._request_binance_klines, symbol, interval, start, end, workers=workers)
+    
+    def add_comprehensive_indicators(self, df, indicators=None, keep_warm_up=False):
+        """Add comprehensive technical indicators, in the analyzer's storage mode
+        
+        `indicators` (e.g. ["RSI_14", "MACD"]) computes only those columns and
+        what they depend on, on the NumPy dependency graph whatever the backend.
+        `keep_warm_up=True` keeps the leading rows some indicator is still NaN
+        on, which are dropped by default.
+        """
+        from compact_frames import compact_frame
+        return compact_frame(self._indicator_frame(df, indicators, keep_warm_up), self.storage)
+    
+    def _indicator_frame(self, df, indicators=None, keep_warm_up=False):
+        """Full-precision indicator frame"""
+        import numpy as np
+        from numpy_indicators import add_indicators_numpy
+        if self.indicator_backend == "numpy" or indicators is not None:
+            # Single-allocation NumPy path; returns a new frame instead of mutating df
+            return add_indicators_numpy(df, indicators, keep_warm_up)
+        
+        # Imported on first use: the NumPy backend and the stream never need ta
+        from ta.momentum import RSIIndicator, StochasticOscillator, WilliamsRIndicator
+        from ta.trend import EMAIndicator, SMAIndicator, MACD, ADXIndicator
+        from ta.volatility import BollingerBands, AverageTrueRange, KeltnerChannel
+        from ta.volume import OnBalanceVolumeIndicator, ChaikinMoneyFlowIndicator
+        
         close = df['Close']
         high = df['High']
         low = df['Low']
@@ -165,313 +539,388 @@ class TradingAnalyzer:
         df['ROC_5'] = ((close / close.shift(5)) - 1) * 100
         df['ROC_14'] = ((close / close.shift(14)) - 1) * 100
         
-        df.dropna(inplace=True)
+        if not keep_warm_up:
+            df.dropna(inplace=True)
         return df
     
     def analyze_momentum_confluence(self, row):
         """Analyze momentum indicators for confluences"""
-        confluences = {'bullish': [], 'bearish': [], 'neutral': []}
-        
-        # RSI Analysis
-        if row['RSI_14'] < 30:
-            confluences['bullish'].append({
-                'indicator': 'RSI (14)',
-                'condition': f"Oversold at {row['RSI_14']:.1f}",
-                'implication': "Potential bounce or reversal setup. Watch for bullish divergence or break above 30.",
-                'strength': 'Medium',
-                'timeframe': 'Short-term'
-            })
-        elif row['RSI_14'] > 70:
-            confluences['bearish'].append({
-                'indicator': 'RSI (14)',
-                'condition': f"Overbought at {row['RSI_14']:.1f}",
-                'implication': "Potential pullback or distribution. Watch for bearish divergence or break below 70.",
-                'strength': 'Medium',
-                'timeframe': 'Short-term'
-            })
-        elif 45 <= row['RSI_14'] <= 55:
-            confluences['neutral'].append({
-                'indicator': 'RSI (14)',
-                'condition': f"Neutral at {row['RSI_14']:.1f}",
-                'implication': "Balanced momentum. Look for directional break above 55 or below 45.",
-                'strength': 'Low',
-                'timeframe': 'Short-term'
-            })
-        
-        # Stochastic Analysis
-        if row['Stoch_K'] < 20 and row['Stoch_D'] < 20:
-            confluences['bullish'].append({
-                'indicator': 'Stochastic',
-                'condition': f"Both %K ({row['Stoch_K']:.1f}) and %D ({row['Stoch_D']:.1f}) oversold",
-                'implication': "Strong oversold condition. Potential reversal when %K crosses above %D.",
-                'strength': 'Strong' if row['Stoch_K'] > row['Stoch_D'] else 'Medium',
-                'timeframe': 'Short-term'
-            })
-        elif row['Stoch_K'] > 80 and row['Stoch_D'] > 80:
-            confluences['bearish'].append({
-                'indicator': 'Stochastic',
-                'condition': f"Both %K ({row['Stoch_K']:.1f}) and %D ({row['Stoch_D']:.1f}) overbought",
-                'implication': "Strong overbought condition. Potential reversal when %K crosses below %D.",
-                'strength': 'Strong' if row['Stoch_K'] < row['Stoch_D'] else 'Medium',
-                'timeframe': 'Short-term'
-            })
-        
-        # Williams %R Analysis
-        if row['Williams_R'] < -80:
-            confluences['bullish'].append({
-                'indicator': 'Williams %R',
-                'condition': f"Oversold at {row['Williams_R']:.1f}",
-                'implication': "Potential buying opportunity. Watch for move above -80 for confirmation.",
-                'strength': 'Medium',
-                'timeframe': 'Short-term'
-            })
-        elif row['Williams_R'] > -20:
-            confluences['bearish'].append({
-                'indicator': 'Williams %R',
-                'condition': f"Overbought at {row['Williams_R']:.1f}",
-                'implication': "Potential selling pressure. Watch for move below -20 for confirmation.",
-                'strength': 'Medium',
-                'timeframe': 'Short-term'
-            })
-        
-        return confluences
+        from vectorized_confluence import evaluate_row
+        return evaluate_row(row, 'momentum')
     
     def analyze_trend_confluence(self, row):
         """Analyze trend indicators for confluences"""
-        confluences = {'bullish': [], 'bearish': [], 'neutral': []}
-        
-        # EMA Alignment
-        ema_alignment = "bullish" if row['EMA_9'] > row['EMA_21'] > row['EMA_50'] else "bearish" if row['EMA_9'] < row['EMA_21'] < row['EMA_50'] else "mixed"
-        
-        if ema_alignment == "bullish":
-            confluences['bullish'].append({
-                'indicator': 'EMA Alignment',
-                'condition': "EMA 9 > EMA 21 > EMA 50",
-                'implication': "Strong bullish trend structure. Expect continuation with pullbacks to EMAs as support.",
-                'strength': 'Strong',
-                'timeframe': 'Medium-term'
-            })
-        elif ema_alignment == "bearish":
-            confluences['bearish'].append({
-                'indicator': 'EMA Alignment',
-                'condition': "EMA 9 < EMA 21 < EMA 50",
-                'implication': "Strong bearish trend structure. Expect continuation with rallies to EMAs as resistance.",
-                'strength': 'Strong',
-                'timeframe': 'Medium-term'
-            })
-        
-        # Price vs EMAs
-        if row['Close'] > row['EMA_21']:
-            confluences['bullish'].append({
-                'indicator': 'Price vs EMA 21',
-                'condition': f"Price {((row['Close']/row['EMA_21']-1)*100):+.2f}% above EMA 21",
-                'implication': "Bullish bias maintained. EMA 21 likely to act as dynamic support.",
-                'strength': 'Medium',
-                'timeframe': 'Short to Medium-term'
-            })
-        else:
-            confluences['bearish'].append({
-                'indicator': 'Price vs EMA 21',
-                'condition': f"Price {((row['Close']/row['EMA_21']-1)*100):+.2f}% below EMA 21",
-                'implication': "Bearish bias maintained. EMA 21 likely to act as dynamic resistance.",
-                'strength': 'Medium',
-                'timeframe': 'Short to Medium-term'
-            })
-        
-        # MACD Analysis
-        if row['MACD'] > row['MACD_Signal'] and row['MACD_Histogram'] > 0:
-            confluences['bullish'].append({
-                'indicator': 'MACD',
-                'condition': "MACD above signal line with positive histogram",
-                'implication': "Bullish momentum building. Watch for histogram expansion for stronger moves.",
-                'strength': 'Strong' if row['MACD_Histogram'] > 0 else 'Medium',
-                'timeframe': 'Medium-term'
-            })
-        elif row['MACD'] < row['MACD_Signal'] and row['MACD_Histogram'] < 0:
-            confluences['bearish'].append({
-                'indicator': 'MACD',
-                'condition': "MACD below signal line with negative histogram",
-                'implication': "Bearish momentum building. Watch for histogram expansion for stronger moves.",
-                'strength': 'Strong' if row['MACD_Histogram'] < 0 else 'Medium',
-                'timeframe': 'Medium-term'
-            })
-        
-        # ADX Trend Strength
-        if row['ADX'] > 25:
-            trend_direction = "bullish" if row['DI_Plus'] > row['DI_Minus'] else "bearish"
-            confluences[trend_direction].append({
-                'indicator': 'ADX Trend Strength',
-                'condition': f"Strong trending market (ADX: {row['ADX']:.1f})",
-                'implication': f"Strong {trend_direction} trend in place. Expect trend continuation with minor pullbacks.",
-                'strength': 'Strong' if row['ADX'] > 40 else 'Medium',
-                'timeframe': 'Medium to Long-term'
-            })
-        elif row['ADX'] < 20:
-            confluences['neutral'].append({
-                'indicator': 'ADX Trend Strength',
-                'condition': f"Weak trending market (ADX: {row['ADX']:.1f})",
-                'implication': "Market in consolidation/ranging phase. Look for breakout setups.",
-                'strength': 'Medium',
-                'timeframe': 'All timeframes'
-            })
-        
-        return confluences
+        from vectorized_confluence import evaluate_row
+        return evaluate_row(row, 'trend')
     
     def analyze_volatility_confluence(self, row):
         """Analyze volatility indicators for confluences"""
-        confluences = {'bullish': [], 'bearish': [], 'neutral': []}
-        
-        # Bollinger Bands Analysis
-        if row['BB_Position'] < 0.2:
-            confluences['bullish'].append({
-                'indicator': 'Bollinger Bands',
-                'condition': f"Price near lower band (Position: {row['BB_Position']:.2f})",
-                'implication': "Potential oversold bounce. Watch for move back toward middle band.",
-                'strength': 'Medium',
-                'timeframe': 'Short-term'
-            })
-        elif row['BB_Position'] > 0.8:
-            confluences['bearish'].append({
-                'indicator': 'Bollinger Bands',
-                'condition': f"Price near upper band (Position: {row['BB_Position']:.2f})",
-                'implication': "Potential overbought pullback. Watch for move back toward middle band.",
-                'strength': 'Medium',
-                'timeframe': 'Short-term'
-            })
-        
-        # ATR Analysis
-        if row['ATR_Percent'] > 5:
-            confluences['neutral'].append({
-                'indicator': 'ATR',
-                'condition': f"High volatility ({row['ATR_Percent']:.2f}%)",
-                'implication': "Elevated volatility suggests increased risk/reward. Use wider stops.",
-                'strength': 'Medium',
-                'timeframe': 'All timeframes'
-            })
-        elif row['ATR_Percent'] < 1:
-            confluences['neutral'].append({
-                'indicator': 'ATR',
-                'condition': f"Low volatility ({row['ATR_Percent']:.2f}%)",
-                'implication': "Low volatility suggests potential for breakout. Watch for expansion.",
-                'strength': 'Medium',
-                'timeframe': 'All timeframes'
-            })
-        
-        return confluences
+        from vectorized_confluence import evaluate_row
+        return evaluate_row(row, 'volatility')
     
     def analyze_volume_confluence(self, row):
         """Analyze volume indicators for confluences"""
-        confluences = {'bullish': [], 'bearish': [], 'neutral': []}
-        
-        # Volume Analysis
-        if row['Volume_Ratio'] > 2:
-            confluences['neutral'].append({
-                'indicator': 'Volume',
-                'condition': f"High volume ({row['Volume_Ratio']:.1f}x average)",
-                'implication': "Strong institutional interest. Confirms price moves.",
-                'strength': 'Strong',
-                'timeframe': 'All timeframes'
-            })
-        elif row['Volume_Ratio'] < 0.5:
-            confluences['neutral'].append({
-                'indicator': 'Volume',
-                'condition': f"Low volume ({row['Volume_Ratio']:.1f}x average)",
-                'implication': "Weak participation. Price moves may lack conviction.",
-                'strength': 'Medium',
-                'timeframe': 'All timeframes'
-            })
-        
-        # CMF Analysis
-        if row['CMF'] > 0.2:
-            confluences['bullish'].append({
-                'indicator': 'Chaikin Money Flow',
-                'condition': f"Strong buying pressure (CMF: {row['CMF']:.3f})",
-                'implication': "Money flowing into the asset. Supports bullish bias.",
-                'strength': 'Medium',
-                'timeframe': 'Medium-term'
-            })
-        elif row['CMF'] < -0.2:
-            confluences['bearish'].append({
-                'indicator': 'Chaikin Money Flow',
-                'condition': f"Strong selling pressure (CMF: {row['CMF']:.3f})",
-                'implication': "Money flowing out of the asset. Supports bearish bias.",
-                'strength': 'Medium',
-                'timeframe': 'Medium-term'
-            })
-        
-        return confluences
+        from vectorized_confluence import evaluate_row
+        return evaluate_row(row, 'volume')
+    
+    def confluence_history(self, df):
+        """Evaluate every confluence rule across all bars of an indicator frame
+        
+        Returns a ConfluenceHistory whose `signals` frame holds per-bar
+        bullish/bearish/neutral counts and the overall signal, and whose
+        `confluences_at(i)` gives the per-row dicts for any bar.
+        """
+        from vectorized_confluence import ConfluenceHistory
+        return ConfluenceHistory(df, threshold=self.confluence_threshold)
     
     def get_comprehensive_analysis(self, symbol="BTCUSDT", interval="15m"):
         """Get comprehensive trading analysis"""
+        with self._instrumented(symbol, interval) as timings:
+            analysis = self._comprehensive_analysis(symbol, interval)
+        return self._with_timings(analysis, timings)
+
+    def _comprehensive_analysis(self, symbol, interval):
+        from ohlcv_cache import next_candle_close
+        analysis = self._memory_analysis(symbol, interval)
+        if analysis is not None:
+            return analysis
+        
+        if self.result_cache is not None:
+            # Only one process on the host computes a given candle's analysis
+            return self.result_cache.get_or_compute(self._result_key(symbol, interval),
+                                                    lambda: self._fresh_analysis(symbol, interval),
+                                                    next_candle_close(interval))
+        return self._fresh_analysis(symbol, interval)[0]
+
+    def _fresh_analysis(self, symbol, interval):
+        """(analysis, indicator frame or None) from newly fetched candles"""
+        stage = "fetch"
         try:
             # Fetch data
-            df = self.fetch_binance_ohlcv(symbol, interval)
-            df = self.add_comprehensive_indicators(df)
-            
-            if df.empty:
-                return {"error": "No data available"}
-            
-            # Get latest row
-            latest = df.iloc[-1]
+            with self._stage("fetch"):
+                df = self.fetch_binance_ohlcv(symbol, interval)
+            stage = "analyze"
+            if self.result_cache is not None and self.result_cache.store_frames and self.indicator_store is None:
+                return self._analyze_with_frame(symbol, df)
+            return self.analyze_ohlcv(symbol, interval, df), None
             
-            # Analyze confluences
-            momentum = self.analyze_momentum_confluence(latest)
-            trend = self.analyze_trend_confluence(latest)
-            volatility = self.analyze_volatility_confluence(latest)
-            volume = self.analyze_volume_confluence(latest)
-            
-            # Combine all confluences
-            all_confluences = {
-                'bullish': momentum['bullish'] + trend['bullish'] + volatility['bullish'] + volume['bullish'],
-                'bearish': momentum['bearish'] + trend['bearish'] + volatility['bearish'] + volume['bearish'],
-                'neutral': momentum['neutral'] + trend['neutral'] + volatility['neutral'] + volume['neutral']
-            }
+        except Exception as e:
+            return self._analysis_error(stage, e), None
+
+    def _analyze_with_frame(self, symbol, df):
+        """analyze_ohlcv that also returns the indicator frame, for the shared result cache"""
+        from compact_frames import compact_frame
+        with self._stage("indicators"):
+            frame = self._indicator_frame(df)
+        if frame.empty:
+            return {"error": "No data available"}, None
+        with self._stage("confluence"):
+            analysis = self.build_analysis(symbol, frame.iloc[-1])
+        return analysis, compact_frame(frame, self.storage)
+
+    def _result_key(self, symbol, interval):
+        from confluence_rules import get_rule_set
+        return self.result_cache.key(symbol, interval, get_rule_set().version)
+
+    def cached_indicator_frame(self, symbol="BTCUSDT", interval="15m"):
+        """Indicator frame stored with the shared analysis of the current candle, or None"""
+        if self.result_cache is None:
+            return None
+        return self.result_cache.get_frame(self._result_key(symbol, interval))
+
+    def _memory_analysis(self, symbol, interval):
+        """Analysis from the live stream or the precompute store, if either has a current one"""
+        if self.kline_stream is not None:
+            analysis = self.kline_stream.analysis(symbol, interval)
+            if analysis is not None:
+                self._count("source", source="stream")
+                return analysis
+        if self.precompute is not None:
+            self.precompute.record_request(symbol, interval)
+            analysis = self.precompute.get(symbol, interval)
+            if analysis is not None:
+                self._count("source", source="precomputed")
+                return analysis
+        return None
+
+    def _analysis_error(self, stage, error):
+        self._count("errors", stage=stage)
+        analysis = {"error": f"Analysis failed: {str(error)}"}
+        if self.debug:
+            analysis["error_stage"] = stage
+            analysis["error_type"] = type(error).__name__
+        return analysis
+
+    async def aget_comprehensive_analysis(self, symbol="BTCUSDT", interval="15m", race=False):
+        """Async get_comprehensive_analysis; `race=True` takes the first valid of Binance and CoinGecko"""
+        with self._instrumented(symbol, interval) as timings:
+            analysis = await self._acomprehensive_analysis(symbol, interval, race)
+        return self._with_timings(analysis, timings)
+
+    async def _acomprehensive_analysis(self, symbol, interval, race):
+        analysis = self._memory_analysis(symbol, interval)
+        if analysis is not None:
+            return analysis
+        
+        # Concurrent callers for the same series on this loop share one fetch and analysis
+        key = (asyncio.get_running_loop(), symbol.upper(), interval)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._afresh_analysis(symbol, interval, race))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one caller's cancellation does not cancel the others
+        return await asyncio.shield(task)
+
+    async def _afresh_analysis(self, symbol, interval, race):
+        from ohlcv_cache import next_candle_close
+        # Shared results are read and written, but waiting on another process's lease would block the loop
+        key = None
+        if self.result_cache is not None:
+            key = self._result_key(symbol, interval)
+            analysis = await asyncio.to_thread(self.result_cache.get, key)
+            if analysis is not None:
+                return analysis
+        
+        stage = "fetch"
+        try:
+            with self._stage("fetch"):
+                df = await self.afetch_binance_ohlcv(symbol, interval, race=race)
+            stage = "analyze"
+            # Indicator math is CPU-bound; keep the event loop free while it runs
+            analysis = await asyncio.to_thread(self.analyze_ohlcv, symbol, interval, df)
             
-            # Generate overall signal
-            bullish_count = len(all_confluences['bullish'])
-            bearish_count = len(all_confluences['bearish'])
+        except Exception as e:
+            return self._analysis_error(stage, e)
+        
+        if key is not None and "error" not in analysis:
+            await asyncio.to_thread(self.result_cache.put, key, analysis, next_candle_close(interval))
+        return analysis
+
+    def start_kline_stream(self, subscriptions, url=None, **kwargs):
+        """Stream live klines for (symbol, interval) pairs over one WebSocket connection
+        
+        Each series is seeded once over REST, then kept up to date from the
+        stream; get_comprehensive_analysis returns its latest analysis from memory.
+        """
+        from kline_stream import KlineStream, BINANCE_STREAM_URL
+        stream = KlineStream(self._request_binance_klines, self.build_analysis, url=url or BINANCE_STREAM_URL, **kwargs)
+        for symbol, interval in subscriptions:
+            stream.subscribe(symbol, interval)
+        self.kline_stream = stream.start()
+        return stream
+
+    def start_precompute(self, watchlist, **kwargs):
+        """Recompute analyses for (symbol, interval) pairs in the background just after each candle close
+        
+        Refreshes use background request priority; get_comprehensive_analysis
+        answers watched series from the stored results (with `computed_at` and
+        `age_seconds`) until the next close. kwargs go to PrecomputeScheduler.
+        """
+        from rate_limiter import PRIORITY_BACKGROUND
+        from precompute import PrecomputeScheduler
+        background = copy.copy(self)
+        background.request_priority = PRIORITY_BACKGROUND
+        background.precompute = None
+        
+        def compute(symbol, interval):
+            with background._stage("precompute"):
+                return background._comprehensive_analysis(symbol, interval)
+        
+        if self.precompute is not None:
+            self.precompute.stop()
+        self.precompute = PrecomputeScheduler(compute, watchlist, **kwargs).start()
+        return self.precompute
+    
+    def analyze_ohlcv(self, symbol, interval, df):
+        """Run indicators and confluence analysis on an already fetched OHLCV frame"""
+        with self._stage("indicators"):
+            latest = self.latest_indicators(symbol, interval, df)
+        if latest is None:
+            return {"error": "No data available"}
+        
+        with self._stage("confluence"):
+            return self.build_analysis(symbol, latest)
+    
+    def latest_indicators(self, symbol, interval, df):
+        """Indicator row for the newest candle of an OHLCV frame, or None if there is not enough data"""
+        if self.indicator_store is not None:
+            # Only candles closed since the previous call are applied
+            return self.indicator_store.latest(symbol, interval, df)
+        
+        df = self._indicator_frame(df)
+        if df.empty:
+            return None
+        return df.iloc[-1]
+    
+    def get_multi_timeframe_analysis(self, symbol="BTCUSDT", intervals=("15m", "1h", "4h", "1d"),
+                                     higher_bars=None):
+        """Analyze several intervals from a single download of the finest one
+        
+        Higher intervals are resampled locally from the base candles, as far
+        as one page of them covers; coarser intervals are requested directly
+        (see plan_timeframes). The combined view checks the trend rules on the
+        highest interval against the momentum rules on the base interval.
+        """
+        from ohlcv_cache import interval_to_seconds
+        from multi_timeframe import (
+            DEFAULT_HIGHER_BARS, resample_ohlcv, plan_timeframes, median_spacing_seconds, net_bias, combine_timeframes,
+        )
+        from vectorized_confluence import evaluate_row
+        try:
+            intervals = sorted(dict.fromkeys(intervals), key=interval_to_seconds)
+            base = intervals[0]
+            higher_bars = DEFAULT_HIGHER_BARS if higher_bars is None else higher_bars
+            limit, resampled, direct = plan_timeframes(intervals, higher_bars)
+            df = self.fetch_binance_ohlcv(symbol, base, limit)
             
-            if bullish_count >= self.confluence_threshold and bullish_count > bearish_count:
-                overall_signal = "BULLISH"
-                signal_strength = "Strong" if bullish_count >= 5 else "Medium"
-            elif bearish_count >= self.confluence_threshold and bearish_count > bullish_count:
-                overall_signal = "BEARISH"
-                signal_strength = "Strong" if bearish_count >= 5 else "Medium"
-            else:
-                overall_signal = "NEUTRAL"
-                signal_strength = "Weak"
+            analyses = {}
+            latest_rows = {}
+            for interval in intervals:
+                if interval in direct:
+                    try:
+                        source = frame = self.fetch_binance_ohlcv(symbol, interval)
+                    except Exception as e:
+                        analyses[interval] = {"error": f"Analysis failed: {str(e)}"}
+                        continue
+                else:
+                    source = df
+                    frame = df if interval == base else resample_ohlcv(df, interval)
+                # The CoinGecko fallback may return coarser candles than requested
+                if interval_to_seconds(interval) < (median_spacing_seconds(source.index) or 0):
+                    analyses[interval] = {"error": f"Source data is coarser than {interval}"}
+                    continue
+                # Same window as a single-interval analysis (fetch_binance_ohlcv's default limit)
+                latest = self.latest_indicators(symbol, interval, frame.iloc[-1000:].copy())
+                if latest is None:
+                    analyses[interval] = {"error": "No data available"}
+                    continue
+                latest_rows[interval] = latest
+                analyses[interval] = self.build_analysis(symbol, latest)
+                analyses[interval]["interval"] = interval
             
-            return {
-                "symbol": symbol,
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "current_price": latest['Close'],
-                "overall_signal": overall_signal,
-                "signal_strength": signal_strength,
-                "confluence_counts": {
-                    "bullish": bullish_count,
-                    "bearish": bearish_count,
-                    "neutral": len(all_confluences['neutral'])
-                },
-                "confluences": all_confluences,
-                "key_levels": {
-                    "resistance": latest['R1'],
-                    "support": latest['S1'],
-                    "pivot": latest['Pivot']
-                },
-                "technical_snapshot": {
-                    "RSI_14": latest['RSI_14'],
-                    "MACD": latest['MACD'],
-                    "ADX": latest['ADX'],
-                    "ATR_Percent": latest['ATR_Percent'],
-                    "BB_Position": latest['BB_Position']
-                }
+            if not latest_rows:
+                return {"error": "No data available"}
+            trend_interval = max(latest_rows, key=interval_to_seconds)
+            entry_interval = min(latest_rows, key=interval_to_seconds)
+            trend_bias = net_bias(evaluate_row(latest_rows[trend_interval], 'trend'))
+            momentum_bias = net_bias(evaluate_row(latest_rows[entry_interval], 'momentum'))
+            return combine_timeframes(symbol, analyses, trend_bias, momentum_bias, trend_interval, entry_interval)
+        
+        except Exception as e:
+            return {"error": f"Multi-timeframe analysis failed: {str(e)}"}
+
+    def build_analysis(self, symbol, latest):
+        """Build the analysis dict from the latest indicator row"""
+        from vectorized_confluence import evaluate_row
+        # Analyze confluences (momentum, trend, volatility and volume rules in one pass)
+        all_confluences = evaluate_row(latest)
+        
+        # Generate overall signal
+        bullish_count = len(all_confluences['bullish'])
+        bearish_count = len(all_confluences['bearish'])
+        
+        if bullish_count >= self.confluence_threshold and bullish_count > bearish_count:
+            overall_signal = "BULLISH"
+            signal_strength = "Strong" if bullish_count >= 5 else "Medium"
+        elif bearish_count >= self.confluence_threshold and bearish_count > bullish_count:
+            overall_signal = "BEARISH"
+            signal_strength = "Strong" if bearish_count >= 5 else "Medium"
+        else:
+            overall_signal = "NEUTRAL"
+            signal_strength = "Weak"
+        
+        return {
+            "symbol": symbol,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "current_price": latest['Close'],
+            "overall_signal": overall_signal,
+            "signal_strength": signal_strength,
+            "confluence_counts": {
+                "bullish": bullish_count,
+                "bearish": bearish_count,
+                "neutral": len(all_confluences['neutral'])
+            },
+            "confluences": all_confluences,
+            "key_levels": {
+                "resistance": latest['R1'],
+                "support": latest['S1'],
+                "pivot": latest['Pivot']
+            },
+            "technical_snapshot": {
+                "RSI_14": latest['RSI_14'],
+                "MACD": latest['MACD'],
+                "ADX": latest['ADX'],
+                "ATR_Percent": latest['ATR_Percent'],
+                "BB_Position": latest['BB_Position']
             }
+        }
+
+    def scan(self, symbols, interval="15m", fetch_workers=16, processes=None, requests_per_second=10):
+        """Analyze many symbols concurrently, yielding each analysis as it completes
+
+        OHLCV is fetched on a bounded thread pool paced to `requests_per_second`,
+        indicators run on a process pool (`processes=0` computes them in the
+        fetch threads instead). A failing symbol yields an error dict and does
+        not abort the batch. Each successful result carries `confluence_score`
+        (bullish minus bearish confluences).
+        """
+        pacer = _RequestPacer(requests_per_second)
+        
+        def fetch(symbol):
+            pacer.wait()
+            return self.fetch_binance_ohlcv(symbol, interval)
+        
+        def analyze_inline(symbol):
+            return _analyze_scan_frame(symbol, interval, fetch(symbol), self.indicator_backend,
+                                       self.confluence_threshold)
+        
+        fetch_pool = ThreadPoolExecutor(max_workers=fetch_workers)
+        # Only scans use a process pool; importing it pulls in multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        cpu_pool = ProcessPoolExecutor(max_workers=processes) if processes != 0 else None
+        try:
+            pending = {}
+            for symbol in dict.fromkeys(symbols):
+                if cpu_pool is None:
+                    pending[fetch_pool.submit(analyze_inline, symbol)] = ("analyze", symbol)
+                else:
+                    pending[fetch_pool.submit(fetch, symbol)] = ("fetch", symbol)
             
-        except Exception as e:
-            return {"error": f"Analysis failed: {str(e)}"}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, symbol = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        yield {"symbol": symbol, "interval": interval, "error": f"Analysis failed: {str(e)}"}
+                        continue
+                    if stage == "fetch":
+                        job = cpu_pool.submit(_analyze_scan_frame, symbol, interval, result,
+                                              self.indicator_backend, self.confluence_threshold)
+                        pending[job] = ("analyze", symbol)
+                    else:
+                        if "error" in result:
+                            result.setdefault("symbol", symbol)
+                            result.setdefault("interval", interval)
+                        yield result
+        finally:
+            fetch_pool.shutdown(wait=False, cancel_futures=True)
+            if cpu_pool is not None:
+                cpu_pool.shutdown(wait=False, cancel_futures=True)
+
+    def scan_ranked(self, symbols, interval="15m", **kwargs):
+        """Run scan() to completion and return results ranked by |confluence_score|, errors last"""
+        results = list(self.scan(symbols, interval, **kwargs))
+        return sorted(results, key=lambda r: ("error" in r, -abs(r.get("confluence_score", 0))))
 
     def format_confluence_analysis(self, analysis):
         """Format confluence analysis for display"""
+        with self._stage("format"):
+            return self._format_confluence_analysis(analysis)
+    
+    def _format_confluence_analysis(self, analysis):
         if "error" in analysis:
             return f"❌ {analysis['error']}"
         
@@ -539,3 +988,17 @@ class TradingAnalyzer:
                 output.append("")
         
         return "\n".join(output)
+
+
+def get_analyzer():
+    """Process-wide TradingAnalyzer, created with default settings on first use
+
+    Every Streamlit session and rerun in the process shares it (and its
+    caches) instead of constructing its own.
+    """
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                _analyzer = TradingAnalyzer()
+    return _analyzer
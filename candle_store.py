@@ -0,0 +1,421 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from kline_sync import klines_to_array
+from ohlcv_cache import candle_open_time, interval_to_seconds
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking
+    fcntl = None
+
+# One append-only file per column; open time is stored as epoch milliseconds
+STORE_COLUMNS = [
+    ("open_time", np.int64),
+    ("Open", np.float64),
+    ("High", np.float64),
+    ("Low", np.float64),
+    ("Close", np.float64),
+    ("Volume", np.float64),
+]
+
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".candle_store")
+
+
+class CandleStoreError(Exception):
+    """The store's files could not be read or written; download errors are never wrapped in it"""
+
+
+def _subtract_range(ranges, start, end):
+    """Inclusive [start, end] ranges with [start, end] removed"""
+    remaining = []
+    for lo, hi in ranges:
+        if hi < start or lo > end:
+            remaining.append([lo, hi])
+            continue
+        if lo < start:
+            remaining.append([lo, start - 1])
+        if hi > end:
+            remaining.append([end + 1, hi])
+    return remaining
+
+
+class CandleSeries:
+    """Closed candles of one (source, symbol, interval) as memory-mapped column files
+
+    Closed candles never change, so writes only append. Data older than the
+    first stored bar is merged into a new generation of files that replaces
+    the old one through meta.json, leaving frames mapped from the previous
+    generation intact.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._maps = None  # (generation, rows, column maps)
+
+    @contextmanager
+    def locked(self):
+        """Exclusive access for writers, across threads and (where supported) processes"""
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.path, ".lock"), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def meta(self):
+        try:
+            with open(os.path.join(self.path, "meta.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"generation": 0, "history_start": None}
+
+    def _write_meta(self, meta):
+        tmp = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(self.path, "meta.json"))
+
+    def _column_path(self, generation, name):
+        return os.path.join(self.path, f"{generation}.{name}")
+
+    def _rows_on_disk(self, generation):
+        """Complete rows in a generation; a torn append leaves some columns longer"""
+        sizes = []
+        for name, dtype in STORE_COLUMNS:
+            try:
+                sizes.append(os.path.getsize(self._column_path(generation, name)) // np.dtype(dtype).itemsize)
+            except OSError:
+                return 0
+        return min(sizes)
+
+    def columns(self):
+        """Read-only memory maps of every column, plus the row count"""
+        generation = self.meta()["generation"]
+        rows = self._rows_on_disk(generation)
+        cached = self._maps
+        if cached is not None and cached[0] == generation and cached[1] == rows:
+            return rows, cached[2]
+        maps = {}
+        if rows:
+            for name, dtype in STORE_COLUMNS:
+                maps[name] = np.memmap(self._column_path(generation, name), dtype=dtype, mode="r", shape=(rows,))
+        self._maps = (generation, rows, maps)
+        return rows, maps
+
+    def __len__(self):
+        return self.columns()[0]
+
+    def first_open_time(self):
+        rows, maps = self.columns()
+        return int(maps["open_time"][0]) if rows else None
+
+    def last_open_time(self):
+        rows, maps = self.columns()
+        return int(maps["open_time"][rows - 1]) if rows else None
+
+    def read(self, limit=None, start=None, end=None):
+        """OHLCV frame over the stored bars, backed by the memory maps (no copy)
+
+        `start`/`end` are open times in ms (inclusive); `limit` keeps the newest bars.
+        """
+        rows, maps = self.columns()
+        lo, hi = 0, rows
+        if rows:
+            times = maps["open_time"]
+            if start is not None:
+                lo = int(np.searchsorted(times, start, side="left"))
+            if end is not None:
+                hi = int(np.searchsorted(times, end, side="right"))
+            if limit is not None:
+                lo = max(lo, hi - limit)
+        data = {name: maps[name][lo:hi] if rows else np.empty(0) for name, _ in STORE_COLUMNS[1:]}
+        times = maps["open_time"][lo:hi] if rows else np.empty(0, dtype=np.int64)
+        df = pd.DataFrame(data, index=pd.DatetimeIndex(np.asarray(times).view("datetime64[ms]"), name="Open Time"),
+                          copy=False)
+        return df
+
+    def append(self, rows):
+        """Append closed klines ((n, 6) array in KLINE_COLUMNS layout) newer than the last stored bar
+
+        Older bars go through merge(); returns the number of bars written.
+        """
+        if len(rows) == 0:
+            return 0
+        with self.locked():
+            meta = self.meta()
+            generation = meta["generation"]
+            stored = self._rows_on_disk(generation)
+            if stored:
+                times = np.memmap(self._column_path(generation, "open_time"), dtype=np.int64, mode="r",
+                                  shape=(stored,))
+                first, last = int(times[0]), int(times[-1])
+                if rows[0, 0] < first:
+                    return self._merge_locked(meta, rows)
+                rows = rows[rows[:, 0] > last]
+                if len(rows) == 0:
+                    return 0
+            for i, (name, dtype) in enumerate(STORE_COLUMNS):
+                with open(self._column_path(generation, name), "r+b" if stored else "wb") as f:
+                    # Drop any torn tail from an interrupted append before writing
+                    f.truncate(stored * np.dtype(dtype).itemsize)
+                    f.seek(0, os.SEEK_END)
+                    f.write(np.ascontiguousarray(rows[:, i], dtype=dtype).tobytes())
+            if not stored:
+                self._write_meta(meta)
+            return len(rows)
+
+    def merge(self, rows):
+        """Merge klines that may precede the stored range into a new generation"""
+        if len(rows) == 0:
+            return 0
+        with self.locked():
+            return self._merge_locked(self.meta(), rows)
+
+    def _merge_locked(self, meta, rows):
+        generation = meta["generation"]
+        stored = self._rows_on_disk(generation)
+        existing = np.empty((stored, len(STORE_COLUMNS)), dtype=np.float64)
+        for i, (name, dtype) in enumerate(STORE_COLUMNS):
+            if stored:
+                existing[:, i] = np.fromfile(self._column_path(generation, name), dtype=dtype, count=stored)
+        combined = np.concatenate([existing, rows])
+        # Stored bars win over refetched copies of the same open time
+        _, keep = np.unique(combined[:, 0], return_index=True)
+        combined = combined[keep]
+
+        new_generation = generation + 1
+        for i, (name, dtype) in enumerate(STORE_COLUMNS):
+            np.ascontiguousarray(combined[:, i], dtype=dtype).tofile(self._column_path(new_generation, name))
+        self._write_meta(dict(meta, generation=new_generation))
+        for name, _ in STORE_COLUMNS:
+            try:
+                os.remove(self._column_path(generation, name))
+            except OSError:
+                pass
+        return len(combined) - stored
+
+    def set_history_start(self, open_time):
+        """Record the first bar the source has, so shorter histories are not refetched"""
+        with self.locked():
+            meta = self.meta()
+            meta["history_start"] = int(open_time)
+            self._write_meta(meta)
+
+    def gaps(self):
+        """(first missing, last missing) open-time ranges inside the stored data that were never fetched"""
+        return [tuple(hole) for hole in self.meta().get("holes", [])]
+
+    def update_gaps(self, skipped=(), fetched=()):
+        """Record ranges left out of the stored data and drop the ones since fetched
+
+        A fetched range stops being a gap whether or not the source had bars
+        in it, so exchange outages are not requested again.
+        """
+        if not skipped and not self.gaps():
+            return
+        with self.locked():
+            meta = self.meta()
+            holes = meta.get("holes", []) + [[int(start), int(end)] for start, end in skipped]
+            for start, end in fetched:
+                holes = _subtract_range(holes, start, end)
+            if sorted(holes) != meta.get("holes", []):
+                meta["holes"] = sorted(holes)
+                self._write_meta(meta)
+
+
+class CandleStore:
+    """Persistent candle store partitioned by source/symbol/interval
+
+    `sync()` fetches only the ranges missing on disk (bars before the first
+    stored one, gaps inside the stored range and bars since the last one),
+    appends the newly closed candles and returns the requested window. The
+    still-forming candle is never persisted. When the last stored bar is
+    older than the requested window, only the window is fetched and the
+    span in between is recorded as a gap, fetched if a later window covers it.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or os.environ.get("CANDLE_STORE_DIR") or DEFAULT_STORE_DIR
+        self._lock = threading.Lock()
+        self._series = {}
+        self.syncs = 0
+        self.bars_from_disk = 0
+        self.bars_fetched = 0
+        self.bars_written = 0
+        self.requests = 0
+
+    def series(self, source, symbol, interval):
+        key = (source, symbol.upper(), interval)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = CandleSeries(os.path.join(self.root, source, symbol.upper(), interval))
+                self._series[key] = series
+            return series
+
+    def read(self, source, symbol, interval, limit=None, start=None, end=None):
+        return self.series(source, symbol, interval).read(limit=limit, start=start, end=end)
+
+    def sync(self, source, symbol, interval, limit, fetch, page_size=1000, now=None):
+        """Return the newest `limit` bars, downloading only what the store is missing
+
+        `fetch(symbol, interval, limit, start_time)` returns raw kline rows
+        opening at or after `start_time` (ms), as for IncrementalKlineSync.
+        """
+        plan = self._plan(source, symbol, interval, limit, now)
+        fetched = []
+        for start, end in plan["ranges"]:
+            chunks = []
+            for page_start, page_limit in self._pages(start, end, plan["step"], page_size, chunks):
+                chunks.append(self._page_rows(fetch(symbol, interval, page_limit, page_start), end))
+                if len(chunks[-1]) < page_limit:
+                    break
+            fetched.append(chunks)
+        return self._finish(plan, fetched)
+
+    async def async_sync(self, source, symbol, interval, limit, afetch, page_size=1000, now=None):
+        """sync() with an async `afetch`; the missing head and tail ranges are fetched concurrently"""
+        plan = self._plan(source, symbol, interval, limit, now)
+
+        async def fetch_range(start, end):
+            chunks = []
+            for page_start, page_limit in self._pages(start, end, plan["step"], page_size, chunks):
+                chunks.append(self._page_rows(await afetch(symbol, interval, page_limit, page_start), end))
+                if len(chunks[-1]) < page_limit:
+                    break
+            return chunks
+
+        fetched = await asyncio.gather(*(fetch_range(start, end) for start, end in plan["ranges"]))
+        return self._finish(plan, fetched)
+
+    def _plan(self, source, symbol, interval, limit, now):
+        """Work out which open-time ranges are missing on disk for the newest `limit` bars"""
+        now = time.time() if now is None else now
+        current_open = int(candle_open_time(interval, now) * 1000)
+        step = interval_to_seconds(interval) * 1000
+        wanted_start = current_open - (limit - 1) * step
+        series = self.series(source, symbol, interval)
+        with self._disk_access():
+            history_start = series.meta().get("history_start")
+            first, last = series.first_open_time(), series.last_open_time()
+            gaps = series.gaps()
+        if history_start is not None:
+            wanted_start = max(wanted_start, history_start)
+
+        ranges = []
+        skipped = []
+        if first is None or first > wanted_start:
+            # Missing head (or nothing stored yet): fetch up to the first stored bar
+            ranges.append((wanted_start, current_open if first is None else first - 1))
+        for start, end in gaps:
+            if end >= wanted_start and start <= current_open:
+                ranges.append((max(start, wanted_start), min(end, current_open)))
+        if last is not None:
+            tail_start = max(last + 1, wanted_start)
+            if tail_start > last + 1:
+                skipped.append((last + 1, tail_start - 1))
+            ranges.append((tail_start, current_open))
+        return {
+            "series": series, "limit": limit, "step": step, "ranges": ranges, "first": first,
+            "current_open": current_open, "wanted_start": wanted_start, "skipped": skipped,
+            # Bars before the last stored one can only be written by merging
+            "merge": first is not None and any(start < last for start, _ in ranges),
+        }
+
+    def _pages(self, start, end, step, page_size, chunks):
+        """(start_time, limit) of each page request, with as small a `limit` as possible"""
+        while start <= end:
+            yield start, int(min(page_size, (end - start) // step + 1))
+            if not len(chunks[-1]):
+                return
+            # +1 ms rather than + step: calendar months have no fixed length
+            start = int(chunks[-1][-1, 0]) + 1
+
+    def _page_rows(self, data, end):
+        with self._lock:
+            self.requests += 1
+        rows = klines_to_array(data)
+        return rows[rows[:, 0] <= end]
+
+    def _finish(self, plan, fetched):
+        """Persist newly closed candles and assemble the requested window"""
+        series, first, limit = plan["series"], plan["first"], plan["limit"]
+        current_open, wanted_start = plan["current_open"], plan["wanted_start"]
+        ranges = [np.concatenate(chunks) if chunks else np.empty((0, len(STORE_COLUMNS))) for chunks in fetched]
+        rows = np.concatenate(ranges) if ranges else np.empty((0, len(STORE_COLUMNS)))
+        rows = rows[np.argsort(rows[:, 0], kind="stable")] if len(rows) else rows
+
+        closed = rows[rows[:, 0] < current_open]
+        forming = rows[rows[:, 0] >= current_open]
+        with self._disk_access():
+            if first is None and ranges and len(ranges[0]) and ranges[0][0, 0] > wanted_start:
+                # The listing is younger than the requested window
+                series.set_history_start(ranges[0][0, 0])
+            written = series.merge(closed) if plan["merge"] else series.append(closed)
+            series.update_gaps(plan["skipped"], plan["ranges"])
+            stored = series.read(limit=max(limit - len(forming), 0))
+        with self._lock:
+            self.syncs += 1
+            self.bars_fetched += len(rows)
+            self.bars_written += written
+            self.bars_from_disk += len(stored)
+        if len(forming) == 0:
+            return stored
+        forming_df = pd.DataFrame(forming[:, 1:], columns=[name for name, _ in STORE_COLUMNS[1:]],
+                                  index=pd.DatetimeIndex(forming[:, 0].astype(np.int64).view("datetime64[ms]"),
+                                                         name="Open Time"))
+        return pd.concat([stored, forming_df]).iloc[-limit:]
+
+    @contextmanager
+    def _disk_access(self):
+        try:
+            yield
+        except OSError as e:
+            raise CandleStoreError(f"Candle store at {self.root} unavailable: {e}") from e
+
+    def store_frame(self, source, symbol, interval, df, closed_before=None):
+        """Append an OHLCV frame (e.g. a CoinGecko response) to the store
+
+        Bars opening at or after `closed_before` (epoch seconds) are treated as
+        still forming and skipped.
+        """
+        rows = np.column_stack([
+            df.index.as_unit("ms").asi8.astype(np.float64),
+            *(df[name].to_numpy(dtype=np.float64) for name, _ in STORE_COLUMNS[1:]),
+        ])
+        if closed_before is not None:
+            rows = rows[rows[:, 0] < closed_before * 1000]
+        written = self.series(source, symbol, interval).append(rows)
+        with self._lock:
+            self.bars_written += written
+        return written
+
+    def stats(self):
+        with self._lock:
+            return {
+                "root": self.root,
+                "series": len(self._series),
+                "syncs": self.syncs,
+                "requests": self.requests,
+                "bars_fetched": self.bars_fetched,
+                "bars_written": self.bars_written,
+                "bars_from_disk": self.bars_from_disk,
+            }
+
+
+# Process-wide store; set CANDLE_STORE_DIR to relocate it
+shared_candle_store = CandleStore()
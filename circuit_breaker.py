@@ -0,0 +1,224 @@
+import threading
+import time
+from collections import deque
+
+from rate_limiter import BudgetExhausted
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# HTTP statuses that will not recover by retrying soon (451: geo-blocked)
+PERSISTENT_FAILURE_STATUSES = {451}
+# 4xx statuses that do say something about the source (throttling, bans, geo-blocks); any
+# other 4xx (an invalid symbol, an unknown coin id) is the caller's mistake
+SOURCE_FAILURE_CLIENT_STATUSES = {418, 429} | PERSISTENT_FAILURE_STATUSES
+
+
+class SourceUnavailable(Exception):
+    """Raised instead of calling a source whose circuit is open"""
+
+
+class CircuitBreaker:
+    """Per-source breaker over a rolling window of call outcomes
+
+    The breaker opens when at least `min_calls` calls in the last `window`
+    calls (and `window_seconds`) fail at `failure_rate` or more, or at once
+    on a persistent failure such as HTTP 451. While open, calls are refused.
+    After the open period, `half_open_calls` trial calls are let through:
+    success closes the breaker, failure reopens it for twice as long (up to
+    `max_open_seconds`). Calls slower than `slow_call_ms` count as failures.
+    """
+
+    def __init__(self, name, failure_rate=0.5, min_calls=5, window=20, window_seconds=120, open_seconds=30,
+                 max_open_seconds=600, half_open_calls=1, slow_call_ms=None, clock=time.monotonic):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.half_open_calls = half_open_calls
+        self.slow_call_ms = slow_call_ms
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._calls = deque(maxlen=window)  # (time, ok, latency_ms)
+        self._state = CLOSED
+        self._opened_at = None
+        self._open_for = open_seconds
+        self._trials = 0
+        self.trips = 0
+        self.rejected = 0
+        self.successes = 0
+        self.failures = 0
+        self.last_error = None
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def allow(self):
+        """Whether a call may go to this source now (counts half-open trial slots)"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._trials < self.half_open_calls:
+                self._trials += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def release(self):
+        """Return a half-open trial slot whose call ended without an outcome"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._trials > 0:
+                self._trials -= 1
+
+    def record_success(self, latency_ms=None):
+        if self.slow_call_ms is not None and latency_ms is not None and latency_ms > self.slow_call_ms:
+            self.record_failure(latency_ms, f"slow call ({latency_ms:.0f} ms)")
+            return
+        with self._lock:
+            self.successes += 1
+            if self._current_state() == HALF_OPEN:
+                self._close()
+            self._calls.append((self._clock(), True, latency_ms))
+
+    def record_failure(self, latency_ms=None, error=None, persistent=False):
+        with self._lock:
+            self.failures += 1
+            self.last_error = None if error is None else str(error)[:200]
+            now = self._clock()
+            self._calls.append((now, False, latency_ms))
+            state = self._current_state()
+            if state == HALF_OPEN:
+                self._trip(now, min(self._open_for * 2, self.max_open_seconds))
+            elif state == CLOSED:
+                if persistent:
+                    self._trip(now, self.max_open_seconds)
+                elif self._failure_rate_exceeded(now):
+                    self._trip(now, self.open_seconds)
+
+    def reset(self):
+        with self._lock:
+            self._close()
+
+    def stats(self):
+        with self._lock:
+            now = self._clock()
+            recent = self._recent(now)
+            latencies = sorted(l for _, _, l in recent if l is not None)
+            failed = sum(1 for _, ok, _ in recent if not ok)
+            state = self._current_state()
+            return {
+                "state": state,
+                "trips": self.trips,
+                "rejected": self.rejected,
+                "successes": self.successes,
+                "failures": self.failures,
+                "window_calls": len(recent),
+                "error_rate": failed / len(recent) if recent else 0.0,
+                "latency_p50_ms": _percentile(latencies, 50),
+                "latency_p95_ms": _percentile(latencies, 95),
+                "retry_in_seconds": max(self._opened_at + self._open_for - now, 0.0) if state == OPEN else 0.0,
+                "last_error": self.last_error,
+            }
+
+    def _current_state(self):
+        if self._state == OPEN and self._clock() >= self._opened_at + self._open_for:
+            self._state = HALF_OPEN
+            self._trials = 0
+        return self._state
+
+    def _recent(self, now):
+        return [call for call in self._calls if now - call[0] <= self.window_seconds]
+
+    def _failure_rate_exceeded(self, now):
+        recent = self._recent(now)
+        if len(recent) < self.min_calls:
+            return False
+        failed = sum(1 for _, ok, _ in recent if not ok)
+        return failed / len(recent) >= self.failure_rate
+
+    def _trip(self, now, duration):
+        self._state = OPEN
+        self._opened_at = now
+        self._open_for = duration
+        self.trips += 1
+        print(f"Circuit for {self.name} opened for {duration:.0f}s")
+
+    def _close(self):
+        self._state = CLOSED
+        self._opened_at = None
+        self._open_for = self.open_seconds
+        self._calls.clear()
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(int(len(sorted_values) * q / 100), len(sorted_values) - 1)]
+
+
+class SourceHealth:
+    """Circuit breakers for each market-data source, in order of preference"""
+
+    def __init__(self, sources=("binance", "coingecko"), **breaker_options):
+        self.breakers = {name: CircuitBreaker(name, **breaker_options) for name in sources}
+
+    def allow(self, source):
+        return self.breakers[source].allow()
+
+    def record(self, source, latency_ms, error=None):
+        """Record a call outcome; local budget timeouts and client errors say nothing about the source"""
+        breaker = self.breakers[source]
+        status = getattr(error, "status_code", None)
+        if error is None:
+            breaker.record_success(latency_ms)
+        elif isinstance(error, BudgetExhausted):
+            breaker.release()
+        elif status is not None and 400 <= status < 500 and status not in SOURCE_FAILURE_CLIENT_STATUSES:
+            breaker.release()
+        else:
+            breaker.record_failure(latency_ms, error, persistent=status in PERSISTENT_FAILURE_STATUSES)
+
+    def call(self, source, func, *args):
+        """func(*args) through the source's breaker; raises SourceUnavailable while it is open"""
+        if not self.allow(source):
+            raise SourceUnavailable(f"{source} circuit open")
+        start = time.perf_counter()
+        try:
+            result = func(*args)
+        except Exception as e:
+            self.record(source, (time.perf_counter() - start) * 1000, e)
+            raise
+        except BaseException:
+            self.breakers[source].release()
+            raise
+        self.record(source, (time.perf_counter() - start) * 1000)
+        return result
+
+    async def acall(self, source, func, *args):
+        """Async call: awaits func(*args)"""
+        if not self.allow(source):
+            raise SourceUnavailable(f"{source} circuit open")
+        start = time.perf_counter()
+        try:
+            result = await func(*args)
+        except Exception as e:
+            self.record(source, (time.perf_counter() - start) * 1000, e)
+            raise
+        except BaseException:  # Cancelled, e.g. the losing leg of a race
+            self.breakers[source].release()
+            raise
+        self.record(source, (time.perf_counter() - start) * 1000)
+        return result
+
+    def stats(self):
+        return {name: breaker.stats() for name, breaker in self.breakers.items()}
+
+
+# Process-wide source health shared by every analyzer
+shared_source_health = SourceHealth()
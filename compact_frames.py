@@ -0,0 +1,51 @@
+import numpy as np
+
+from confluence_rules import get_rule_set
+
+# Storage modes for indicator frames handed out by TradingAnalyzer:
+#   full     - every indicator column as float64 (default)
+#   float32  - every column, stored as float32
+#   columns  - only the columns consumed by the confluence rules, build_analysis and the charts
+#   compact  - columns + float32
+STORAGE_MODES = ("full", "float32", "columns", "compact")
+
+# float32 keeps a 24-bit significand, so each stored value is within 2**-24
+# (about 6e-8) of the float64 result, relative to its magnitude: about 0.004 at
+# a price of 60,000 and about 60 for an OBV of 1e9. Bounded oscillators (RSI,
+# Stoch, Williams %R, BB position) stay within about 1e-5 of the exact value.
+# Re-evaluating rules on a float32 frame can only flip a comparison whose two
+# sides are already that close.
+FLOAT32_RELATIVE_ERROR = 2.0 ** -24
+
+# Read by build_analysis besides the confluence rule inputs
+ANALYSIS_COLUMNS = ("Close", "R1", "S1", "Pivot", "RSI_14", "MACD", "ADX", "ATR_Percent", "BB_Position")
+
+# Drawn by the price/oscillator charts
+CHART_COLUMNS = (
+    "Open", "High", "Low", "Close", "Volume",
+    "BB_Upper", "BB_Middle", "BB_Lower", "EMA_9", "EMA_21", "EMA_50",
+    "RSI_14", "MACD", "MACD_Signal", "MACD_Histogram",
+)
+
+
+def consumed_columns(rule_set=None):
+    """Columns kept by the `columns` and `compact` modes"""
+    rule_set = rule_set or get_rule_set()
+    return rule_set.columns | set(ANALYSIS_COLUMNS) | set(CHART_COLUMNS)
+
+
+def compact_frame(df, mode, rule_set=None):
+    """Indicator frame in the given storage mode (the frame itself for `full`)"""
+    if mode not in STORAGE_MODES:
+        raise ValueError(f"Unknown storage mode: {mode}")
+    if mode in ("columns", "compact"):
+        keep = consumed_columns(rule_set)
+        df = df[[name for name in df.columns if name in keep]]
+    if mode in ("float32", "compact"):
+        df = df.astype({name: np.float32 for name, dtype in df.dtypes.items() if dtype == np.float64})
+    return df
+
+
+def frame_memory_bytes(df):
+    """Bytes held by a frame's values and index"""
+    return int(df.memory_usage(index=True, deep=True).sum())
@@ -0,0 +1,255 @@
+import hashlib
+import json
+import operator
+import os
+import sys
+import threading
+import time
+from string import Formatter
+
+SIDES = ("bullish", "bearish", "neutral")
+CATEGORIES = ("momentum", "trend", "volatility", "volume")
+
+# The same functions work elementwise on NumPy arrays and on scalars
+OPERATORS = {
+    "<": operator.lt,
+    ">": operator.gt,
+    "<=": operator.le,
+    ">=": operator.ge,
+}
+
+DERIVATIONS = {
+    "pct_change": lambda a, b: (a / b - 1) * 100,
+}
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "confluence_rules.json")
+
+
+class Template:
+    """A text template split once into interned literals and numeric fields
+
+    Templates without fields render to the same interned string every time.
+    """
+
+    def __init__(self, text):
+        parts = []
+        for literal, field, spec, conversion in Formatter().parse(text):
+            if conversion:
+                raise ValueError(f"Conversions are not supported in rule templates: {text!r}")
+            parts.append((sys.intern(literal), field, spec or ""))
+        self.fields = tuple(field for _, field, _ in parts if field is not None)
+        self.static = sys.intern(text) if not self.fields else None
+        self.parts = tuple(parts)
+
+    def render(self, lookup):
+        if self.static is not None:
+            return self.static
+        out = []
+        for literal, field, spec in self.parts:
+            out.append(literal)
+            if field is not None:
+                out.append(format(lookup(field), spec))
+        return "".join(out)
+
+
+class Clauses:
+    """AND of comparisons between columns and/or constants"""
+
+    def __init__(self, clauses):
+        compiled = []
+        for clause in clauses:
+            left, op, right = clause
+            if op not in OPERATORS:
+                raise ValueError(f"Unknown operator {op!r} in clause {clause!r}")
+            compiled.append((left, OPERATORS[op], right))
+        self.clauses = tuple(compiled)
+        self.columns = {v for left, _, right in compiled for v in (left, right) if isinstance(v, str)}
+
+    def test(self, values):
+        """Scalar evaluation against a dict of column values"""
+        for left, op, right in self.clauses:
+            a = values[left] if isinstance(left, str) else left
+            b = values[right] if isinstance(right, str) else right
+            if not op(a, b):
+                return False
+        return True
+
+    def mask(self, columns, size, np):
+        """Vectorized evaluation against a column-array lookup"""
+        mask = np.ones(size, dtype=bool)
+        with np.errstate(invalid="ignore"):
+            for left, op, right in self.clauses:
+                mask &= op(columns.operand(left), columns.operand(right))
+        return mask
+
+
+class Choice:
+    """A constant, or a value picked by a condition ({"when", "then", "else"})"""
+
+    def __init__(self, spec, allowed=None):
+        if isinstance(spec, str):
+            self.when = None
+            self.values = (sys.intern(spec),)
+        else:
+            self.when = Clauses(spec["when"])
+            self.values = (sys.intern(spec["then"]), sys.intern(spec["else"]))
+        if allowed is not None:
+            for value in self.values:
+                if value not in allowed:
+                    raise ValueError(f"Invalid value {value!r}; expected one of {allowed}")
+        self.columns = self.when.columns if self.when else set()
+
+    def pick(self, values):
+        if self.when is None or self.when.test(values):
+            return self.values[0]
+        return self.values[1]
+
+    def index_array(self, columns, size, np):
+        if self.when is None:
+            return np.zeros(size, dtype=np.int8)
+        return np.where(self.when.mask(columns, size, np), 0, 1).astype(np.int8)
+
+
+class Branch:
+    def __init__(self, spec):
+        self.when = Clauses(spec["when"])
+        self.side = Choice(spec["side"], SIDES)
+        self.strength = Choice(spec["strength"])
+        self.condition = Template(spec["condition"])
+        self.implication = Template(spec["implication"])
+        self.timeframe = sys.intern(spec["timeframe"])
+        self.columns = self.when.columns | self.side.columns | self.strength.columns
+
+
+class Rule:
+    def __init__(self, spec):
+        if spec["category"] not in CATEGORIES:
+            raise ValueError(f"Unknown rule category {spec['category']!r}")
+        self.category = sys.intern(spec["category"])
+        self.indicator = sys.intern(spec["indicator"])
+        self.derive = {}
+        for name, (func, *args) in spec.get("derive", {}).items():
+            if func not in DERIVATIONS:
+                raise ValueError(f"Unknown derivation {func!r} for {name!r}")
+            self.derive[name] = (DERIVATIONS[func], tuple(args))
+        self.branches = tuple(Branch(branch) for branch in spec["branches"])
+        derived_inputs = {a for _, args in self.derive.values() for a in args if isinstance(a, str)}
+        template_fields = {f for b in self.branches for t in (b.condition, b.implication) for f in t.fields}
+        self.columns = set().union(*(b.columns for b in self.branches)) | derived_inputs | (
+            template_fields - set(self.derive) - {"side"})
+
+    def evaluate(self, values):
+        """Scalar evaluation: return the confluence dict and its side, or (None, None)"""
+        for branch in self.branches:
+            if not branch.when.test(values):
+                continue
+            side = branch.side.pick(values)
+
+            def lookup(field):
+                if field == "side":
+                    return side
+                derived = self.derive.get(field)
+                if derived is not None:
+                    func, args = derived
+                    return func(*(values[a] if isinstance(a, str) else a for a in args))
+                return values[field]
+
+            return {
+                'indicator': self.indicator,
+                'condition': branch.condition.render(lookup),
+                'implication': branch.implication.render(lookup),
+                'strength': branch.strength.pick(values),
+                'timeframe': branch.timeframe,
+            }, side
+        return None, None
+
+
+class RuleSet:
+    """Confluence rules compiled from their declarative form"""
+
+    def __init__(self, spec, version=None):
+        self.rules = tuple(Rule(rule) for rule in spec["rules"])
+        self.by_category = {
+            category: tuple(rule for rule in self.rules if rule.category == category)
+            for category in CATEGORIES
+        }
+        # Category order, so combined output lists momentum, trend, volatility, volume
+        self.ordered = tuple(rule for category in CATEGORIES for rule in self.by_category[category])
+        self.columns = frozenset().union(*(rule.columns for rule in self.rules))
+        self.category_columns = {
+            category: frozenset().union(*(rule.columns for rule in rules))
+            for category, rules in self.by_category.items()
+        }
+        if version is None:
+            version = hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:12]
+        self.version = version
+
+    def evaluate(self, row, category=None):
+        """Evaluate a single indicator row into {'bullish': [...], 'bearish': [...], 'neutral': [...]}"""
+        if category is None:
+            rules, columns = self.ordered, self.columns
+        else:
+            rules, columns = self.by_category[category], self.category_columns[category]
+        values = {name: row[name] for name in columns}
+        confluences = {'bullish': [], 'bearish': [], 'neutral': []}
+        for rule in rules:
+            entry, side = rule.evaluate(values)
+            if entry is not None:
+                confluences[side].append(entry)
+        return confluences
+
+
+def load_rule_set(path=DEFAULT_RULES_PATH):
+    """Read and compile a rules file; the version is a hash of its contents"""
+    with open(path, "rb") as f:
+        raw = f.read()
+    return RuleSet(json.loads(raw), version=hashlib.sha1(raw).hexdigest()[:12])
+
+
+class RuleSetLoader:
+    """Serves the compiled rule set, recompiling when the file changes on disk
+
+    The file is stat'ed at most once per `check_interval` seconds, since get()
+    runs for every analysis; an edit is picked up within that interval. A
+    broken edit keeps the previously compiled rules in service.
+    """
+
+    def __init__(self, path=None, check_interval=1.0, clock=time.monotonic):
+        self.path = path or os.environ.get("CONFLUENCE_RULES_PATH") or DEFAULT_RULES_PATH
+        self.check_interval = check_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._rule_set = None
+        self._next_check = None
+
+    def get(self):
+        now = self.clock()
+        if self._rule_set is not None and now < self._next_check:
+            return self._rule_set
+        self._next_check = now + self.check_interval
+        try:
+            st = os.stat(self.path)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = self._stamp
+        if stamp != self._stamp or self._rule_set is None:
+            with self._lock:
+                if stamp != self._stamp or self._rule_set is None:
+                    try:
+                        self._rule_set = load_rule_set(self.path)
+                        self._stamp = stamp
+                    except Exception as e:
+                        if self._rule_set is None:
+                            raise
+                        print(f"Failed to reload confluence rules from {self.path}, keeping previous rules: {e}")
+                        self._stamp = stamp
+        return self._rule_set
+
+
+shared_rule_loader = RuleSetLoader()
+
+
+def get_rule_set():
+    """The current process-wide compiled rule set"""
+    return shared_rule_loader.get()
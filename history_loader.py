@@ -0,0 +1,92 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from kline_sync import array_to_frame, klines_to_array
+from ohlcv_cache import candle_open_time, interval_to_seconds
+
+# Binance's maximum klines per request
+MAX_PAGE_SIZE = 1000
+
+# Shortest calendar month, so a "1M" page window never holds more than page_size bars
+MIN_MONTH_SECONDS = 28 * 24 * 60 * 60
+
+
+def to_millis(value):
+    """Epoch milliseconds from a datetime, Timestamp, date string or number (ms)"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return int(value)
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return int(ts.timestamp() * 1000)
+
+
+def page_windows(interval, start, end, page_size=MAX_PAGE_SIZE):
+    """Split [start, end] (open times in ms) into windows of at most `page_size` bars"""
+    seconds = MIN_MONTH_SECONDS if interval == "1M" else interval_to_seconds(interval)
+    span = page_size * seconds * 1000
+    while start <= end:
+        yield start, min(start + span - 1, end)
+        start += span
+
+
+def iter_kline_pages(fetch, symbol, interval, start, end=None, page_size=MAX_PAGE_SIZE, workers=4):
+    """Yield OHLCV frames page by page, in order, for klines opening in [start, end]
+
+    `fetch(symbol, interval, limit, start_time, end_time)` returns raw kline
+    rows. Up to `workers` pages are requested concurrently and at most
+    2 * workers are held at once, so memory stays flat however long the range.
+    Overlapping rows are dropped, and the still-forming candle is included
+    when `end` is None.
+    """
+    start = to_millis(start)
+    end = to_millis(end) if end is not None else int(candle_open_time(interval) * 1000)
+    windows = page_windows(interval, start, end, page_size)
+    pool = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="kline-pages")
+    pending = deque()
+    last_open = None
+    try:
+        for window in windows:
+            pending.append(pool.submit(fetch, symbol, interval, page_size, *window))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            rows = klines_to_array(pending.popleft().result())
+            window = next(windows, None)
+            if window is not None:
+                pending.append(pool.submit(fetch, symbol, interval, page_size, *window))
+            if last_open is not None and len(rows):
+                rows = rows[rows[:, 0] > last_open]
+            if len(rows) == 0:
+                continue
+            last_open = rows[-1, 0]
+            yield array_to_frame(rows)
+    finally:
+        # Stop outstanding requests when the caller stops iterating early
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def load_klines(fetch, symbol, interval, start, end=None, page_size=MAX_PAGE_SIZE, workers=4):
+    """All pages of iter_kline_pages stitched into one frame"""
+    pages = list(iter_kline_pages(fetch, symbol, interval, start, end, page_size, workers))
+    if not pages:
+        return array_to_frame(klines_to_array([]))
+    return pd.concat(pages)
+
+
+# `days` values accepted by CoinGecko's /coins/{id}/ohlc endpoint
+COINGECKO_OHLC_DAYS = (1, 7, 14, 30, 90, 180, 365)
+
+
+def coingecko_days_for(interval, bars, minimum=30):
+    """Smallest CoinGecko OHLC range covering `bars` candles of `interval` (at least `minimum` days)"""
+    needed = max(bars * interval_to_seconds(interval) / 86400.0, minimum)
+    for days in COINGECKO_OHLC_DAYS:
+        if days >= needed:
+            return days
+    return COINGECKO_OHLC_DAYS[-1]
@@ -0,0 +1,50 @@
+class IndicatorGraph:
+    """Named array computations and the names each one depends on
+
+    `evaluate(inputs, outputs)` runs only the nodes the requested outputs
+    need, in dependency order, and each shared intermediate once.
+    """
+
+    def __init__(self, inputs):
+        self.inputs = tuple(inputs)
+        self.nodes = {}  # name -> (dependencies, func)
+        self._plans = {}
+
+    def add(self, name, dependencies, func):
+        """Register `name = func(*dependencies)`; dependencies must already be known"""
+        for dependency in dependencies:
+            if dependency not in self.nodes and dependency not in self.inputs:
+                raise ValueError(f"{name} depends on unknown indicator {dependency}")
+        self.nodes[name] = (tuple(dependencies), func)
+        self._plans.clear()
+
+    def plan(self, outputs):
+        """Nodes needed for `outputs`, each after its dependencies"""
+        key = tuple(outputs)
+        plan = self._plans.get(key)
+        if plan is None:
+            order = []
+            seen = set(self.inputs)
+
+            def visit(name):
+                if name in seen:
+                    return
+                if name not in self.nodes:
+                    raise ValueError(f"Unknown indicator: {name}")
+                for dependency in self.nodes[name][0]:
+                    visit(dependency)
+                seen.add(name)
+                order.append(name)
+
+            for name in outputs:
+                visit(name)
+            plan = self._plans[key] = tuple(order)
+        return plan
+
+    def evaluate(self, inputs, outputs):
+        """{name: array} for `outputs`, given {input name: array}"""
+        values = dict(inputs)
+        for name in self.plan(outputs):
+            dependencies, func = self.nodes[name]
+            values[name] = func(*(values[dependency] for dependency in dependencies))
+        return {name: values[name] for name in outputs}
@@ -0,0 +1,211 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from circuit_breaker import shared_source_health
+from market_http import LatencyHistogram, shared_http_client
+from ohlcv_cache import shared_ohlcv_cache
+from result_cache import shared_result_cache
+
+# Stage buckets reach below a millisecond: confluence and formatting take microseconds
+STAGE_BUCKETS_MS = [0.1, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf")]
+
+# Per-call stage timings (ms) of the analysis running in this thread/task, when traced
+_trace = contextvars.ContextVar("pipeline_trace", default=None)
+
+
+class PipelineMetrics:
+    """Stage timers and labelled counters for the analysis pipeline
+
+    `stage(name)` times a block into a per-stage histogram, into the current
+    trace (see `trace()`), and reports it to every listener as
+    listener(stage, seconds). `count(name, **labels)` increments a counter.
+    """
+
+    def __init__(self, buckets=STAGE_BUCKETS_MS):
+        self.buckets = buckets
+        self.listeners = []
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}  # (name, sorted label items) -> value
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self._stages.get(name)
+            if histogram is None:
+                histogram = self._stages[name] = LatencyHistogram(self.buckets)
+            histogram.observe(seconds * 1000)
+        trace = _trace.get()
+        if trace is not None:
+            trace[name] = trace.get(name, 0.0) + seconds * 1000
+        for listener in self.listeners:
+            listener(name, seconds)
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    @contextmanager
+    def trace(self):
+        """Collect {stage: ms} for the stages run inside the block (yields the dict)"""
+        timings = {}
+        token = _trace.set(timings)
+        try:
+            yield timings
+        finally:
+            _trace.reset(token)
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "stages": {name: histogram.snapshot() for name, histogram in self._stages.items()},
+                "counters": {
+                    name + "".join(f"[{k}={v}]" for k, v in labels): value
+                    for (name, labels), value in self._counters.items()
+                },
+            }
+
+    def prometheus_text(self, collectors=()):
+        """Metrics in the Prometheus text exposition format
+
+        `collectors` are callables returning extra (name, labels, value) gauges.
+        """
+        lines = []
+        with self._lock:
+            if self._stages:
+                lines.append("# TYPE analysis_stage_seconds histogram")
+            for name, histogram in sorted(self._stages.items()):
+                running = 0
+                for bound, n in zip(histogram.buckets, histogram.counts):
+                    running += n
+                    le = "+Inf" if bound == float("inf") else repr(bound / 1000)
+                    lines.append(f'analysis_stage_seconds_bucket{{stage="{name}",le="{le}"}} {running}')
+                lines.append(f'analysis_stage_seconds_sum{{stage="{name}"}} {histogram.total_ms / 1000!r}')
+                lines.append(f'analysis_stage_seconds_count{{stage="{name}"}} {histogram.count}')
+            counter_names = sorted({name for name, _ in self._counters})
+            for counter in counter_names:
+                lines.append(f"# TYPE analysis_{counter}_total counter")
+                for (name, labels), value in sorted(self._counters.items()):
+                    if name == counter:
+                        lines.append(f"analysis_{name}_total{_labels(labels)} {value}")
+        for collect in collectors:
+            for name, labels, value in collect():
+                lines.append(f"{name}{_labels(sorted(labels.items()))} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(items):
+    """Prometheus label set from (key, value) pairs"""
+    if not items:
+        return ""
+    return "{" + ",".join('%s="%s"' % (key, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+                          for key, value in items) + "}"
+
+
+def cprofile_hook(profile=None):
+    """Profiling hook for TradingAnalyzer(profile_hook=...) that accumulates into one cProfile.Profile
+
+    Returns (hook, profile); inspect with pstats.Stats(profile).
+    """
+    import cProfile
+
+    profile = profile or cProfile.Profile()
+    lock = threading.Lock()
+
+    @contextmanager
+    def hook(symbol, interval):
+        # cProfile supports one active profiler per thread; concurrent calls go unprofiled
+        if not lock.acquire(blocking=False):
+            yield
+            return
+        try:
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+        finally:
+            lock.release()
+
+    return hook, profile
+
+
+def serve_metrics(port=9108, host="127.0.0.1", metrics=None, collectors=None):
+    """Serve GET /metrics in Prometheus text format from a daemon thread; returns the server"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    metrics = metrics or shared_metrics
+    collectors = default_collectors() if collectors is None else collectors
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.prometheus_text(collectors).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def default_collectors():
+    """Gauges from the shared OHLCV cache, result cache, HTTP client and source circuit breakers"""
+
+    def cache():
+        stats = shared_ohlcv_cache.stats()
+        return [(f"ohlcv_cache_{name}", {}, stats[name]) for name in ("hits", "misses", "entries", "bytes")]
+
+    def http():
+        rows = []
+        for host, stats in shared_http_client.stats().items():
+            for outcome, value in stats["counters"].items():
+                rows.append(("http_requests", {"host": host, "outcome": outcome}, value))
+            if stats["latency"]["mean_ms"] is not None:
+                rows.append(("http_latency_mean_seconds", {"host": host}, stats["latency"]["mean_ms"] / 1000))
+        return rows
+
+    def sources():
+        rows = []
+        for source, stats in shared_source_health.stats().items():
+            rows.append(("source_circuit_open", {"source": source}, int(stats["state"] != "closed")))
+            rows.append(("source_circuit_trips", {"source": source}, stats["trips"]))
+            rows.append(("source_circuit_rejected", {"source": source}, stats["rejected"]))
+        return rows
+
+    def results():
+        if shared_result_cache is None:
+            return []
+        stats = shared_result_cache.stats()
+        return [(f"result_cache_{name}", {}, stats[name])
+                for name in ("hits", "misses", "computed", "waits", "takeovers", "entries", "bytes")]
+
+    return [cache, results, http, sources]
+
+
+# Process-wide pipeline metrics shared by every analyzer
+shared_metrics = PipelineMetrics()
@@ -0,0 +1,514 @@
+import base64
+import copy
+import hashlib
+import json
+import math
+import os
+import socket
+import ssl
+import struct
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from kline_sync import RollingKlineBuffer, klines_to_array, KLINE_COLUMNS
+from ohlcv_cache import next_candle_close, interval_to_seconds
+from streaming_indicators import StreamingIndicatorEngine
+
+BINANCE_STREAM_URL = "wss://stream.binance.com:9443/stream"
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OP_CONTINUATION, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+
+class WebSocketClosed(Exception):
+    pass
+
+
+def _accept_key(key):
+    return base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest()).decode()
+
+
+class _FrameSocket:
+    """RFC 6455 framing over a connected socket (shared by client and replay server)"""
+
+    def __init__(self, sock, mask, buffered=b""):
+        self.sock = sock
+        self.mask = mask
+        self._buffer = buffered
+        self._send_lock = threading.Lock()
+
+    def _read_exact(self, n):
+        while len(self._buffer) < n:
+            chunk = self.sock.recv(max(65536, n - len(self._buffer)))
+            if not chunk:
+                raise WebSocketClosed("Connection closed by peer")
+            self._buffer += chunk
+        data, self._buffer = self._buffer[:n], self._buffer[n:]
+        return data
+
+    def read_frame(self):
+        first, second = self._read_exact(2)
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", self._read_exact(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", self._read_exact(8))[0]
+        mask = self._read_exact(4) if second & 0x80 else None
+        payload = self._read_exact(length)
+        if mask:
+            payload = _apply_mask(payload, mask)
+        return bool(first & 0x80), first & 0x0F, payload
+
+    def send(self, opcode, payload=b""):
+        if isinstance(payload, str):
+            payload = payload.encode()
+        header = bytes([0x80 | opcode])
+        mask_bit = 0x80 if self.mask else 0
+        length = len(payload)
+        if length < 126:
+            header += bytes([mask_bit | length])
+        elif length < 1 << 16:
+            header += bytes([mask_bit | 126]) + struct.pack("!H", length)
+        else:
+            header += bytes([mask_bit | 127]) + struct.pack("!Q", length)
+        if self.mask:
+            key = os.urandom(4)
+            header += key
+            payload = _apply_mask(payload, key)
+        with self._send_lock:
+            self.sock.sendall(header + payload)
+
+    def recv(self):
+        """Next text/binary message; answers pings, raises WebSocketClosed on close"""
+        parts = []
+        message_opcode = None  # A fragmented message's type is only on its first frame
+        while True:
+            fin, opcode, payload = self.read_frame()
+            if opcode == OP_PING:
+                self.send(OP_PONG, payload)
+            elif opcode == OP_PONG:
+                continue
+            elif opcode == OP_CLOSE:
+                try:
+                    self.send(OP_CLOSE, payload[:2])
+                except OSError:
+                    pass
+                raise WebSocketClosed("Close frame received")
+            else:
+                if opcode != OP_CONTINUATION:
+                    message_opcode = opcode
+                elif message_opcode is None:
+                    raise WebSocketClosed("Continuation frame without a message to continue")
+                parts.append(payload)
+                if fin:
+                    message = b"".join(parts)
+                    return message.decode() if message_opcode == OP_TEXT else message
+
+    def close(self):
+        try:
+            self.send(OP_CLOSE, struct.pack("!H", 1000))
+        except OSError:
+            pass
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def _apply_mask(payload, key):
+    if not payload:
+        return payload
+    repeated = (key * (len(payload) // 4 + 1))[:len(payload)]
+    return (np.frombuffer(payload, dtype=np.uint8) ^ np.frombuffer(repeated, dtype=np.uint8)).tobytes()
+
+
+def connect_websocket(url, timeout=10):
+    """Open a ws:// or wss:// connection; returns a framed socket"""
+    parts = urlsplit(url)
+    secure = parts.scheme == "wss"
+    port = parts.port or (443 if secure else 80)
+    sock = socket.create_connection((parts.hostname, port), timeout=timeout)
+    if secure:
+        sock = ssl.create_default_context().wrap_socket(sock, server_hostname=parts.hostname)
+    key = base64.b64encode(os.urandom(16)).decode()
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    sock.sendall((
+        f"GET {path} HTTP/1.1\r\nHost: {parts.hostname}:{port}\r\nUpgrade: websocket\r\n"
+        f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+    ).encode())
+    response = b""
+    while b"\r\n\r\n" not in response:
+        chunk = sock.recv(4096)
+        if not chunk:
+            raise WebSocketClosed("Connection closed during handshake")
+        response += chunk
+    head, rest = response.split(b"\r\n\r\n", 1)
+    lines = head.decode("latin-1").split("\r\n")
+    if " 101 " not in lines[0] + " ":
+        raise WebSocketClosed(f"WebSocket handshake failed: {lines[0]}")
+    headers = {k.strip().lower(): v.strip() for k, v in (line.split(":", 1) for line in lines[1:] if ":" in line)}
+    if headers.get("sec-websocket-accept") != _accept_key(key):
+        raise WebSocketClosed("WebSocket handshake failed: bad Sec-WebSocket-Accept")
+    return _FrameSocket(sock, mask=True, buffered=rest)
+
+
+def stream_name(symbol, interval):
+    return f"{symbol.lower()}@kline_{interval}"
+
+
+class _Series:
+    """Rolling candles and indicator state for one subscribed (symbol, interval)"""
+
+    def __init__(self, capacity):
+        self.buffer = RollingKlineBuffer(capacity)
+        self.engine = StreamingIndicatorEngine()
+        self.committed = None  # open time (ms) of the newest bar applied to the engine
+        self.row = None        # indicator values for the newest bar
+        self.analysis = None
+        self.version = 0
+        self.updated = None  # clock() of the last event (or seed) applied
+        self.stale = False   # a reseed failed; served as stale until one succeeds
+        self.retry_at = None  # clock() before which a failed reseed is not retried
+
+
+class KlineStream:
+    """Multiplexed Binance kline WebSocket feeding rolling buffers and indicators
+
+    One connection carries every subscribed stream. Each subscription is
+    seeded once from REST (`seed(symbol, interval, limit)` returning raw kline
+    rows), then every kline event updates the rolling buffer and the
+    streaming indicator engine (closed candles are committed, the forming one
+    is previewed) and `analyze(symbol, row)` rebuilds the analysis dict, so
+    readers get the latest analysis straight from memory. A break in the
+    sequence (missed events, reconnects) reseeds the series from REST.
+    Readers get None while the connection is down, when a series has had
+    no event for one interval plus `stale_grace` seconds, or when its reseed
+    failed; a failed reseed is retried on the series' next event, at most
+    every `reseed_retry` seconds.
+    """
+
+    def __init__(self, seed, analyze=None, url=BINANCE_STREAM_URL, capacity=1000, reconnect_delay=1.0,
+                 max_reconnect_delay=30.0, recv_timeout=60, record_path=None, on_update=None, stale_grace=30.0,
+                 reseed_retry=5.0, clock=time.time):
+        self.seed = seed
+        self.analyze = analyze
+        self.url = url
+        self.capacity = capacity
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.recv_timeout = recv_timeout
+        self.record_path = record_path
+        self.on_update = on_update
+        self.stale_grace = stale_grace
+        self.reseed_retry = reseed_retry
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._series = {}
+        self._conn = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._request_id = 0
+        self.connected = threading.Event()
+        self.messages = 0
+        self.reconnects = 0
+        self.reseeds = 0
+        self.errors = 0
+
+    def subscribe(self, symbol, interval):
+        """Seed (symbol, interval) from REST and add it to the live connection"""
+        key = (symbol.upper(), interval)
+        with self._lock:
+            if key in self._series:
+                return
+        self._reseed(key)
+        conn = self._conn
+        if conn is not None:
+            self._send_subscribe(conn, [key])
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="kline-stream", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        conn = self._conn
+        if conn is not None:
+            conn.close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def analysis(self, symbol, interval):
+        """Latest analysis dict (a copy) for a subscribed series, or None if unsubscribed, disconnected or stale"""
+        series = self._live_series(symbol, interval)
+        # Callers may mutate the result; the stored dict is shared by every reader
+        return None if series is None or series.analysis is None else copy.deepcopy(series.analysis)
+
+    def latest_row(self, symbol, interval):
+        """Latest indicator values (dict copy) for a subscribed series, or None if unsubscribed, disconnected or stale"""
+        series = self._live_series(symbol, interval)
+        return None if series is None or series.row is None else dict(series.row)
+
+    def _live_series(self, symbol, interval):
+        series = self._series.get((symbol.upper(), interval))
+        if series is None or not self.connected.is_set() or series.updated is None or series.stale:
+            return None
+        if self.clock() - series.updated > interval_to_seconds(interval) + self.stale_grace:
+            return None
+        return series
+
+    def frame(self, symbol, interval, limit=None):
+        """Rolling candles of a subscribed series as an OHLCV DataFrame (copy)"""
+        with self._lock:
+            series = self._series[(symbol.upper(), interval)]
+            return series.buffer.to_frame(limit).copy()
+
+    def handle_message(self, message):
+        """Apply one raw stream message (combined-stream or plain kline payload)"""
+        payload = json.loads(message) if isinstance(message, (str, bytes)) else message
+        data = payload.get("data", payload)
+        if data.get("e") != "kline":
+            return False
+        k = data["k"]
+        key = (k["s"].upper(), k["i"])
+        row = np.array([[k["t"], float(k["o"]), float(k["h"]), float(k["l"]), float(k["c"]), float(k["v"])]])
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                return False
+            self.messages += 1
+            in_sequence = not series.stale and self._apply(key, series, row, bool(k["x"]))
+        if not in_sequence:
+            self._try_reseed(key, series)
+        elif self.on_update is not None:
+            self.on_update(key[0], key[1], series.analysis)
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                "series": len(self._series),
+                "connected": self.connected.is_set(),
+                "messages": self.messages,
+                "reconnects": self.reconnects,
+                "reseeds": self.reseeds,
+                "stale": sum(1 for series in self._series.values() if series.stale),
+                "errors": self.errors,
+            }
+
+    def _apply(self, key, series, row, closed):
+        """Update buffer and indicators; False when the event does not follow the stored bars"""
+        open_time = int(row[0, 0])
+        last = series.buffer.last_open_time
+        if series.committed is not None and open_time <= series.committed:
+            return True  # late duplicate of an already closed candle
+        if last is not None and open_time > last:
+            expected = int(next_candle_close(key[1], last / 1000) * 1000)
+            if open_time != expected or series.committed != last:
+                return False
+        series.buffer.merge(row)
+        o, h, l, c, v = row[0, 1:]
+        if closed:
+            values = series.engine.update(o, h, l, c, v, open_time)
+            series.committed = open_time
+        else:
+            values = series.engine.preview(o, h, l, c, v, open_time)
+        self._publish(key, series, values)
+        return True
+
+    def _publish(self, key, series, values):
+        series.row = values
+        series.version += 1
+        series.updated = self.clock()
+        if self.analyze is not None and not any(math.isnan(value) for value in values.values()):
+            series.analysis = self.analyze(key[0], values)
+
+    def _reseed(self, key):
+        symbol, interval = key
+        rows = klines_to_array(self.seed(symbol, interval, self.capacity))
+        series = _Series(self.capacity)
+        if len(rows):
+            series.buffer.merge(rows)
+            # The newest REST bar is still forming; every earlier one is closed
+            for bar in rows[:-1]:
+                series.engine.update(*bar[1:], int(bar[0]))
+            series.committed = int(rows[-2, 0]) if len(rows) > 1 else None
+            self._publish(key, series, series.engine.preview(*rows[-1, 1:], int(rows[-1, 0])))
+        with self._lock:
+            existed = key in self._series
+            self._series[key] = series
+            if existed:
+                self.reseeds += 1
+
+    def _try_reseed(self, key, series):
+        """Reseed after a sequence break; if REST fails the series stays stale and a later event retries"""
+        if series.stale and self.clock() < series.retry_at:
+            return
+        try:
+            self._reseed(key)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+                series.stale = True
+                series.retry_at = self.clock() + self.reseed_retry
+            print(f"Reseeding {key[0]} {key[1]} failed ({e}), retrying in {self.reseed_retry:.0f}s")
+
+    def _send_subscribe(self, conn, keys):
+        with self._lock:
+            self._request_id += 1
+            request_id = self._request_id
+        params = [stream_name(symbol, interval) for symbol, interval in keys]
+        conn.send(OP_TEXT, json.dumps({"method": "SUBSCRIBE", "params": params, "id": request_id}))
+
+    def _run(self):
+        delay = self.reconnect_delay
+        record = open(self.record_path, "a") if self.record_path else None
+        try:
+            while not self._stop.is_set():
+                try:
+                    conn = connect_websocket(self.url)
+                    conn.sock.settimeout(self.recv_timeout)
+                    self._conn = conn
+                    with self._lock:
+                        keys = list(self._series)
+                    if keys:
+                        self._send_subscribe(conn, keys)
+                    self.connected.set()
+                    delay = self.reconnect_delay
+                    while not self._stop.is_set():
+                        message = conn.recv()
+                        if record is not None:
+                            _record(record, message)
+                        self.handle_message(message)
+                except (OSError, WebSocketClosed, ValueError) as e:
+                    if self._stop.is_set():
+                        break
+                    with self._lock:
+                        self.errors += 1
+                        self.reconnects += 1
+                    print(f"Kline stream disconnected ({e}), reconnecting in {delay:.1f}s")
+                finally:
+                    self.connected.clear()
+                    if self._conn is not None:
+                        self._conn.close()
+                        self._conn = None
+                if self._stop.wait(delay):
+                    break
+                delay = min(delay * 2, self.max_reconnect_delay)
+        finally:
+            if record is not None:
+                record.close()
+
+
+def _record(record, message):
+    """Append one message to a recording; binary frames are kept only if they are UTF-8 text"""
+    if isinstance(message, bytes):
+        try:
+            message = message.decode()
+        except UnicodeDecodeError:
+            return
+    record.write(message + "\n")
+
+
+class ReplayServer:
+    """Local stand-in for the Binance stream endpoint that replays recorded messages
+
+    Every client that connects receives `messages` (raw JSON strings, e.g.
+    lines written via KlineStream(record_path=...)) spaced `interval` seconds
+    apart; incoming SUBSCRIBE requests are acknowledged and otherwise ignored.
+    """
+
+    def __init__(self, messages, host="127.0.0.1", port=0, interval=0.0, close_after=False):
+        self.messages = list(messages)
+        self.interval = interval
+        self.close_after = close_after
+        self.sock = socket.create_server((host, port))
+        self.host, self.port = self.sock.getsockname()[:2]
+        self.url = f"ws://{self.host}:{self.port}/stream"
+        self._thread = threading.Thread(target=self._serve, name="replay-server", daemon=True)
+        self.connections = 0
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        with open(path) as f:
+            return cls([line.rstrip("\n") for line in f if line.strip()], **kwargs)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+    def _serve(self):
+        while True:
+            try:
+                client, _ = self.sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._handle, args=(client,), daemon=True).start()
+
+    def _handle(self, client):
+        try:
+            request = b""
+            while b"\r\n\r\n" not in request:
+                chunk = client.recv(4096)
+                if not chunk:
+                    return
+                request += chunk
+            head, rest = request.split(b"\r\n\r\n", 1)
+            headers = {k.strip().lower(): v.strip() for k, v in
+                       (line.split(":", 1) for line in head.decode("latin-1").split("\r\n")[1:] if ":" in line)}
+            client.sendall((
+                "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {_accept_key(headers['sec-websocket-key'])}\r\n\r\n"
+            ).encode())
+            conn = _FrameSocket(client, mask=False, buffered=rest)
+            threading.Thread(target=self._acknowledge, args=(conn,), daemon=True).start()
+            for message in self.messages:
+                conn.send(OP_TEXT, message)
+                if self.interval:
+                    time.sleep(self.interval)
+            if self.close_after:
+                conn.close()
+            else:
+                threading.Event().wait()
+        except (OSError, WebSocketClosed):
+            pass
+
+    def _acknowledge(self, conn):
+        try:
+            while True:
+                request = json.loads(conn.recv())
+                conn.send(OP_TEXT, json.dumps({"result": None, "id": request.get("id")}))
+        except (OSError, WebSocketClosed, ValueError):
+            pass
+
+
+def kline_message(symbol, interval, row, closed):
+    """Combined-stream kline message for a KLINE_COLUMNS row (for recordings and replays)"""
+    open_time = int(row[0])
+    fields = dict(zip(KLINE_COLUMNS[1:], row[1:]))
+    return json.dumps({
+        "stream": stream_name(symbol, interval),
+        "data": {
+            "e": "kline", "E": open_time, "s": symbol.upper(),
+            "k": {
+                "t": open_time, "s": symbol.upper(), "i": interval,
+                "o": repr(float(fields["Open"])), "h": repr(float(fields["High"])),
+                "l": repr(float(fields["Low"])), "c": repr(float(fields["Close"])),
+                "v": repr(float(fields["Volume"])), "x": bool(closed),
+            },
+        },
+    })
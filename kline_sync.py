@@ -0,0 +1,181 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
+
+from ohlcv_cache import interval_to_seconds
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # Optional: faster JSON decoding of kline payloads
+    _loads = json.loads
+
+# Column layout of the rolling buffer; Open Time is kept as epoch milliseconds,
+# which float64 represents exactly
+KLINE_COLUMNS = ["Open Time", "Open", "High", "Low", "Close", "Volume"]
+
+
+def parse_klines(body):
+    """(n, 6) float64 array straight from a raw /klines JSON body (bytes)
+
+    Every kline field is numeric but prices come quoted; dropping the quotes
+    lets the decoder produce numbers directly, and only the six used fields
+    are copied into a preallocated column-major array.
+    """
+    data = _loads(body.replace(b'"', b""))
+    n = len(data)
+    rows = np.empty((n, len(KLINE_COLUMNS)), dtype=np.float64, order="F")
+    for column in range(len(KLINE_COLUMNS)):
+        rows[:, column] = np.fromiter(map(itemgetter(column), data), np.float64, n)
+    return rows
+
+
+def klines_to_array(data):
+    """Convert raw Binance kline rows into an (n, 6) float64 array (arrays pass through)"""
+    if isinstance(data, np.ndarray):
+        return data
+    if not data:
+        return np.empty((0, len(KLINE_COLUMNS)), dtype=np.float64)
+    return np.array([row[:6] for row in data], dtype=np.float64)
+
+
+def array_to_frame(rows, copy=True):
+    """Build the OHLCV DataFrame used by TradingAnalyzer from a kline array
+
+    `copy=False` wraps a freshly parsed array without copying it again; the
+    frame then shares memory with `rows`.
+    """
+    index = pd.DatetimeIndex(rows[:, 0].astype(np.int64).view("datetime64[ms]"), name="Open Time")
+    return pd.DataFrame(rows[:, 1:], index=index, columns=KLINE_COLUMNS[1:], copy=copy)
+
+
+class RollingKlineBuffer:
+    """Fixed-capacity buffer of the most recent klines for one series"""
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self._rows = np.empty((capacity, len(KLINE_COLUMNS)), dtype=np.float64)
+        self.size = 0
+
+    @property
+    def last_open_time(self):
+        """Open time (ms) of the newest bar, or None when empty"""
+        if self.size == 0:
+            return None
+        return int(self._rows[self.size - 1, 0])
+
+    def merge(self, rows):
+        """Merge new klines, replacing any bars with the same or later open time
+
+        The first incoming bar is normally the still-forming candle from the
+        previous sync, so it overwrites the stored copy rather than appending.
+        """
+        if len(rows) == 0:
+            return
+        start = int(np.searchsorted(self._rows[:self.size, 0], rows[0, 0], side="left"))
+        rows = rows[-self.capacity:]
+        total = start + len(rows)
+        if total > self.capacity:
+            # Drop the oldest bars to make room
+            shift = total - self.capacity
+            keep = max(start - shift, 0)
+            self._rows[:keep] = self._rows[shift:shift + keep]
+            start = keep
+        self._rows[start:start + len(rows)] = rows
+        self.size = start + len(rows)
+
+    def view(self, limit=None):
+        """Return the newest `limit` rows (a view, not a copy)"""
+        limit = self.size if limit is None else min(limit, self.size)
+        return self._rows[self.size - limit:self.size]
+
+    def to_frame(self, limit=None):
+        return array_to_frame(self.view(limit))
+
+
+class IncrementalKlineSync:
+    """Keeps rolling kline buffers per (symbol, interval) and only downloads new bars
+
+    `fetch(symbol, interval, limit, start_time)` must return raw Binance kline
+    rows; `start_time` is None for a full download.
+    """
+
+    def __init__(self, capacity=1000, max_series=512, clock=time.time):
+        self.capacity = capacity
+        self.max_series = max_series
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._series = OrderedDict()  # (symbol, interval) -> (lock, buffer)
+        self.full_syncs = 0
+        self.incremental_syncs = 0
+        self.klines_received = 0
+
+    def sync(self, symbol, interval, limit, fetch):
+        """Bring the buffer for (symbol, interval) up to date and return its newest `limit` bars"""
+        if limit > self.capacity:
+            raise ValueError(f"limit {limit} exceeds rolling buffer capacity {self.capacity}")
+        lock, buffer = self._series_for(symbol.upper(), interval)
+        with lock:
+            last_open = buffer.last_open_time
+            if last_open is not None:
+                # Bars opened since the stored one, plus the stored (possibly still forming) bar and one spare
+                missing = int(self.clock() * 1000 - last_open) // (interval_to_seconds(interval) * 1000) + 2
+            if last_open is None or buffer.size < limit or missing > self.capacity:
+                data = fetch(symbol, interval, self.capacity, None)
+                rows = klines_to_array(data)
+                buffer.size = 0
+                self.full_syncs += 1
+            else:
+                # Sized to the gap so a steady-state refresh costs the minimum request weight
+                data = fetch(symbol, interval, missing, last_open)
+                rows = klines_to_array(data)
+                if len(rows) == 0 or rows[0, 0] > last_open or len(rows) >= self.capacity:
+                    # The gap since the last sync may be wider than one page; start over
+                    data = fetch(symbol, interval, self.capacity, None)
+                    rows = klines_to_array(data)
+                    buffer.size = 0
+                    self.full_syncs += 1
+                else:
+                    self.incremental_syncs += 1
+            self.klines_received += len(rows)
+            buffer.merge(rows)
+            return buffer.to_frame(limit)
+
+    def reset(self, symbol=None, interval=None):
+        """Forget one series, or all of them"""
+        with self._lock:
+            if symbol is None:
+                self._series.clear()
+            else:
+                self._series.pop((symbol.upper(), interval), None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "series": len(self._series),
+                "full_syncs": self.full_syncs,
+                "incremental_syncs": self.incremental_syncs,
+                "klines_received": self.klines_received,
+            }
+
+    def _series_for(self, symbol, interval):
+        key = (symbol, interval)
+        with self._lock:
+            entry = self._series.get(key)
+            if entry is None:
+                entry = (threading.Lock(), RollingKlineBuffer(self.capacity))
+                self._series[key] = entry
+                while len(self._series) > self.max_series:
+                    self._series.popitem(last=False)
+            else:
+                self._series.move_to_end(key)
+            return entry
+
+
+# Process-wide rolling buffers shared by analyzers running in incremental mode
+shared_kline_sync = IncrementalKlineSync()
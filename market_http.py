@@ -0,0 +1,294 @@
+import email.utils
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Status codes worth retrying; 418 (Binance IP ban) is deliberately excluded
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# For calls paced by a WeightBudget: a 429 goes back to the caller so the budget sees it and backs off
+BUDGETED_RETRY_STATUSES = RETRY_STATUSES - {429}
+
+# Upper bounds (ms) of the latency histogram buckets
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf")]
+
+
+class APIStatusError(Exception):
+    """A non-200 API response; `status_code` lets callers tell outages from geo-blocks"""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class RetryAfterError(APIStatusError):
+    """A retry would have to wait `retry_after` seconds, longer than the request's timeout has left"""
+
+    def __init__(self, message, status_code, retry_after):
+        super().__init__(message, status_code)
+        self.retry_after = retry_after
+
+
+def timeout_budget(timeout):
+    """Total seconds a request may take, retries and waits included (None: unbounded)"""
+    if isinstance(timeout, tuple):
+        return None if None in timeout else sum(timeout)
+    return timeout
+
+
+def attempt_timeout(timeout, remaining):
+    """Timeout for one attempt: the caller's, but never past the remaining budget"""
+    if remaining is None or isinstance(timeout, tuple):
+        return timeout
+    return remaining
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with approximate percentiles"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = list(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def observe(self, ms):
+        for i, bound in enumerate(self.buckets):
+            if ms <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total_ms += ms
+
+    def percentile(self, q):
+        """Upper bound of the bucket containing the q-th percentile"""
+        if self.count == 0:
+            return None
+        target = q / 100.0 * self.count
+        running = 0
+        for bound, n in zip(self.buckets, self.counts):
+            running += n
+            if running >= target:
+                return bound
+        return self.buckets[-1]
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else None,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "buckets": dict(zip(self.buckets, self.counts)),
+        }
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        parsed = email.utils.parsedate_to_datetime(value)
+        if parsed is None:
+            return None
+        return max(parsed.timestamp() - time.time(), 0.0)
+
+
+class MarketDataClient:
+    """Shared HTTP client for market-data APIs
+
+    Keeps pooled keep-alive connections per host, retries 429/5xx and
+    connection errors with exponential backoff and full jitter, honors
+    Retry-After, slows down when Binance reports its per-minute request
+    weight is nearly used up (never waiting past the request's timeout), and
+    records per-host latency histograms.
+    """
+
+    def __init__(self, pool_connections=8, pool_maxsize=32, max_retries=3, backoff_base=0.25,
+                 backoff_cap=8.0, weight_limit=6000, weight_soft_ratio=0.9, sleep=time.sleep):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.weight_limit = weight_limit
+        self.weight_soft_ratio = weight_soft_ratio
+        self._sleep = sleep
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self._latency = {}
+        self._counters = {}
+        self._used_weight = {}  # host -> (weight, minute it was reported in)
+
+    def get(self, url, timeout=10, retry_statuses=RETRY_STATUSES, **kwargs):
+        """GET with retries on `retry_statuses`; returns the final response (callers still check status_code)
+
+        `timeout` bounds the whole call, retries included: no backoff sleep
+        runs past it, and a Retry-After or weight wait that does not fit in
+        what is left raises RetryAfterError at once instead of blocking.
+        """
+        retry = RetryState(self, url, timeout, retry_statuses)
+        while True:
+            delay = retry.weight_delay()
+            if delay:
+                self._sleep(delay)
+            if retry.expired():
+                raise requests.Timeout(f"{url}: {retry.budget}s timeout used up by retries")
+            retry.start()
+            try:
+                response = self.session.get(url, timeout=retry.attempt_timeout(), **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                delay = retry.after_error()
+                if delay is None:
+                    raise
+                self._sleep(delay)
+                continue
+            delay = retry.after_response(response)
+            if delay is None:
+                return response
+            self._sleep(delay)
+
+    def stats(self):
+        """Per-host latency histograms, counters and last reported Binance weight"""
+        with self._lock:
+            return {
+                host: {
+                    "latency": histogram.snapshot(),
+                    "counters": dict(self._counters.get(host, {})),
+                    "used_weight": self._used_weight.get(host, (None, None))[0],
+                }
+                for host, histogram in self._latency.items()
+            }
+
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff before retry number `attempt` + 1"""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def weight_delay(self, host):
+        """Seconds to the next minute window if the weight Binance reported is close to the limit, else 0"""
+        with self._lock:
+            used, minute = self._used_weight.get(host, (0, None))
+        now = time.time()
+        if minute != int(now // 60) or used < self.weight_limit * self.weight_soft_ratio:
+            return 0.0
+        return (minute + 1) * 60 - now
+
+    def record(self, host, ms, outcome):
+        """Add one attempt's latency and outcome (e.g. "status_200", "errors") to the host's stats"""
+        with self._lock:
+            self._latency.setdefault(host, LatencyHistogram()).observe(ms)
+            counters = self._counters.setdefault(host, {})
+            counters[outcome] = counters.get(outcome, 0) + 1
+
+    def count(self, host, name):
+        with self._lock:
+            counters = self._counters.setdefault(host, {})
+            counters[name] = counters.get(name, 0) + 1
+
+    def track_weight(self, host, response):
+        """Remember the request weight Binance reports as used this minute"""
+        used = response.headers.get("X-MBX-USED-WEIGHT-1M") or response.headers.get("X-MBX-USED-WEIGHT")
+        if used is None:
+            return
+        try:
+            used = int(used)
+        except ValueError:
+            return
+        with self._lock:
+            self._used_weight[host] = (used, int(time.time() // 60))
+
+
+class RetryState:
+    """Retry, backoff and weight policy of one GET, shared by the sync and async transports
+
+    The transport owns the I/O and the sleeping; it asks weight_delay()
+    before each attempt, then hands the outcome to after_error() or
+    after_response(), which return the seconds to wait before retrying, or
+    None when the error should be raised or the response returned. Latency,
+    counters and reported weight go into the client's per-host stats.
+    """
+
+    def __init__(self, client, url, timeout, retry_statuses=RETRY_STATUSES):
+        self.client = client
+        self.host = urlsplit(url).netloc
+        self.timeout = timeout
+        self.retry_statuses = retry_statuses
+        self.budget = timeout_budget(timeout)
+        self.deadline = None if self.budget is None else time.monotonic() + self.budget
+        self.attempt = 0
+        self._started = None
+
+    def remaining(self):
+        """Seconds left of the call's timeout (None: unbounded)"""
+        return None if self.deadline is None else max(self.deadline - time.monotonic(), 0.0)
+
+    def expired(self):
+        return self.remaining() == 0
+
+    def attempt_timeout(self):
+        return attempt_timeout(self.timeout, self.remaining())
+
+    def weight_delay(self):
+        """Seconds to wait for the next weight window before the next attempt; RetryAfterError if too long"""
+        delay = self.client.weight_delay(self.host)
+        if delay:
+            self._check_wait(delay, None)
+            self.client.count(self.host, "weight_waits")
+        return delay
+
+    def start(self):
+        self._started = time.perf_counter()
+
+    def after_error(self):
+        """Delay before retrying a connection error or timeout, or None to raise it"""
+        self.client.record(self.host, self._elapsed_ms(), "errors")
+        delay = self.client.backoff(self.attempt)
+        if self.attempt >= self.client.max_retries or not self._fits(delay):
+            return None
+        return self._retrying(delay)
+
+    def after_response(self, response):
+        """Delay before retrying `response`, or None to return it"""
+        self.client.record(self.host, self._elapsed_ms(), f"status_{response.status_code}")
+        self.client.track_weight(self.host, response)
+        if response.status_code not in self.retry_statuses or self.attempt >= self.client.max_retries:
+            return None
+        delay = parse_retry_after(response.headers.get("Retry-After"))
+        if delay is not None:
+            self._check_wait(delay, response.status_code)
+        else:
+            delay = self.client.backoff(self.attempt)
+            if not self._fits(delay):
+                return None
+        return self._retrying(delay)
+
+    def _retrying(self, delay):
+        self.client.count(self.host, "retries")
+        self.attempt += 1
+        return delay
+
+    def _elapsed_ms(self):
+        return (time.perf_counter() - self._started) * 1000
+
+    def _fits(self, delay):
+        """Whether sleeping `delay` still leaves time for another attempt"""
+        remaining = self.remaining()
+        return remaining is None or delay < remaining
+
+    def _check_wait(self, delay, status_code):
+        """Raise RetryAfterError when a mandatory wait would outlast the caller's timeout"""
+        if not self._fits(delay):
+            self.client.count(self.host, "retry_after_exceeded")
+            reason = f"status {status_code}" if status_code is not None else "request weight near the limit"
+            raise RetryAfterError(f"{self.host}: {reason}, retry in {delay:.1f}s", status_code, delay)
+
+
+# Process-wide client so every analyzer shares the same connection pools
+shared_http_client = MarketDataClient()
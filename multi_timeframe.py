@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+from history_loader import MAX_PAGE_SIZE
+from ohlcv_cache import WEEK_OFFSET_SECONDS, interval_to_seconds
+
+# Bars of the highest timeframe to build; indicator warm-up (SMA_50) drops ~50 of them
+DEFAULT_HIGHER_BARS = 120
+
+
+def bucket_open_times(open_times_ms, interval):
+    """Open time (ms) of the `interval` candle containing each base open time, Binance-aligned"""
+    if interval == "1M":
+        months = open_times_ms.astype("datetime64[ms]").astype("datetime64[M]")
+        return months.astype("datetime64[ms]").astype(np.int64)
+    step = interval_to_seconds(interval) * 1000
+    offset = WEEK_OFFSET_SECONDS * 1000 if interval == "1w" else 0
+    return (open_times_ms - offset) // step * step + offset
+
+
+def resample_ohlcv(df, interval):
+    """Aggregate an OHLCV frame into `interval` candles (first/max/min/last/sum)
+
+    A leading bucket that starts before the base data is dropped as
+    incomplete; the trailing bucket is kept as the still-forming candle, like
+    the newest kline Binance returns.
+    """
+    if df.empty:
+        return df.iloc[:0].copy()
+    times = df.index.as_unit("ms").asi8
+    buckets = bucket_open_times(times, interval)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(times)] - 1
+    open_ = df["Open"].to_numpy(dtype=np.float64)
+    out = pd.DataFrame({
+        "Open": open_[starts],
+        "High": np.maximum.reduceat(df["High"].to_numpy(dtype=np.float64), starts),
+        "Low": np.minimum.reduceat(df["Low"].to_numpy(dtype=np.float64), starts),
+        "Close": df["Close"].to_numpy(dtype=np.float64)[ends],
+        "Volume": np.add.reduceat(df["Volume"].to_numpy(dtype=np.float64), starts),
+    }, index=pd.DatetimeIndex(buckets[starts].astype("datetime64[ms]"), name=df.index.name))
+    if times[0] != buckets[0]:
+        out = out.iloc[1:]
+    return out
+
+
+def base_bars_needed(base_interval, intervals, higher_bars=DEFAULT_HIGHER_BARS):
+    """Base candles needed for `higher_bars` candles of the highest interval"""
+    base = interval_to_seconds(base_interval)
+    highest = max(interval_to_seconds(interval) for interval in intervals)
+    # One extra higher candle absorbs a partial leading bucket
+    return int((higher_bars + 1) * highest // base)
+
+
+def plan_timeframes(intervals, higher_bars=DEFAULT_HIGHER_BARS, page_size=MAX_PAGE_SIZE):
+    """(base limit, intervals resampled from the base download, intervals requested directly)
+
+    Resampling saves requests only while the base candles fit in one page:
+    the defaults (15m up to 1d) would need 11,616 15m bars, a dozen paged
+    requests, where fetching 4h and 1d directly costs one request each.
+    """
+    base = intervals[0]
+    resampled = [interval for interval in intervals
+                 if interval == base or base_bars_needed(base, [interval], higher_bars) <= page_size]
+    direct = [interval for interval in intervals if interval not in resampled]
+    limit = base_bars_needed(base, resampled, higher_bars)
+    if direct:
+        # The page is paid for either way; fill it so the resampled intervals get their full window
+        limit = max(limit, page_size)
+    return limit, resampled, direct
+
+
+def median_spacing_seconds(index):
+    if len(index) < 2:
+        return None
+    return float(np.median((index[1:] - index[:-1]).total_seconds()))
+
+
+def net_bias(confluences):
+    """BULLISH/BEARISH/NEUTRAL from the balance of bullish and bearish confluences"""
+    net = len(confluences["bullish"]) - len(confluences["bearish"])
+    return "BULLISH" if net > 0 else "BEARISH" if net < 0 else "NEUTRAL"
+
+
+def combine_timeframes(symbol, analyses, trend_bias, momentum_bias, trend_interval, entry_interval):
+    """Combined view: higher-timeframe trend vs. base-timeframe momentum, plus per-timeframe signals"""
+    signals = {interval: a.get("overall_signal") for interval, a in analyses.items() if "error" not in a}
+    agreement = {side: sum(1 for s in signals.values() if s == side) for side in ("BULLISH", "BEARISH", "NEUTRAL")}
+    alignment = trend_bias if trend_bias == momentum_bias and trend_bias != "NEUTRAL" else "MIXED"
+    opposite = {"BULLISH": "BEARISH", "BEARISH": "BULLISH"}.get(alignment)
+    if alignment != "MIXED" and agreement.get(opposite, 0) == 0:
+        overall_signal = alignment
+        signal_strength = "Strong" if agreement[alignment] == len(signals) else "Medium"
+    else:
+        overall_signal = "NEUTRAL"
+        signal_strength = "Weak"
+    return {
+        "symbol": symbol,
+        "timeframes": analyses,
+        "signals": signals,
+        "agreement": agreement,
+        "trend_interval": trend_interval,
+        "trend_bias": trend_bias,
+        "entry_interval": entry_interval,
+        "momentum_bias": momentum_bias,
+        "alignment": alignment,
+        "overall_signal": overall_signal,
+        "signal_strength": signal_strength,
+    }
@@ -0,0 +1,252 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from indicator_graph import IndicatorGraph
+from streaming_indicators import INDICATOR_COLUMNS
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+OUTPUT_COLUMNS = OHLCV_COLUMNS + INDICATOR_COLUMNS
+COLUMN_INDEX = {name: i for i, name in enumerate(OUTPUT_COLUMNS)}
+
+# Segment length for the closed-form EWM; short enough that (1 - alpha) ** -n
+# stays far from overflow for every window used here
+EWM_CHUNK = 256
+
+
+def ewm_recursive(x, alpha, init):
+    """y[t] = (1 - alpha) * y[t-1] + alpha * x[t] with y[-1] = init, vectorized per chunk"""
+    n = len(x)
+    out = np.empty(n)
+    if n == 0:
+        return out
+    decay = 1.0 - alpha
+    steps = np.arange(EWM_CHUNK)
+    growth = decay ** -steps
+    shrink = decay ** steps
+    carry = decay ** (steps + 1)
+    prev = init
+    for start in range(0, n, EWM_CHUNK):
+        segment = x[start:start + EWM_CHUNK]
+        size = len(segment)
+        weighted = np.cumsum(segment * growth[:size]) * shrink[:size] * alpha
+        out[start:start + size] = carry[:size] * prev + weighted
+        prev = out[start + size - 1]
+    return out
+
+
+def ema(x, span=None, alpha=None, min_periods=0):
+    """Equivalent of `Series.ewm(adjust=False, min_periods=...).mean()` for leading-NaN input"""
+    alpha = 2.0 / (span + 1) if alpha is None else alpha
+    out = np.full(len(x), np.nan)
+    valid = np.flatnonzero(~np.isnan(x))
+    if len(valid) == 0:
+        return out
+    first = valid[0]
+    out[first] = x[first]
+    out[first + 1:] = ewm_recursive(x[first + 1:], alpha, x[first])
+    out[:first + max(min_periods, 1) - 1] = np.nan
+    return out
+
+
+def wilder_average(x, window):
+    """ta's ATR-style smoothing: simple mean seed, then Wilder's average; zeros before the seed"""
+    out = np.zeros(len(x))
+    if len(x) < window:
+        return out
+    out[window - 1] = x[:window].mean()
+    out[window:] = ewm_recursive(x[window:], 1.0 / window, out[window - 1])
+    return out
+
+
+def rolling(x, window, func):
+    """Apply a NumPy reduction over trailing windows; NaN until the window is full"""
+    out = np.full(len(x), np.nan)
+    if len(x) >= window:
+        out[window - 1:] = func(sliding_window_view(x, window), axis=1)
+    return out
+
+
+def expanding_then_rolling_mean(x, window):
+    """Rolling mean with min_periods=0 (expanding mean for the first window - 1 bars)"""
+    out = rolling(x, window, np.mean)
+    head = min(window - 1, len(x))
+    out[:head] = np.cumsum(x[:head]) / np.arange(1, head + 1)
+    return out
+
+
+def shift(x, periods):
+    out = np.full(len(x), np.nan)
+    out[periods:] = x[:-periods]
+    return out
+
+
+def _rsi(diff, window):
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    emaup = ema(up, alpha=1.0 / window, min_periods=window)
+    emadn = ema(down, alpha=1.0 / window, min_periods=window)
+    return np.where(emadn == 0, 100, 100 - (100 / (1 + emaup / emadn)))
+
+
+def _adx(high, low, true_range, window=14):
+    """ADX/+DI/-DI with ta's seeding conventions (zeros during warm-up)"""
+    n = len(high)
+    adx = np.zeros(n)
+    di_plus = np.zeros(n)
+    di_minus = np.zeros(n)
+    if n <= window:
+        return adx, di_plus, di_minus
+
+    up = high[1:] - high[:-1]
+    down = low[:-1] - low[1:]
+    pos = np.where((up > down) & (up > 0), up, 0.0)
+    neg = np.where((down > up) & (down > 0), down, 0.0)
+
+    def wilder_sum(x):
+        # s = s - s / window + x, seeded with the plain sum of the first window values
+        out = np.empty(len(x) - window + 1)
+        out[0] = x[:window].sum()
+        out[1:] = ewm_recursive(x[window:] * window, 1.0 / window, out[0])
+        return out
+
+    trs = wilder_sum(true_range[1:])
+    dip = wilder_sum(pos)
+    din = wilder_sum(neg)
+    nonzero = trs != 0
+    plus = np.where(nonzero, 100 * dip / np.where(nonzero, trs, 1), 0.0)
+    minus = np.where(nonzero, 100 * din / np.where(nonzero, trs, 1), 0.0)
+    total = plus + minus
+    dx = np.where(total != 0, 100 * np.abs(plus - minus) / np.where(total != 0, total, 1), 0.0)
+
+    # trs[i] belongs to bar window + i; ta leaves DI at zero on the seed bar
+    di_plus[window + 1:] = plus[1:]
+    di_minus[window + 1:] = minus[1:]
+    adx[window:] = wilder_average(dx, window)
+    return adx, di_plus, di_minus
+
+
+def _true_range(high, low, prev_close):
+    true_range = np.maximum.reduce([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+    true_range[0] = high[0] - low[0]
+    return true_range
+
+
+def _money_flow(high, low, close, volume):
+    money_flow = ((close - low) - (high - close)) / (high - low)
+    return np.where(np.isnan(money_flow), 0.0, money_flow) * volume
+
+
+# Every indicator column and the shared intermediates it is built from;
+# lower-case names are intermediates that never reach the output frame
+INDICATOR_GRAPH = IndicatorGraph(OHLCV_COLUMNS)
+_add = INDICATOR_GRAPH.add
+
+_add("prev_close", ["Close"], lambda close: shift(close, 1))
+_add("diff", ["Close", "prev_close"], lambda close, prev_close: close - prev_close)
+_add("true_range", ["High", "Low", "prev_close"], _true_range)
+_add("typical", ["High", "Low", "Close"], lambda high, low, close: (high + low + close) / 3.0)
+
+# Momentum
+_add("RSI_14", ["diff"], lambda diff: _rsi(diff, 14))
+_add("RSI_21", ["diff"], lambda diff: _rsi(diff, 21))
+_add("highest_14", ["High"], lambda high: rolling(high, 14, np.max))
+_add("lowest_14", ["Low"], lambda low: rolling(low, 14, np.min))
+_add("range_14", ["highest_14", "lowest_14"], lambda highest, lowest: highest - lowest)
+_add("Stoch_K", ["Close", "lowest_14", "range_14"], lambda close, lowest, rng: 100 * (close - lowest) / rng)
+_add("Stoch_D", ["Stoch_K"], lambda stoch_k: rolling(stoch_k, 3, np.mean))
+_add("Williams_R", ["Close", "highest_14", "range_14"], lambda close, highest, rng: -100 * (highest - close) / rng)
+
+# Trend
+_add("EMA_9", ["Close"], lambda close: ema(close, 9, min_periods=9))
+_add("EMA_21", ["Close"], lambda close: ema(close, 21, min_periods=21))
+_add("EMA_50", ["Close"], lambda close: ema(close, 50, min_periods=50))
+_add("SMA_20", ["Close"], lambda close: rolling(close, 20, np.mean))
+_add("std_20", ["Close"], lambda close: rolling(close, 20, np.std))
+_add("SMA_50", ["Close"], lambda close: rolling(close, 50, np.mean))
+_add("MACD", ["Close"], lambda close: ema(close, 12, min_periods=12) - ema(close, 26, min_periods=26))
+_add("MACD_Signal", ["MACD"], lambda macd: ema(macd, 9, min_periods=9))
+_add("MACD_Histogram", ["MACD", "MACD_Signal"], lambda macd, signal: macd - signal)
+_add("adx_parts", ["High", "Low", "true_range"], _adx)
+_add("ADX", ["adx_parts"], lambda parts: parts[0])
+_add("DI_Plus", ["adx_parts"], lambda parts: parts[1])
+_add("DI_Minus", ["adx_parts"], lambda parts: parts[2])
+
+# Volatility (Bollinger reuses SMA_20)
+_add("BB_Upper", ["SMA_20", "std_20"], lambda sma, std: sma + 2 * std)
+_add("BB_Middle", ["SMA_20"], lambda sma: sma)
+_add("BB_Lower", ["SMA_20", "std_20"], lambda sma, std: sma - 2 * std)
+_add("BB_Width", ["BB_Upper", "BB_Lower", "SMA_20"], lambda upper, lower, sma: (upper - lower) / sma * 100)
+_add("BB_Position", ["Close", "BB_Upper", "BB_Lower"], lambda close, upper, lower: (close - lower) / (upper - lower))
+_add("KC_Upper", ["High", "Low", "Close"],
+     lambda high, low, close: expanding_then_rolling_mean(((4 * high) - (2 * low) + close) / 3.0, 20))
+_add("KC_Lower", ["High", "Low", "Close"],
+     lambda high, low, close: expanding_then_rolling_mean(((-2 * high) + (4 * low) + close) / 3.0, 20))
+_add("KC_Middle", ["typical"], lambda typical: rolling(typical, 20, np.mean))
+_add("ATR", ["true_range"], lambda true_range: wilder_average(true_range, 14))
+_add("ATR_Percent", ["ATR", "Close"], lambda atr, close: atr / close * 100)
+
+# Volume
+_add("volume_sum_20", ["Volume"], lambda volume: rolling(volume, 20, np.sum))
+_add("Volume_SMA", ["volume_sum_20"], lambda volume_sum: volume_sum / 20)
+_add("Volume_Ratio", ["Volume", "Volume_SMA"], lambda volume, volume_sma: volume / volume_sma)
+_add("OBV", ["Close", "prev_close", "Volume"],
+     lambda close, prev_close, volume: np.cumsum(np.where(close < prev_close, -volume, volume)))
+_add("money_flow", ["High", "Low", "Close", "Volume"], _money_flow)
+_add("CMF", ["money_flow", "volume_sum_20"], lambda money_flow, volume_sum: rolling(money_flow, 20, np.sum) / volume_sum)
+
+# Price action
+_add("Body_Size", ["Open", "Close"], lambda open_, close: np.abs(close - open_) / open_ * 100)
+_add("Upper_Wick", ["Open", "High", "Close"], lambda open_, high, close: (high - np.maximum(open_, close)) / open_ * 100)
+_add("Lower_Wick", ["Open", "Low", "Close"], lambda open_, low, close: (np.minimum(open_, close) - low) / open_ * 100)
+_add("Total_Range", ["Open", "High", "Low"], lambda open_, high, low: (high - low) / open_ * 100)
+_add("Pivot", ["typical"], lambda typical: typical)
+_add("R1", ["typical", "Low"], lambda typical, low: 2 * typical - low)
+_add("S1", ["typical", "High"], lambda typical, high: 2 * typical - high)
+
+_add("ROC_5", ["Close"], lambda close: (close / shift(close, 5) - 1) * 100)
+_add("ROC_14", ["Close"], lambda close: (close / shift(close, 14) - 1) * 100)
+
+
+def compute_indicator_array(open_, high, low, close, volume, columns=OUTPUT_COLUMNS):
+    """Compute `columns` into one preallocated (n, k) float64 array, in that order
+
+    Only the part of INDICATOR_GRAPH those columns need is evaluated, and
+    shared intermediates (true range, the 20-bar close window, typical
+    price) are computed once.
+    """
+    inputs = dict(zip(OHLCV_COLUMNS, (open_, high, low, close, volume)))
+    values = INDICATOR_GRAPH.evaluate(inputs, columns)
+    out = np.empty((len(close), len(columns)), order="F")
+    for i, name in enumerate(columns):
+        out[:, i] = values[name]
+    return out
+
+
+def indicator_columns(indicators=None):
+    """Output columns for a requested set of indicators: OHLCV first, then the indicators in OUTPUT_COLUMNS order"""
+    if indicators is None:
+        return OUTPUT_COLUMNS
+    unknown = set(indicators) - set(OUTPUT_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown indicators: {', '.join(sorted(unknown))}")
+    wanted = set(indicators) | set(OHLCV_COLUMNS)
+    return [name for name in OUTPUT_COLUMNS if name in wanted]
+
+
+def add_indicators_numpy(df, indicators=None, keep_warm_up=False):
+    """NumPy backend for TradingAnalyzer.add_comprehensive_indicators
+
+    Returns a new DataFrame with the same columns and rows (NaN warm-up rows
+    dropped unless `keep_warm_up`) as the ta-based path, built from a single
+    2-D array. With `indicators`, only OHLCV plus those columns are computed,
+    and warm-up is judged on them alone.
+    """
+    columns = indicator_columns(indicators)
+    arrays = [np.ascontiguousarray(df[name].to_numpy(dtype=np.float64)) for name in OHLCV_COLUMNS]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = compute_indicator_array(*arrays, columns=columns)
+    keep = np.ones(len(out), dtype=bool) if keep_warm_up else ~np.isnan(out).any(axis=1)
+    if not keep.all():
+        out = np.asfortranarray(out[keep])
+    return pd.DataFrame(out, index=df.index[keep], columns=columns, copy=False)
@@ -0,0 +1,206 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+# Binance kline intervals expressed in seconds ("1M" is handled separately
+# because calendar months have no fixed length)
+INTERVAL_SECONDS = {
+    "1s": 1,
+    "1m": 60,
+    "3m": 3 * 60,
+    "5m": 5 * 60,
+    "15m": 15 * 60,
+    "30m": 30 * 60,
+    "1h": 60 * 60,
+    "2h": 2 * 60 * 60,
+    "4h": 4 * 60 * 60,
+    "6h": 6 * 60 * 60,
+    "8h": 8 * 60 * 60,
+    "12h": 12 * 60 * 60,
+    "1d": 24 * 60 * 60,
+    "3d": 3 * 24 * 60 * 60,
+    "1w": 7 * 24 * 60 * 60,
+    "1M": 30 * 24 * 60 * 60,
+}
+
+# The Unix epoch was a Thursday; Binance weekly candles open on Monday
+WEEK_OFFSET_SECONDS = 4 * 24 * 60 * 60
+
+
+def interval_to_seconds(interval):
+    """Return the nominal length of a kline interval in seconds"""
+    try:
+        return INTERVAL_SECONDS[interval]
+    except KeyError:
+        raise ValueError(f"Unsupported interval: {interval}")
+
+
+def candle_open_time(interval, now=None):
+    """Return the open time (epoch seconds) of the candle containing `now`"""
+    now = time.time() if now is None else now
+    if interval == "1M":
+        current = datetime.fromtimestamp(now, tz=timezone.utc)
+        return current.replace(day=1, hour=0, minute=0, second=0, microsecond=0).timestamp()
+    seconds = interval_to_seconds(interval)
+    offset = WEEK_OFFSET_SECONDS if interval == "1w" else 0
+    return ((now - offset) // seconds) * seconds + offset
+
+
+def next_candle_close(interval, now=None):
+    """Return the epoch second at which the currently forming candle closes"""
+    now = time.time() if now is None else now
+    if interval == "1M":
+        current = datetime.fromtimestamp(candle_open_time(interval, now), tz=timezone.utc)
+        if current.month == 12:
+            return current.replace(year=current.year + 1, month=1).timestamp()
+        return current.replace(month=current.month + 1).timestamp()
+    return candle_open_time(interval, now) + interval_to_seconds(interval)
+
+
+def frame_nbytes(value):
+    """Approximate memory footprint of a cached value"""
+    if hasattr(value, "memory_usage"):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    return 0
+
+
+class _InFlight:
+    """A load in progress that concurrent callers wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class OHLCVCache:
+    """Thread-safe LRU cache with per-entry expiry and single-flight loading
+
+    Entries are keyed by (source, symbol, interval, limit). Concurrent misses
+    for the same key are coalesced so the loader only runs once.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=256 * 1024 * 1024, clock=time.time):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, expires_at, nbytes)
+        self._inflight = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return a fresh cached value or None"""
+        with self._lock:
+            return self._lookup(key)
+
+    def put(self, key, value, expires_at):
+        """Store a value until `expires_at` (epoch seconds)"""
+        with self._lock:
+            self._store(key, value, expires_at)
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for `key`, calling `loader` on a miss
+
+        `loader` must return a `(value, expires_at)` tuple. Only one thread runs
+        the loader for a given key; others block until it finishes and share
+        its result or exception.
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                return value
+            flight = self._inflight.get(key)
+            if flight is None:
+                flight = _InFlight()
+                self._inflight[key] = flight
+                owner = True
+            else:
+                self.coalesced += 1
+                owner = False
+
+        if not owner:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value, expires_at = loader()
+            flight.value = value
+            with self._lock:
+                self._store(key, value, expires_at)
+            return value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when no key is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._bytes = 0
+            elif key in self._entries:
+                self._bytes -= self._entries.pop(key)[2]
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at, nbytes = entry
+        if self._clock() >= expires_at:
+            del self._entries[key]
+            self._bytes -= nbytes
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _store(self, key, value, expires_at):
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[2]
+        nbytes = frame_nbytes(value)
+        self._entries[key] = (value, expires_at, nbytes)
+        self._bytes += nbytes
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            _, (_, _, evicted_bytes) = self._entries.popitem(last=False)
+            self._bytes -= evicted_bytes
+            self.evictions += 1
+
+
+# Process-wide cache shared by every TradingAnalyzer (and Streamlit session)
+shared_ohlcv_cache = OHLCVCache()
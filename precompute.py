@@ -0,0 +1,174 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ohlcv_cache import candle_open_time, next_candle_close
+
+
+class _Entry:
+    __slots__ = ("analysis", "computed_at", "candle_open")
+
+    def __init__(self, analysis, computed_at, candle_open):
+        self.analysis = analysis
+        self.computed_at = computed_at
+        self.candle_open = candle_open
+
+
+class PrecomputeScheduler:
+    """Refreshes analyses for a watchlist just after each candle closes
+
+    For every watched (symbol, interval) the scheduler thread calls
+    `compute(symbol, interval)` `delay` seconds after the interval's candle
+    closes and stores the resulting analysis dict. `get()` returns it (with
+    `computed_at` and `age_seconds`) until the next close, so page requests
+    after a close are answered from memory instead of all fetching at once.
+    Refreshes due together run on `workers` threads, the most requested
+    series first (request counts decay with `popularity_half_life`).
+    """
+
+    def __init__(self, compute, watchlist=(), delay=2.0, workers=2, retry_seconds=15.0,
+                 popularity_half_life=3600.0, clock=time.time):
+        self.compute = compute
+        self.delay = delay
+        self.workers = workers
+        self.retry_seconds = retry_seconds
+        self.popularity_half_life = popularity_half_life
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._due = {}  # key -> epoch second of the next refresh
+        self._popularity = {}  # key -> (decayed request count, as of)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.refreshes = 0
+        self.failures = 0
+        self.hits = 0
+        self.misses = 0
+        for symbol, interval in watchlist:
+            self.watch(symbol, interval)
+
+    def watch(self, symbol, interval):
+        """Add (symbol, interval) to the watchlist; it is computed on the next scheduler pass"""
+        candle_open_time(interval)  # Validates the interval
+        key = (symbol.upper(), interval)
+        with self._lock:
+            self._due.setdefault(key, self.clock())
+        self._wake.set()
+
+    def unwatch(self, symbol, interval):
+        key = (symbol.upper(), interval)
+        with self._lock:
+            self._due.pop(key, None)
+            self._entries.pop(key, None)
+
+    def watchlist(self):
+        with self._lock:
+            return list(self._due)
+
+    def record_request(self, symbol, interval):
+        """Count a page request for (symbol, interval) towards its refresh priority"""
+        key = (symbol.upper(), interval)
+        now = self.clock()
+        with self._lock:
+            self._popularity[key] = (self._decayed(key, now) + 1.0, now)
+
+    def popularity(self, symbol, interval):
+        with self._lock:
+            return self._decayed((symbol.upper(), interval), self.clock())
+
+    def get(self, symbol, interval):
+        """Stored analysis for the current candle with its freshness, or None"""
+        key = (symbol.upper(), interval)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.candle_open != candle_open_time(interval, now):
+                self.misses += 1
+                return None
+            self.hits += 1
+        analysis = dict(entry.analysis)
+        analysis["computed_at"] = entry.computed_at
+        analysis["age_seconds"] = round(now - entry.computed_at, 3)
+        return analysis
+
+    def refresh(self, keys=None):
+        """Recompute `keys` (default: the whole watchlist) now, most popular first; returns how many succeeded"""
+        if keys is None:
+            keys = self.watchlist()
+        keys = [(symbol.upper(), interval) for symbol, interval in keys]
+        now = self.clock()
+        with self._lock:
+            keys.sort(key=lambda key: -self._decayed(key, now))
+        if self.workers > 1 and len(keys) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="precompute") as pool:
+                results = list(pool.map(self._refresh_one, keys))
+        else:
+            results = [self._refresh_one(key) for key in keys]
+        return sum(results)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="precompute", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def stats(self):
+        now = self.clock()
+        with self._lock:
+            return {
+                "watched": len(self._due),
+                "stored": len(self._entries),
+                "refreshes": self.refreshes,
+                "failures": self.failures,
+                "hits": self.hits,
+                "misses": self.misses,
+                "next_refresh_in": round(min(self._due.values()) - now, 3) if self._due else None,
+            }
+
+    def _decayed(self, key, now):
+        count, as_of = self._popularity.get(key, (0.0, now))
+        return count * math.pow(0.5, max(now - as_of, 0.0) / self.popularity_half_life)
+
+    def _refresh_one(self, key):
+        symbol, interval = key
+        started = self.clock()
+        try:
+            analysis = self.compute(symbol, interval)
+            ok = "error" not in analysis
+        except Exception as e:
+            print(f"Precompute failed for {symbol} {interval}: {e}")
+            ok = False
+        now = self.clock()
+        with self._lock:
+            if key not in self._due:
+                return False  # Unwatched meanwhile
+            if ok:
+                self.refreshes += 1
+                # Stamped with the candle the data was fetched in, so a refresh straddling a close expires at once
+                self._entries[key] = _Entry(analysis, now, candle_open_time(interval, started))
+                self._due[key] = next_candle_close(interval, started) + self.delay
+            else:
+                self.failures += 1
+                self._due[key] = min(now + self.retry_seconds, next_candle_close(interval, now) + self.delay)
+        return ok
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            now = self.clock()
+            with self._lock:
+                due = [key for key, when in self._due.items() if when <= now]
+                next_due = min(self._due.values(), default=now + 60)
+            if due:
+                self.refresh(due)
+                continue
+            self._wake.wait(min(max(next_due - now, 0.05), 60))
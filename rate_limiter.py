@@ -0,0 +1,207 @@
+import heapq
+import itertools
+import os
+import sqlite3
+import threading
+import time
+
+# Lower value = served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+# Binance's default REQUEST_WEIGHT limit per minute for api.binance.com
+BINANCE_WEIGHT_PER_MINUTE = 6000
+
+
+def klines_weight(limit):
+    """Request weight of GET /api/v3/klines for a given `limit`"""
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+class BudgetExhausted(TimeoutError):
+    """The local weight budget ran out before a request was sent"""
+
+
+class _LocalBucket:
+    """Token bucket state held in this process"""
+
+    def __init__(self, capacity):
+        self.tokens = capacity
+        self.updated = time.time()
+        self.blocked_until = 0.0
+
+    def take(self, weight, now, capacity, rate):
+        """Take `weight` tokens; return 0 on success or the seconds to wait"""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self.tokens = min(capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= weight:
+            self.tokens -= weight
+            return 0.0
+        return (weight - self.tokens) / rate
+
+    def cap(self, limit, now, capacity, rate):
+        self.tokens = min(capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        self.tokens = min(self.tokens, limit)
+
+    def block(self, until):
+        self.blocked_until = max(self.blocked_until, until)
+
+
+class _SQLiteBucket:
+    """Token bucket state stored in a SQLite file so processes on one host share it"""
+
+    def __init__(self, path, capacity):
+        self.conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS weight_bucket ("
+            "id INTEGER PRIMARY KEY CHECK (id = 1), tokens REAL, updated REAL, blocked_until REAL)"
+        )
+        self.conn.execute(
+            "INSERT OR IGNORE INTO weight_bucket VALUES (1, ?, ?, 0)", (capacity, time.time())
+        )
+
+    def _update(self, func):
+        cur = self.conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            tokens, updated, blocked_until = cur.execute(
+                "SELECT tokens, updated, blocked_until FROM weight_bucket WHERE id = 1"
+            ).fetchone()
+            result, tokens, updated, blocked_until = func(tokens, updated, blocked_until)
+            cur.execute(
+                "UPDATE weight_bucket SET tokens = ?, updated = ?, blocked_until = ? WHERE id = 1",
+                (tokens, updated, blocked_until),
+            )
+            cur.execute("COMMIT")
+            return result
+        except Exception:
+            cur.execute("ROLLBACK")
+            raise
+
+    def take(self, weight, now, capacity, rate):
+        def apply(tokens, updated, blocked_until):
+            if now < blocked_until:
+                return blocked_until - now, tokens, updated, blocked_until
+            tokens = min(capacity, tokens + max(now - updated, 0.0) * rate)
+            if tokens >= weight:
+                return 0.0, tokens - weight, now, blocked_until
+            return (weight - tokens) / rate, tokens, now, blocked_until
+
+        return self._update(apply)
+
+    def cap(self, limit, now, capacity, rate):
+        def apply(tokens, updated, blocked_until):
+            tokens = min(capacity, tokens + max(now - updated, 0.0) * rate)
+            return None, min(tokens, limit), now, blocked_until
+
+        self._update(apply)
+
+    def block(self, until):
+        self._update(lambda tokens, updated, blocked_until: (None, tokens, updated, max(blocked_until, until)))
+
+
+class WeightBudget:
+    """Token-bucket scheduler for Binance request weight
+
+    Tokens refill continuously at `limit_per_minute / 60` per second up to
+    `limit_per_minute * headroom`. Waiting requests are served in priority
+    order (interactive before background), FIFO within a priority. With
+    `state_path` the bucket lives in a SQLite file so every process on the
+    host draws from the same budget.
+    """
+
+    def __init__(self, limit_per_minute=BINANCE_WEIGHT_PER_MINUTE, headroom=0.8, state_path=None):
+        self.capacity = limit_per_minute * headroom
+        self.rate = self.capacity / 60.0
+        self._bucket = _SQLiteBucket(state_path, self.capacity) if state_path else _LocalBucket(self.capacity)
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._seq = itertools.count()
+        self.granted = 0
+        self.granted_weight = 0
+        self.waited_seconds = 0.0
+        self.penalties = 0
+        self.timeouts = 0
+
+    def acquire(self, weight=1, priority=PRIORITY_INTERACTIVE, timeout=None):
+        """Block until `weight` can be spent; raises TimeoutError after `timeout` seconds"""
+        weight = min(weight, self.capacity)
+        ticket = (priority, next(self._seq))
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    delay = None
+                    if self._waiters[0] == ticket:
+                        delay = self._bucket.take(weight, time.time(), self.capacity, self.rate)
+                        if delay == 0:
+                            heapq.heappop(self._waiters)
+                            self.granted += 1
+                            self.granted_weight += weight
+                            self.waited_seconds += time.monotonic() - start
+                            self._cond.notify_all()
+                            return
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.timeouts += 1
+                            raise BudgetExhausted(f"Request weight budget exhausted (waited {timeout}s)")
+                        delay = remaining if delay is None else min(delay, remaining)
+                    self._cond.wait(delay)
+            except BaseException:
+                if ticket in self._waiters:
+                    self._waiters.remove(ticket)
+                    heapq.heapify(self._waiters)
+                    self._cond.notify_all()
+                raise
+
+    def observe_used_weight(self, used, limit_per_minute=BINANCE_WEIGHT_PER_MINUTE):
+        """Reconcile with the server's X-MBX-USED-WEIGHT-1M report"""
+        with self._cond:
+            remaining = self.capacity - used * (self.capacity / limit_per_minute)
+            self._bucket.cap(remaining, time.time(), self.capacity, self.rate)
+
+    def penalize(self, seconds):
+        """Stop granting requests for `seconds` (after a 429/418 response)"""
+        with self._cond:
+            self.penalties += 1
+            self._bucket.block(time.time() + seconds)
+            self._cond.notify_all()
+
+    def observe_response(self, response):
+        """Update the budget from a Binance response's headers and status"""
+        headers = response.headers
+        used = headers.get("X-MBX-USED-WEIGHT-1M") or headers.get("X-MBX-USED-WEIGHT")
+        if used is not None and str(used).isdigit():
+            self.observe_used_weight(int(used))
+        if response.status_code in (418, 429):
+            retry_after = headers.get("Retry-After")
+            self.penalize(float(retry_after) if retry_after and retry_after.isdigit() else 60.0)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "granted": self.granted,
+                "granted_weight": self.granted_weight,
+                "waiting": len(self._waiters),
+                "waited_seconds": self.waited_seconds,
+                "penalties": self.penalties,
+                "timeouts": self.timeouts,
+                "capacity": self.capacity,
+                "shared": isinstance(self._bucket, _SQLiteBucket),
+            }
+
+
+# Process-wide budget; set BINANCE_WEIGHT_DB to a file path to share it across processes
+shared_weight_budget = WeightBudget(state_path=os.environ.get("BINANCE_WEIGHT_DB"))
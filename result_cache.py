@@ -0,0 +1,169 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from ohlcv_cache import candle_open_time
+
+
+def last_closed_candle(interval, now=None):
+    """Open time (epoch seconds) of the newest closed candle"""
+    return candle_open_time(interval, candle_open_time(interval, now) - 1)
+
+
+class SharedResultCache:
+    """Analysis results shared by every process on a host through one SQLite file
+
+    Entries are keyed by (symbol, interval, last closed candle, rule version)
+    and hold the pickled analysis dict and, optionally, its indicator frame.
+    `get_or_compute` runs `compute` once per key across threads and
+    processes: the first caller takes a lease row and computes, the others
+    poll until the result lands (or the lease runs out, when they take over).
+    The file runs in WAL mode so readers never block the writer. It is only
+    written by this app's own processes, which is what makes unpickling it safe.
+    """
+
+    def __init__(self, path, store_frames=False, lease_seconds=60.0, wait_timeout=30.0, poll_interval=0.05,
+                 clock=time.time):
+        self.path = path
+        self.store_frames = store_frames
+        self.lease_seconds = lease_seconds
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.owner = f"{os.getpid()}:{id(self)}"
+        self._lock = threading.Lock()
+        # Threads of this process computing the same key queue here instead of polling the lease
+        self._key_locks = [threading.Lock() for _ in range(64)]
+        self.conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_results ("
+            "key TEXT PRIMARY KEY, analysis BLOB, frame BLOB, created REAL, expires REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS analysis_results_expires ON analysis_results (expires)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS analysis_leases (key TEXT PRIMARY KEY, owner TEXT, expires REAL)")
+        self.hits = 0
+        self.misses = 0
+        self.computed = 0
+        self.waits = 0
+        self.takeovers = 0
+
+    @staticmethod
+    def key(symbol, interval, version, now=None):
+        return f"{symbol.upper()}|{interval}|{int(last_closed_candle(interval, now))}|{version}"
+
+    def get(self, key):
+        """Stored analysis dict for `key`, or None"""
+        row = self._fetch("SELECT analysis FROM analysis_results WHERE key = ? AND expires > ?", key)
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return pickle.loads(row[0])
+
+    def get_frame(self, key):
+        """Stored indicator frame for `key`, or None"""
+        row = self._fetch("SELECT frame FROM analysis_results WHERE key = ? AND expires > ?", key)
+        return None if row is None or row[0] is None else pickle.loads(row[0])
+
+    def put(self, key, analysis, expires_at, frame=None):
+        analysis_blob = pickle.dumps(analysis, protocol=pickle.HIGHEST_PROTOCOL)
+        frame_blob = None
+        if frame is not None and self.store_frames:
+            frame_blob = pickle.dumps(frame, protocol=pickle.HIGHEST_PROTOCOL)
+        now = self.clock()
+        with self._lock:
+            self.conn.execute("DELETE FROM analysis_results WHERE expires <= ?", (now,))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO analysis_results VALUES (?, ?, ?, ?, ?)",
+                (key, analysis_blob, frame_blob, now, expires_at),
+            )
+
+    def get_or_compute(self, key, compute, expires_at):
+        """Cached analysis for `key`, else `compute()` -> (analysis, frame or None) run by one caller
+
+        Error analyses (with an "error" key) are returned but not stored.
+        """
+        analysis = self.get(key)
+        if analysis is not None:
+            return analysis
+        with self._key_locks[hash(key) % len(self._key_locks)]:
+            deadline = self.clock() + self.wait_timeout
+            while True:
+                analysis = self.get(key)
+                if analysis is not None:
+                    return analysis
+                if self._acquire_lease(key):
+                    break
+                if self.clock() >= deadline:
+                    break  # Lease holder is stuck; compute without it rather than fail
+                with self._lock:
+                    self.waits += 1
+                time.sleep(self.poll_interval)
+            try:
+                analysis, frame = compute()
+                with self._lock:
+                    self.computed += 1
+                if "error" not in analysis:
+                    self.put(key, analysis, expires_at, frame)
+                return analysis
+            finally:
+                self._release_lease(key)
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM analysis_results")
+            self.conn.execute("DELETE FROM analysis_leases")
+
+    def stats(self):
+        with self._lock:
+            entries, nbytes = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(analysis) + COALESCE(LENGTH(frame), 0)), 0) "
+                "FROM analysis_results WHERE expires > ?", (self.clock(),)
+            ).fetchone()
+            return {
+                "path": self.path,
+                "entries": entries,
+                "bytes": nbytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "computed": self.computed,
+                "waits": self.waits,
+                "takeovers": self.takeovers,
+            }
+
+    def _fetch(self, sql, key):
+        with self._lock:
+            return self.conn.execute(sql, (key, self.clock())).fetchone()
+
+    def _acquire_lease(self, key):
+        now = self.clock()
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                row = cur.execute("SELECT owner, expires FROM analysis_leases WHERE key = ?", (key,)).fetchone()
+                if row is not None and row[1] > now and row[0] != self.owner:
+                    cur.execute("COMMIT")
+                    return False
+                if row is not None and row[0] != self.owner:
+                    self.takeovers += 1
+                cur.execute("INSERT OR REPLACE INTO analysis_leases VALUES (?, ?, ?)",
+                            (key, self.owner, now + self.lease_seconds))
+                cur.execute("COMMIT")
+                return True
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+
+    def _release_lease(self, key):
+        with self._lock:
+            self.conn.execute("DELETE FROM analysis_leases WHERE key = ? AND owner = ?", (key, self.owner))
+
+
+# Process-wide result cache; set ANALYSIS_CACHE_DB to a file path to share analyses between processes
+shared_result_cache = SharedResultCache(os.environ["ANALYSIS_CACHE_DB"]) if os.environ.get("ANALYSIS_CACHE_DB") else None
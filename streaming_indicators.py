@@ -0,0 +1,471 @@
+import copy
+import math
+import threading
+from collections import OrderedDict, deque
+
+import pandas as pd
+
+NAN = float("nan")
+
+# Columns produced by StreamingIndicatorEngine, in the same order as
+# TradingAnalyzer.add_comprehensive_indicators
+INDICATOR_COLUMNS = [
+    "RSI_14", "RSI_21", "Stoch_K", "Stoch_D", "Williams_R",
+    "EMA_9", "EMA_21", "EMA_50", "SMA_20", "SMA_50",
+    "MACD", "MACD_Signal", "MACD_Histogram",
+    "ADX", "DI_Plus", "DI_Minus",
+    "BB_Upper", "BB_Middle", "BB_Lower", "BB_Width", "BB_Position",
+    "KC_Upper", "KC_Lower", "KC_Middle",
+    "ATR", "ATR_Percent",
+    "Volume_SMA", "Volume_Ratio", "OBV", "CMF",
+    "Body_Size", "Upper_Wick", "Lower_Wick", "Total_Range",
+    "Pivot", "R1", "S1",
+    "ROC_5", "ROC_14",
+]
+
+
+def _div(a, b):
+    """Float division with NumPy semantics (inf/nan instead of ZeroDivisionError)"""
+    if b == 0:
+        if a == 0 or math.isnan(a):
+            return NAN
+        return math.copysign(math.inf, a)
+    return a / b
+
+
+def _clone(obj):
+    """Copy an indicator state object, duplicating nested state but not scalars
+
+    Much cheaper than copy.deepcopy for the small, flat state kept here.
+    """
+    clone = copy.copy(obj)
+    for name, value in vars(obj).items():
+        if isinstance(value, deque):
+            setattr(clone, name, deque(value, maxlen=value.maxlen))
+        elif hasattr(value, "update"):
+            setattr(clone, name, _clone(value))
+    return clone
+
+
+class EMA:
+    """Exponential moving average matching `Series.ewm(adjust=False)`
+
+    Leading NaN inputs are skipped, so it can smooth another indicator that
+    is still warming up (e.g. the MACD signal line).
+    """
+
+    def __init__(self, alpha, min_periods):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value = NAN
+        self.count = 0
+
+    @classmethod
+    def from_span(cls, span):
+        return cls(2.0 / (span + 1), span)
+
+    def update(self, x):
+        if math.isnan(x):
+            return self.current()
+        if self.count == 0:
+            self.value = x
+        else:
+            self.value = (1 - self.alpha) * self.value + self.alpha * x
+        self.count += 1
+        return self.current()
+
+    def current(self):
+        return self.value if self.count >= self.min_periods else NAN
+
+
+class RollingMean:
+    """Rolling mean (and population std) over a fixed window using running sums
+
+    Sums are recomputed from the window every `window` updates so floating
+    point drift cannot accumulate; the cost stays O(1) amortized.
+    """
+
+    def __init__(self, window, min_periods=None):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.values = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.nans = 0
+        self._updates = 0
+
+    def update(self, x):
+        self.values.append(x)
+        self._add(x, 1)
+        if len(self.values) > self.window:
+            self._add(self.values.popleft(), -1)
+        self._updates += 1
+        if self._updates % self.window == 0:
+            self._resum()
+
+    def _add(self, x, sign):
+        if math.isnan(x):
+            self.nans += sign
+        else:
+            self.total += sign * x
+            self.total_sq += sign * x * x
+
+    def _resum(self):
+        valid = [v for v in self.values if not math.isnan(v)]
+        self.total = math.fsum(valid)
+        self.total_sq = math.fsum(v * v for v in valid)
+        self.nans = len(self.values) - len(valid)
+
+    def count(self):
+        return len(self.values) - self.nans
+
+    def sum(self):
+        return self.total if self.count() >= self.min_periods else NAN
+
+    def mean(self):
+        n = self.count()
+        return self.total / n if n >= self.min_periods and n > 0 else NAN
+
+    def std(self):
+        n = self.count()
+        if n < self.min_periods or n == 0:
+            return NAN
+        mean = self.total / n
+        return math.sqrt(max(self.total_sq / n - mean * mean, 0.0))
+
+
+class RollingExtreme:
+    """Rolling max (or min) over a fixed window using a monotonic deque"""
+
+    def __init__(self, window, mode="max"):
+        self.window = window
+        self.is_max = mode == "max"
+        self.items = deque()  # (position, value), values monotonic
+        self.position = 0
+
+    def update(self, x):
+        items = self.items
+        if self.is_max:
+            while items and items[-1][1] <= x:
+                items.pop()
+        else:
+            while items and items[-1][1] >= x:
+                items.pop()
+        items.append((self.position, x))
+        if items[0][0] <= self.position - self.window:
+            items.popleft()
+        self.position += 1
+
+    def current(self):
+        return self.items[0][1] if self.position >= self.window else NAN
+
+
+class WilderSum:
+    """Wilder-smoothed running sum as used by ta's ADXIndicator
+
+    The first value is the plain sum of `window` inputs; afterwards
+    s = s - s / window + x.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.value = 0.0
+        self.count = 0
+
+    def update(self, x):
+        self.count += 1
+        if self.count <= self.window:
+            self.value += x
+        else:
+            self.value = self.value - self.value / self.window + x
+
+    def ready(self):
+        return self.count >= self.window
+
+
+class WilderAverage:
+    """Wilder moving average seeded with a simple mean, as in ta's ATR/ADX"""
+
+    def __init__(self, window):
+        self.window = window
+        self.value = 0.0
+        self.count = 0
+
+    def update(self, x):
+        self.count += 1
+        if self.count < self.window:
+            self.value += x
+        elif self.count == self.window:
+            self.value = (self.value + x) / self.window
+        else:
+            self.value = (self.value * (self.window - 1) + x) / self.window
+
+    def current(self):
+        return self.value if self.count >= self.window else 0.0
+
+
+class RSI:
+    def __init__(self, window):
+        self.up = EMA(1.0 / window, window)
+        self.down = EMA(1.0 / window, window)
+
+    def update(self, diff):
+        # The first bar has no previous close; ta treats its move as zero
+        up = self.up.update(diff if diff > 0 else 0.0)
+        down = self.down.update(-diff if diff < 0 else 0.0)
+        if down == 0:
+            return 100.0
+        return 100 - 100 / (1 + _div(up, down))
+
+
+class StreamingIndicatorEngine:
+    """Stateful indicator set updated in constant time per closed candle
+
+    Produces the same columns as TradingAnalyzer.add_comprehensive_indicators.
+    OBV is cumulative from the first bar the engine has seen, so it differs
+    from a fresh recomputation over a sliding window by a constant offset.
+    """
+
+    def __init__(self):
+        self.prev_close = NAN
+        self.prev_high = NAN
+        self.prev_low = NAN
+        self.bars = 0
+        self.last_time = None
+
+        self.rsi_14 = RSI(14)
+        self.rsi_21 = RSI(21)
+        self.stoch_high = RollingExtreme(14, "max")
+        self.stoch_low = RollingExtreme(14, "min")
+        self.stoch_d = RollingMean(3)
+
+        self.ema_9 = EMA.from_span(9)
+        self.ema_21 = EMA.from_span(21)
+        self.ema_50 = EMA.from_span(50)
+        self.close_20 = RollingMean(20)
+        self.close_50 = RollingMean(50)
+        self.ema_12 = EMA.from_span(12)
+        self.ema_26 = EMA.from_span(26)
+        self.macd_signal = EMA.from_span(9)
+
+        self.adx_window = 14
+        self.trs = WilderSum(14)
+        self.dip = WilderSum(14)
+        self.din = WilderSum(14)
+        self.adx = WilderAverage(14)
+
+        self.atr = WilderAverage(14)
+        self.kc_mid = RollingMean(20)
+        self.kc_high = RollingMean(20, min_periods=0)
+        self.kc_low = RollingMean(20, min_periods=0)
+
+        self.volume_20 = RollingMean(20)
+        self.obv = 0.0
+        self.mfv_20 = RollingMean(20)
+        self.closes = deque(maxlen=15)
+
+    def update(self, open_, high, low, close, volume, time=None):
+        """Consume one closed candle and return the indicator values for it"""
+        row = {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}
+        prev_close = self.prev_close
+        first = self.bars == 0
+
+        # Momentum
+        diff = 0.0 if first else close - prev_close
+        row["RSI_14"] = self.rsi_14.update(diff)
+        row["RSI_21"] = self.rsi_21.update(diff)
+        self.stoch_high.update(high)
+        self.stoch_low.update(low)
+        highest = self.stoch_high.current()
+        lowest = self.stoch_low.current()
+        row["Stoch_K"] = 100 * _div(close - lowest, highest - lowest)
+        self.stoch_d.update(row["Stoch_K"])
+        row["Stoch_D"] = self.stoch_d.mean()
+        row["Williams_R"] = -100 * _div(highest - close, highest - lowest)
+
+        # Trend
+        row["EMA_9"] = self.ema_9.update(close)
+        row["EMA_21"] = self.ema_21.update(close)
+        row["EMA_50"] = self.ema_50.update(close)
+        self.close_20.update(close)
+        self.close_50.update(close)
+        row["SMA_20"] = self.close_20.mean()
+        row["SMA_50"] = self.close_50.mean()
+        macd = self.ema_12.update(close) - self.ema_26.update(close)
+        row["MACD"] = macd
+        row["MACD_Signal"] = self.macd_signal.update(macd)
+        row["MACD_Histogram"] = macd - row["MACD_Signal"]
+
+        # ADX / DI (ta starts the directional sums on the second bar)
+        row["ADX"], row["DI_Plus"], row["DI_Minus"] = self._update_adx(high, low, prev_close, first)
+
+        # Volatility
+        bb_mid = self.close_20.mean()
+        bb_std = self.close_20.std()
+        row["BB_Upper"] = bb_mid + 2 * bb_std
+        row["BB_Middle"] = bb_mid
+        row["BB_Lower"] = bb_mid - 2 * bb_std
+        row["BB_Width"] = _div(row["BB_Upper"] - row["BB_Lower"], bb_mid) * 100
+        row["BB_Position"] = _div(close - row["BB_Lower"], row["BB_Upper"] - row["BB_Lower"])
+
+        self.kc_mid.update((high + low + close) / 3.0)
+        self.kc_high.update(((4 * high) - (2 * low) + close) / 3.0)
+        self.kc_low.update(((-2 * high) + (4 * low) + close) / 3.0)
+        row["KC_Upper"] = self.kc_high.mean()
+        row["KC_Lower"] = self.kc_low.mean()
+        row["KC_Middle"] = self.kc_mid.mean()
+
+        if first:
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        self.atr.update(true_range)
+        row["ATR"] = self.atr.current()
+        row["ATR_Percent"] = _div(row["ATR"], close) * 100
+
+        # Volume
+        self.volume_20.update(volume)
+        row["Volume_SMA"] = self.volume_20.mean()
+        row["Volume_Ratio"] = _div(volume, row["Volume_SMA"])
+        self.obv += -volume if close < prev_close else volume
+        row["OBV"] = self.obv
+        mfm = _div((close - low) - (high - close), high - low)
+        self.mfv_20.update((0.0 if math.isnan(mfm) else mfm) * volume)
+        row["CMF"] = _div(self.mfv_20.sum(), self.volume_20.sum())
+
+        # Price action
+        row["Body_Size"] = abs(close - open_) / open_ * 100
+        row["Upper_Wick"] = (high - max(open_, close)) / open_ * 100
+        row["Lower_Wick"] = (min(open_, close) - low) / open_ * 100
+        row["Total_Range"] = (high - low) / open_ * 100
+        pivot = (high + low + close) / 3
+        row["Pivot"] = pivot
+        row["R1"] = 2 * pivot - low
+        row["S1"] = 2 * pivot - high
+
+        self.closes.append(close)
+        row["ROC_5"] = self._roc(5)
+        row["ROC_14"] = self._roc(14)
+
+        self.prev_close, self.prev_high, self.prev_low = close, high, low
+        self.bars += 1
+        self.last_time = time
+        return row
+
+    def preview(self, open_, high, low, close, volume, time=None):
+        """Indicator values for a still-forming candle, without committing it"""
+        return _clone(self).update(open_, high, low, close, volume, time)
+
+    def _update_adx(self, high, low, prev_close, first):
+        if first:
+            return 0.0, 0.0, 0.0
+        window = self.adx_window
+        up = high - self.prev_high
+        down = self.prev_low - low
+        self.trs.update(max(high, prev_close) - min(low, prev_close))
+        self.dip.update(up if up > down and up > 0 else 0.0)
+        self.din.update(down if down > up and down > 0 else 0.0)
+        if not self.trs.ready():
+            return 0.0, 0.0, 0.0
+
+        trs = self.trs.value
+        di_plus = 100 * self.dip.value / trs if trs != 0 else 0.0
+        di_minus = 100 * self.din.value / trs if trs != 0 else 0.0
+        total = di_plus + di_minus
+        dx = 100 * abs((di_plus - di_minus) / total) if total != 0 else 0.0
+        self.adx.update(dx)
+        if self.trs.count == window:
+            # ta leaves DI at zero on the bar where the sums are seeded
+            di_plus = di_minus = 0.0
+        return self.adx.current(), di_plus, di_minus
+
+    def _roc(self, window):
+        if len(self.closes) <= window:
+            return NAN
+        return (self.closes[-1] / self.closes[-1 - window] - 1) * 100
+
+
+def _is_complete(row):
+    return not any(math.isnan(value) for value in row.values())
+
+
+class StreamingIndicatorStore:
+    """Streaming indicator engines kept per (symbol, interval)
+
+    Frames may slide (a rolling window drops its oldest bar as a new one
+    closes); the engine keeps its state, and OBV is rebased to the frame's
+    first bar so it matches a recomputation over the same frame.
+    """
+
+    def __init__(self, max_series=512):
+        self.max_series = max_series
+        self._lock = threading.Lock()
+        self._engines = OrderedDict()  # (symbol, interval) -> (lock, engine, deque of (bar time, OBV after it))
+        self.rebuilds = 0
+        self.bars_applied = 0
+
+    def latest(self, symbol, interval, df):
+        """Return the latest indicator row for an OHLCV frame, or None if still warming up
+
+        All rows but the last are treated as closed candles; only those newer
+        than the engine's state are applied. The last row is the still-forming
+        candle and is previewed without being committed.
+        """
+        if df.empty:
+            return None
+        lock, engine, obv_marks = self._engine_for(symbol.upper(), interval)
+        with lock:
+            closed = df.iloc[:-1]
+            if engine.last_time is None or engine.last_time not in closed.index:
+                engine = StreamingIndicatorEngine()
+                obv_marks = deque()
+                self._replace(symbol.upper(), interval, lock, engine, obv_marks)
+                self.rebuilds += 1
+                new_bars = closed
+            else:
+                new_bars = closed[closed.index > engine.last_time]
+            for bar in new_bars.itertuples():
+                engine.update(bar.Open, bar.High, bar.Low, bar.Close, bar.Volume, bar.Index)
+                obv_marks.append((bar.Index, engine.obv))
+            self.bars_applied += len(new_bars)
+
+            forming = df.iloc[-1]
+            row = engine.preview(forming['Open'], forming['High'], forming['Low'],
+                                 forming['Close'], forming['Volume'], df.index[-1])
+            # Bars evicted from the front of the frame: OBV restarts at its first bar, counted as a rise
+            while obv_marks and obv_marks[0][0] < df.index[0]:
+                obv_marks.popleft()
+            if obv_marks and obv_marks[0][0] == df.index[0]:
+                row["OBV"] -= obv_marks[0][1] - df['Volume'].iloc[0]
+        if not _is_complete(row):
+            return None
+        return pd.Series(row, name=df.index[-1])
+
+    def reset(self):
+        with self._lock:
+            self._engines.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"series": len(self._engines), "rebuilds": self.rebuilds, "bars_applied": self.bars_applied}
+
+    def _engine_for(self, symbol, interval):
+        key = (symbol, interval)
+        with self._lock:
+            entry = self._engines.get(key)
+            if entry is None:
+                entry = (threading.Lock(), StreamingIndicatorEngine(), deque())
+                self._engines[key] = entry
+                while len(self._engines) > self.max_series:
+                    self._engines.popitem(last=False)
+            else:
+                self._engines.move_to_end(key)
+            return entry
+
+    def _replace(self, symbol, interval, lock, engine, obv_marks):
+        with self._lock:
+            self._engines[(symbol, interval)] = (lock, engine, obv_marks)
+
+
+# Process-wide engines shared by analyzers running in streaming mode
+shared_indicator_store = StreamingIndicatorStore()
@@ -0,0 +1,295 @@
+import bisect
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from market_http import shared_http_client, BUDGETED_RETRY_STATUSES
+from rate_limiter import shared_weight_budget, PRIORITY_BACKGROUND
+
+COINGECKO_COINS_URL = "https://api.coingecko.com/api/v3/coins/list"
+COINGECKO_MARKETS_URL = "https://api.coingecko.com/api/v3/coins/markets?vs_currency=usd&order=market_cap_desc&per_page=250&page=1"
+BINANCE_EXCHANGE_INFO_URL = "https://api.binance.com/api/v3/exchangeInfo"
+EXCHANGE_INFO_WEIGHT = 20
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".symbol_index.json")
+
+# Quote assets stripped from pairs that are not in the exchange list, longest first
+QUOTE_ASSETS = ("FDUSD", "USDT", "USDC", "BUSD", "TUSD", "EUR", "TRY", "BTC", "ETH", "BNB")
+
+# Tickers many coins share resolve to these ids; also what is known before the first download
+PREFERRED_IDS = {
+    "BTC": "bitcoin",
+    "ETH": "ethereum",
+    "ADA": "cardano",
+    "SOL": "solana",
+    "DOT": "polkadot",
+    "LINK": "chainlink",
+    "MATIC": "polygon",
+    "AVAX": "avalanche-2",
+    "ATOM": "cosmos",
+    "LTC": "litecoin",
+}
+
+
+def guess_coingecko_id(symbol):
+    """Best guess without an index: the preferred id for the pair's base asset, else its lowercased base"""
+    if symbol.islower():
+        return symbol  # Already a CoinGecko id
+    base = split_pair(symbol.upper())[0]
+    return PREFERRED_IDS.get(base, base.lower())
+
+
+def split_pair(pair):
+    """(base, quote) of a trading pair by its quote suffix; quote is None if unrecognised"""
+    for quote in QUOTE_ASSETS:
+        if pair.endswith(quote) and len(pair) > len(quote):
+            return pair[:-len(quote)], quote
+    return pair, None
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SymbolIndex:
+    """Maps Binance pairs, tickers, coin names and CoinGecko ids to each other
+
+    Built from the CoinGecko coin list ({id, symbol, name} entries), Binance
+    exchangeInfo symbols ({symbol, baseAsset, quoteAsset}) and optional
+    market-cap ranks, which decide between coins sharing a ticker. Lookups are
+    exact (dict), prefix (bisect over sorted keys) or fuzzy (trigram postings
+    scored with the Dice coefficient), each well under a millisecond.
+    """
+
+    def __init__(self, coins=(), pairs=(), ranks=None, built_at=None):
+        self.built_at = time.time() if built_at is None else built_at
+        self.ranks = dict(ranks or {})
+        self.coins = {}  # id -> (ticker, name)
+        for coin in coins:
+            self.coins[coin["id"]] = (coin["symbol"].upper(), coin["name"])
+        for ticker, coin_id in PREFERRED_IDS.items():
+            self.coins.setdefault(coin_id, (ticker, coin_id))
+        self.pairs = {}  # pair -> (base, quote)
+        for pair in pairs:
+            self.pairs[pair["symbol"]] = (pair["baseAsset"], pair["quoteAsset"])
+
+        by_ticker = {}
+        by_name = {}
+        for coin_id, (ticker, name) in self.coins.items():
+            by_ticker.setdefault(ticker, []).append(coin_id)
+            by_name.setdefault(name.lower(), []).append(coin_id)
+        self._by_ticker = {ticker: sorted(ids, key=self._rank_key) for ticker, ids in by_ticker.items()}
+        self._by_name = {name: min(ids, key=self._rank_key) for name, ids in by_name.items()}
+
+        # Search keys (ids, lowercased tickers and names), each pointing at its coin
+        keys = {}
+        for coin_id, (ticker, name) in self.coins.items():
+            for key in (coin_id, ticker.lower(), name.lower()):
+                if key not in keys or self._rank_key(coin_id) < self._rank_key(keys[key]):
+                    keys[key] = coin_id
+        self._keys = sorted(keys)
+        self._key_ids = [keys[key] for key in self._keys]
+
+        postings = {}
+        sizes = np.empty(len(self._keys), dtype=np.int32)
+        for i, key in enumerate(self._keys):
+            grams = _trigrams(key)
+            sizes[i] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self._sizes = sizes
+
+    def _rank_key(self, coin_id):
+        ticker = self.coins[coin_id][0]
+        # Preferred, then by market cap, then the plainest id (bridged/wrapped variants carry suffixes)
+        return (PREFERRED_IDS.get(ticker) != coin_id, self.ranks.get(coin_id, float("inf")),
+                coin_id.count("-"), len(coin_id), coin_id)
+
+    def __len__(self):
+        return len(self.coins)
+
+    def coingecko_id(self, query):
+        """CoinGecko id for a Binance pair, CoinGecko id, ticker or coin name; None if unknown"""
+        text = query.strip()
+        upper = text.upper()
+        lower = text.lower()
+        if upper in self.pairs:
+            base = self.pairs[upper][0]
+            if base in self._by_ticker:
+                return self._by_ticker[base][0]
+        if lower in self.coins:
+            return lower
+        if upper in self._by_ticker:
+            return self._by_ticker[upper][0]
+        base, quote = split_pair(upper)
+        if quote is not None and base in self._by_ticker:
+            return self._by_ticker[base][0]
+        return self._by_name.get(lower)
+
+    def binance_pair(self, coin_id, quote="USDT"):
+        """Binance pair trading `coin_id` against `quote`, or None"""
+        coin = self.coins.get(coin_id)
+        if coin is None or self._by_ticker[coin[0]][0] != coin_id:
+            return None  # Another coin owns this ticker on exchanges
+        pair = coin[0] + quote
+        if self.pairs and pair not in self.pairs:
+            return None
+        return pair
+
+    def prefix(self, text, limit=10):
+        """Coin ids with an id, ticker or name starting with `text`, exact match first"""
+        text = text.strip().lower()
+        start = bisect.bisect_left(self._keys, text)
+        results = []
+        for i in range(start, len(self._keys)):
+            if not self._keys[i].startswith(text) or len(results) >= limit:
+                break
+            if self._key_ids[i] not in results:
+                results.append(self._key_ids[i])
+        return results
+
+    def fuzzy(self, text, limit=5, min_score=0.3):
+        """[(coin id, score)] of the keys most similar to `text` by trigram overlap"""
+        query = _trigrams(text.strip().lower())
+        postings = [self._postings[gram] for gram in query if gram in self._postings]
+        if not postings:
+            return []
+        shared = np.bincount(np.concatenate(postings), minlength=len(self._keys))
+        scores = 2.0 * shared / (self._sizes + len(query))
+        # Sorting only the keys above min_score is much cheaper than partitioning every key
+        candidates = np.flatnonzero(scores >= min_score)
+        results = []
+        seen = set()
+        for i in candidates[np.argsort(-scores[candidates], kind="stable")]:
+            if len(results) >= limit:
+                break
+            coin_id = self._key_ids[i]
+            if coin_id not in seen:
+                seen.add(coin_id)
+                results.append((coin_id, round(float(scores[i]), 3)))
+        return results
+
+    def resolve(self, query):
+        """Best CoinGecko id for free text: exact, then unique prefix, then closest fuzzy match"""
+        coin_id = self.coingecko_id(query)
+        if coin_id is not None:
+            return coin_id
+        matches = self.prefix(query, limit=2)
+        if len(matches) == 1:
+            return matches[0]
+        fuzzy = self.fuzzy(query, limit=1)
+        return fuzzy[0][0] if fuzzy else None
+
+    def to_payload(self):
+        return {
+            "built_at": self.built_at,
+            "coins": [{"id": coin_id, "symbol": ticker.lower(), "name": name}
+                      for coin_id, (ticker, name) in self.coins.items()],
+            "pairs": [{"symbol": pair, "baseAsset": base, "quoteAsset": quote}
+                      for pair, (base, quote) in self.pairs.items()],
+            "ranks": self.ranks,
+        }
+
+    def save(self, path):
+        """Write the source lists atomically (the lookup tables are rebuilt on load)"""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.to_payload(), f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            payload = json.load(f)
+        return cls(payload["coins"], payload["pairs"], payload.get("ranks"), payload.get("built_at"))
+
+
+class SymbolIndexLoader:
+    """Serves the symbol index from disk, rebuilding it from the APIs in the background when stale
+
+    Until the first download completes only PREFERRED_IDS are known. A
+    failed refresh keeps the previous index in service.
+    """
+
+    def __init__(self, path=None, max_age=24 * 3600, retry_seconds=600, http_client=shared_http_client,
+                 weight_budget=shared_weight_budget, auto_refresh=True):
+        self.path = path or os.environ.get("SYMBOL_INDEX_PATH") or DEFAULT_INDEX_PATH
+        self.max_age = max_age
+        self.retry_seconds = retry_seconds
+        self.http = http_client
+        self.weight_budget = weight_budget
+        self.auto_refresh = auto_refresh
+        self._lock = threading.Lock()
+        self._index = None
+        self._refreshing = None
+        self._last_attempt = None
+
+    def get(self):
+        index = self._index
+        if index is None:
+            with self._lock:
+                if self._index is None:
+                    try:
+                        self._index = SymbolIndex.load(self.path)
+                    except (OSError, ValueError, KeyError):
+                        self._index = SymbolIndex(built_at=0)
+                index = self._index
+        if self.auto_refresh and time.time() - index.built_at > self.max_age:
+            self.refresh_in_background()
+        return index
+
+    def refresh_in_background(self):
+        with self._lock:
+            if self._refreshing is not None and self._refreshing.is_alive():
+                return self._refreshing
+            if self._last_attempt is not None and time.time() - self._last_attempt < self.retry_seconds:
+                return None
+            self._last_attempt = time.time()
+            self._refreshing = threading.Thread(target=self.refresh, name="symbol-index", daemon=True)
+            self._refreshing.start()
+            return self._refreshing
+
+    def refresh(self):
+        """Download the coin and pair lists, rebuild, persist and swap in the index; None on failure"""
+        try:
+            coins = self._get_json(COINGECKO_COINS_URL)
+            markets = self._get_json(COINGECKO_MARKETS_URL)
+            index = SymbolIndex(coins, self._binance_pairs(), {coin["id"]: coin["market_cap_rank"] for coin in markets
+                                               if coin.get("market_cap_rank")})
+            index.save(self.path)
+        except Exception as e:
+            print(f"Symbol index refresh failed, keeping the current index: {e}")
+            return None
+        self._index = index
+        return index
+
+    def _binance_pairs(self):
+        # Binance may be unreachable (geo-blocks) while CoinGecko works; pairs then split by quote suffix
+        try:
+            if self.weight_budget is not None:
+                self.weight_budget.acquire(EXCHANGE_INFO_WEIGHT, PRIORITY_BACKGROUND, timeout=60)
+            exchange_info = self._get_json(BINANCE_EXCHANGE_INFO_URL, budgeted=True)
+        except Exception as e:
+            print(f"Binance exchange info unavailable, indexing CoinGecko coins only: {e}")
+            return []
+        return [pair for pair in exchange_info["symbols"] if pair.get("status", "TRADING") == "TRADING"]
+
+    def _get_json(self, url, budgeted=False):
+        if not budgeted or self.weight_budget is None:
+            response = self.http.get(url, timeout=30)
+        else:
+            # The budget, not the client, handles a 429 on weighted Binance calls
+            response = self.http.get(url, timeout=30, retry_statuses=BUDGETED_RETRY_STATUSES)
+            self.weight_budget.observe_response(response)
+        if response.status_code != 200:
+            raise Exception(f"{url} returned {response.status_code}")
+        return response.json()
+
+
+# Process-wide index; set SYMBOL_INDEX_PATH to relocate its file
+shared_symbol_index = SymbolIndexLoader()
@@ -0,0 +1,242 @@
+"""The analyze_*_confluence if-chains as they were before the rules moved to confluence_rules.json
+
+Kept verbatim (as functions of the indicator row) as the reference the
+compiled rules are checked against.
+"""
+
+
+def analyze_momentum_confluence(row):
+    """Analyze momentum indicators for confluences"""
+    confluences = {'bullish': [], 'bearish': [], 'neutral': []}
+
+    # RSI Analysis
+    if row['RSI_14'] < 30:
+        confluences['bullish'].append({
+            'indicator': 'RSI (14)',
+            'condition': f"Oversold at {row['RSI_14']:.1f}",
+            'implication': "Potential bounce or reversal setup. Watch for bullish divergence or break above 30.",
+            'strength': 'Medium',
+            'timeframe': 'Short-term'
+        })
+    elif row['RSI_14'] > 70:
+        confluences['bearish'].append({
+            'indicator': 'RSI (14)',
+            'condition': f"Overbought at {row['RSI_14']:.1f}",
+            'implication': "Potential pullback or distribution. Watch for bearish divergence or break below 70.",
+            'strength': 'Medium',
+            'timeframe': 'Short-term'
+        })
+    elif 45 <= row['RSI_14'] <= 55:
+        confluences['neutral'].append({
+            'indicator': 'RSI (14)',
+            'condition': f"Neutral at {row['RSI_14']:.1f}",
+            'implication': "Balanced momentum. Look for directional break above 55 or below 45.",
+            'strength': 'Low',
+            'timeframe': 'Short-term'
+        })
+
+    # Stochastic Analysis
+    if row['Stoch_K'] < 20 and row['Stoch_D'] < 20:
+        confluences['bullish'].append({
+            'indicator': 'Stochastic',
+            'condition': f"Both %K ({row['Stoch_K']:.1f}) and %D ({row['Stoch_D']:.1f}) oversold",
+            'implication': "Strong oversold condition. Potential reversal when %K crosses above %D.",
+            'strength': 'Strong' if row['Stoch_K'] > row['Stoch_D'] else 'Medium',
+            'timeframe': 'Short-term'
+        })
+    elif row['Stoch_K'] > 80 and row['Stoch_D'] > 80:
+        confluences['bearish'].append({
+            'indicator': 'Stochastic',
+            'condition': f"Both %K ({row['Stoch_K']:.1f}) and %D ({row['Stoch_D']:.1f}) overbought",
+            'implication': "Strong overbought condition. Potential reversal when %K crosses below %D.",
+            'strength': 'Strong' if row['Stoch_K'] < row['Stoch_D'] else 'Medium',
+            'timeframe': 'Short-term'
+        })
+
+    # Williams %R Analysis
+    if row['Williams_R'] < -80:
+        confluences['bullish'].append({
+            'indicator': 'Williams %R',
+            'condition': f"Oversold at {row['Williams_R']:.1f}",
+            'implication': "Potential buying opportunity. Watch for move above -80 for confirmation.",
+            'strength': 'Medium',
+            'timeframe': 'Short-term'
+        })
+    elif row['Williams_R'] > -20:
+        confluences['bearish'].append({
+            'indicator': 'Williams %R',
+            'condition': f"Overbought at {row['Williams_R']:.1f}",
+            'implication': "Potential selling pressure. Watch for move below -20 for confirmation.",
+            'strength': 'Medium',
+            'timeframe': 'Short-term'
+        })
+
+    return confluences
+
+
+def analyze_trend_confluence(row):
+    """Analyze trend indicators for confluences"""
+    confluences = {'bullish': [], 'bearish': [], 'neutral': []}
+
+    # EMA Alignment
+    ema_alignment = "bullish" if row['EMA_9'] > row['EMA_21'] > row['EMA_50'] else "bearish" if row['EMA_9'] < row['EMA_21'] < row['EMA_50'] else "mixed"
+
+    if ema_alignment == "bullish":
+        confluences['bullish'].append({
+            'indicator': 'EMA Alignment',
+            'condition': "EMA 9 > EMA 21 > EMA 50",
+            'implication': "Strong bullish trend structure. Expect continuation with pullbacks to EMAs as support.",
+            'strength': 'Strong',
+            'timeframe': 'Medium-term'
+        })
+    elif ema_alignment == "bearish":
+        confluences['bearish'].append({
+            'indicator': 'EMA Alignment',
+            'condition': "EMA 9 < EMA 21 < EMA 50",
+            'implication': "Strong bearish trend structure. Expect continuation with rallies to EMAs as resistance.",
+            'strength': 'Strong',
+            'timeframe': 'Medium-term'
+        })
+
+    # Price vs EMAs
+    if row['Close'] > row['EMA_21']:
+        confluences['bullish'].append({
+            'indicator': 'Price vs EMA 21',
+            'condition': f"Price {((row['Close']/row['EMA_21']-1)*100):+.2f}% above EMA 21",
+            'implication': "Bullish bias maintained. EMA 21 likely to act as dynamic support.",
+            'strength': 'Medium',
+            'timeframe': 'Short to Medium-term'
+        })
+    else:
+        confluences['bearish'].append({
+            'indicator': 'Price vs EMA 21',
+            'condition': f"Price {((row['Close']/row['EMA_21']-1)*100):+.2f}% below EMA 21",
+            'implication': "Bearish bias maintained. EMA 21 likely to act as dynamic resistance.",
+            'strength': 'Medium',
+            'timeframe': 'Short to Medium-term'
+        })
+
+    # MACD Analysis
+    if row['MACD'] > row['MACD_Signal'] and row['MACD_Histogram'] > 0:
+        confluences['bullish'].append({
+            'indicator': 'MACD',
+            'condition': "MACD above signal line with positive histogram",
+            'implication': "Bullish momentum building. Watch for histogram expansion for stronger moves.",
+            'strength': 'Strong' if row['MACD_Histogram'] > 0 else 'Medium',
+            'timeframe': 'Medium-term'
+        })
+    elif row['MACD'] < row['MACD_Signal'] and row['MACD_Histogram'] < 0:
+        confluences['bearish'].append({
+            'indicator': 'MACD',
+            'condition': "MACD below signal line with negative histogram",
+            'implication': "Bearish momentum building. Watch for histogram expansion for stronger moves.",
+            'strength': 'Strong' if row['MACD_Histogram'] < 0 else 'Medium',
+            'timeframe': 'Medium-term'
+        })
+
+    # ADX Trend Strength
+    if row['ADX'] > 25:
+        trend_direction = "bullish" if row['DI_Plus'] > row['DI_Minus'] else "bearish"
+        confluences[trend_direction].append({
+            'indicator': 'ADX Trend Strength',
+            'condition': f"Strong trending market (ADX: {row['ADX']:.1f})",
+            'implication': f"Strong {trend_direction} trend in place. Expect trend continuation with minor pullbacks.",
+            'strength': 'Strong' if row['ADX'] > 40 else 'Medium',
+            'timeframe': 'Medium to Long-term'
+        })
+    elif row['ADX'] < 20:
+        confluences['neutral'].append({
+            'indicator': 'ADX Trend Strength',
+            'condition': f"Weak trending market (ADX: {row['ADX']:.1f})",
+            'implication': "Market in consolidation/ranging phase. Look for breakout setups.",
+            'strength': 'Medium',
+            'timeframe': 'All timeframes'
+        })
+
+    return confluences
+
+
+def analyze_volatility_confluence(row):
+    """Analyze volatility indicators for confluences"""
+    confluences = {'bullish': [], 'bearish': [], 'neutral': []}
+
+    # Bollinger Bands Analysis
+    if row['BB_Position'] < 0.2:
+        confluences['bullish'].append({
+            'indicator': 'Bollinger Bands',
+            'condition': f"Price near lower band (Position: {row['BB_Position']:.2f})",
+            'implication': "Potential oversold bounce. Watch for move back toward middle band.",
+            'strength': 'Medium',
+            'timeframe': 'Short-term'
+        })
+    elif row['BB_Position'] > 0.8:
+        confluences['bearish'].append({
+            'indicator': 'Bollinger Bands',
+            'condition': f"Price near upper band (Position: {row['BB_Position']:.2f})",
+            'implication': "Potential overbought pullback. Watch for move back toward middle band.",
+            'strength': 'Medium',
+            'timeframe': 'Short-term'
+        })
+
+    # ATR Analysis
+    if row['ATR_Percent'] > 5:
+        confluences['neutral'].append({
+            'indicator': 'ATR',
+            'condition': f"High volatility ({row['ATR_Percent']:.2f}%)",
+            'implication': "Elevated volatility suggests increased risk/reward. Use wider stops.",
+            'strength': 'Medium',
+            'timeframe': 'All timeframes'
+        })
+    elif row['ATR_Percent'] < 1:
+        confluences['neutral'].append({
+            'indicator': 'ATR',
+            'condition': f"Low volatility ({row['ATR_Percent']:.2f}%)",
+            'implication': "Low volatility suggests potential for breakout. Watch for expansion.",
+            'strength': 'Medium',
+            'timeframe': 'All timeframes'
+        })
+
+    return confluences
+
+
+def analyze_volume_confluence(row):
+    """Analyze volume indicators for confluences"""
+    confluences = {'bullish': [], 'bearish': [], 'neutral': []}
+
+    # Volume Analysis
+    if row['Volume_Ratio'] > 2:
+        confluences['neutral'].append({
+            'indicator': 'Volume',
+            'condition': f"High volume ({row['Volume_Ratio']:.1f}x average)",
+            'implication': "Strong institutional interest. Confirms price moves.",
+            'strength': 'Strong',
+            'timeframe': 'All timeframes'
+        })
+    elif row['Volume_Ratio'] < 0.5:
+        confluences['neutral'].append({
+            'indicator': 'Volume',
+            'condition': f"Low volume ({row['Volume_Ratio']:.1f}x average)",
+            'implication': "Weak participation. Price moves may lack conviction.",
+            'strength': 'Medium',
+            'timeframe': 'All timeframes'
+        })
+
+    # CMF Analysis
+    if row['CMF'] > 0.2:
+        confluences['bullish'].append({
+            'indicator': 'Chaikin Money Flow',
+            'condition': f"Strong buying pressure (CMF: {row['CMF']:.3f})",
+            'implication': "Money flowing into the asset. Supports bullish bias.",
+            'strength': 'Medium',
+            'timeframe': 'Medium-term'
+        })
+    elif row['CMF'] < -0.2:
+        confluences['bearish'].append({
+            'indicator': 'Chaikin Money Flow',
+            'condition': f"Strong selling pressure (CMF: {row['CMF']:.3f})",
+            'implication': "Money flowing out of the asset. Supports bearish bias.",
+            'strength': 'Medium',
+            'timeframe': 'Medium-term'
+        })
+
+    return confluences
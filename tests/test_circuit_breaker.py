@@ -0,0 +1,76 @@
+import pytest
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, SourceHealth, SourceUnavailable
+from market_http import APIStatusError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def failing(error):
+    def call():
+        raise error
+    return call
+
+
+def health(clock=None):
+    return SourceHealth(min_calls=5, open_seconds=30, clock=clock or FakeClock())
+
+
+def test_invalid_symbol_errors_leave_breaker_closed():
+    source_health = health()
+    for _ in range(20):
+        with pytest.raises(APIStatusError):
+            source_health.call("binance", failing(APIStatusError('API Error 400: {"msg":"Invalid symbol."}', 400)))
+        with pytest.raises(APIStatusError):
+            source_health.call("coingecko", failing(APIStatusError("CoinGecko API Error 404: coin not found", 404)))
+    stats = source_health.stats()
+    assert stats["binance"]["state"] == CLOSED
+    assert stats["coingecko"]["state"] == CLOSED
+    assert stats["binance"]["failures"] == 0
+    assert source_health.call("binance", lambda: "ok") == "ok"
+
+
+@pytest.mark.parametrize("error", [
+    APIStatusError("API Error 503", 503),
+    APIStatusError("API Error 429", 429),
+    APIStatusError("API Error 418", 418),
+    TimeoutError("read timed out"),
+    ConnectionError("connection reset"),
+])
+def test_source_failures_open_breaker(error):
+    source_health = health()
+    for _ in range(5):
+        with pytest.raises(type(error)):
+            source_health.call("binance", failing(error))
+    assert source_health.breakers["binance"].state == OPEN
+    with pytest.raises(SourceUnavailable):
+        source_health.call("binance", lambda: "ok")
+
+
+def test_geo_block_opens_breaker_at_once():
+    source_health = health()
+    with pytest.raises(APIStatusError):
+        source_health.call("binance", failing(APIStatusError("API Error 451", 451)))
+    assert source_health.breakers["binance"].state == OPEN
+
+
+def test_client_error_releases_half_open_probe():
+    clock = FakeClock()
+    source_health = health(clock)
+    for _ in range(5):
+        with pytest.raises(APIStatusError):
+            source_health.call("binance", failing(APIStatusError("API Error 502", 502)))
+    clock.now += 31
+    assert source_health.breakers["binance"].state == HALF_OPEN
+    with pytest.raises(APIStatusError):
+        source_health.call("binance", failing(APIStatusError("API Error 400", 400)))
+    # The probe slot is free again and the breaker neither reopened nor closed
+    assert source_health.breakers["binance"].state == HALF_OPEN
+    assert source_health.call("binance", lambda: "ok") == "ok"
+    assert source_health.breakers["binance"].state == CLOSED
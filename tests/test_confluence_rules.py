@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import baseline_confluence as baseline
+from confluence_rules import CATEGORIES, DEFAULT_RULES_PATH, SIDES, RuleSetLoader
+from vectorized_confluence import ConfluenceHistory, evaluate_row
+
+NAN = float("nan")
+
+# Per column: every threshold the if-chains compare against, values either side of it, and NaN
+COLUMN_VALUES = {
+    "RSI_14": [29.9, 30, 30.1, 44.9, 45, 50, 55, 55.1, 69.9, 70, 70.1, NAN],
+    "Stoch_K": [5, 19.9, 20, 20.1, 50, 79.9, 80, 80.1, 95, NAN],
+    "Stoch_D": [5, 19.9, 20, 20.1, 50, 79.9, 80, 80.1, 95, NAN],
+    "Williams_R": [-95, -80.1, -80, -79.9, -50, -20.1, -20, -19.9, -5, NAN],
+    "ADX": [10, 19.9, 20, 22, 25, 25.1, 39.9, 40, 40.1, NAN],
+    "DI_Plus": [10, 20, 30, NAN],
+    "DI_Minus": [10, 20, 30, NAN],
+    "BB_Position": [-0.1, 0.19, 0.2, 0.21, 0.5, 0.79, 0.8, 0.81, 1.1, NAN],
+    "ATR_Percent": [0.5, 0.99, 1, 1.01, 3, 4.99, 5, 5.01, NAN],
+    "Volume_Ratio": [0.2, 0.49, 0.5, 0.51, 1, 1.99, 2, 2.01, 4, NAN],
+    "CMF": [-0.5, -0.21, -0.2, -0.19, 0, 0.19, 0.2, 0.21, 0.5, NAN],
+}
+
+# Expected (indicator, side, strength, implication) combinations across all branches
+BRANCH_COUNT = 28
+
+
+def synthetic_indicator_rows(n=3000, seed=11):
+    """Indicator rows mixing threshold, boundary and NaN values with random ones"""
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, values in COLUMN_VALUES.items():
+        picked = rng.choice(np.array(values, dtype=float), n)
+        low, high = np.nanmin(values), np.nanmax(values)
+        random = rng.uniform(low, high, n)
+        columns[name] = np.where(rng.random(n) < 0.7, picked, random)
+
+    # Moving averages: strictly ordered either way, ties, or NaN
+    close = rng.uniform(90, 110, n)
+    ema_21 = np.where(rng.random(n) < 0.1, close, rng.uniform(90, 110, n))
+    ema_9 = ema_21 + rng.choice([-1.0, 0.0, 1.0], n) * rng.uniform(0.5, 2, n)
+    ema_50 = ema_21 + rng.choice([-1.0, 0.0, 1.0], n) * rng.uniform(0.5, 2, n)
+    macd = rng.normal(0, 1, n)
+    signal = np.where(rng.random(n) < 0.1, macd, macd + rng.normal(0, 1, n))
+    histogram = np.where(rng.random(n) < 0.1, 0.0, macd - signal)
+    histogram = np.where(rng.random(n) < 0.1, -histogram, histogram)  # Disagrees with MACD vs signal
+    for values in (close, ema_9, ema_21, ema_50, macd, signal, histogram):
+        values[rng.random(n) < 0.03] = NAN
+    columns.update({"Close": close, "EMA_9": ema_9, "EMA_21": ema_21, "EMA_50": ema_50,
+                    "MACD": macd, "MACD_Signal": signal, "MACD_Histogram": histogram})
+    index = pd.date_range("2024-01-01", periods=n, freq="15min", name="Open Time")
+    return pd.DataFrame(columns, index=index)
+
+
+def baseline_confluences(row, category=None):
+    categories = CATEGORIES if category is None else (category,)
+    parts = [getattr(baseline, f"analyze_{name}_confluence")(row) for name in categories]
+    return {side: [entry for part in parts for entry in part[side]] for side in SIDES}
+
+
+def as_text(confluences):
+    # NaN never equals itself, so compare the rendered dicts
+    return repr(confluences)
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return synthetic_indicator_rows()
+
+
+@pytest.fixture(scope="module")
+def history(frame):
+    return ConfluenceHistory(frame)
+
+
+def test_series_reaches_every_branch(frame):
+    seen = set()
+    for _, row in frame.iterrows():
+        for side, entries in baseline_confluences(row).items():
+            seen.update((e["indicator"], side, e["strength"], e["implication"]) for e in entries)
+    assert len(seen) == BRANCH_COUNT
+
+
+@pytest.mark.parametrize("category", CATEGORIES)
+def test_evaluate_row_matches_baseline(frame, category):
+    for _, row in frame.iterrows():
+        assert as_text(evaluate_row(row, category)) == as_text(baseline_confluences(row, category)), row.name
+
+
+def test_evaluate_row_all_categories_matches_baseline(frame):
+    for _, row in frame.iterrows():
+        assert as_text(evaluate_row(row)) == as_text(baseline_confluences(row)), row.name
+
+
+def test_history_matches_baseline(frame, history):
+    for i, (_, row) in enumerate(frame.iterrows()):
+        assert as_text(history.confluences_at(i)) == as_text(baseline_confluences(row)), row.name
+        for category in CATEGORIES:
+            expected = baseline_confluences(row, category)
+            assert as_text(history.confluences_at(i, category)) == as_text(expected), (row.name, category)
+
+
+def test_history_counts_match_baseline(frame, history):
+    signals = history.signals
+    for i, (_, row) in enumerate(frame.iterrows()):
+        expected = baseline_confluences(row)
+        counts = signals.iloc[i]
+        assert (counts["bullish_count"], counts["bearish_count"], counts["neutral_count"]) == tuple(
+            len(expected[side]) for side in SIDES)
+
+
+def test_nan_rows_match_baseline():
+    row = pd.Series({name: NAN for name in list(COLUMN_VALUES) + [
+        "Close", "EMA_9", "EMA_21", "EMA_50", "MACD", "MACD_Signal", "MACD_Histogram"]})
+    expected = baseline_confluences(row)
+    # Only the price-vs-EMA else branch fires on an all-NaN row
+    assert [entry["indicator"] for entry in expected["bearish"]] == ["Price vs EMA 21"]
+    assert as_text(evaluate_row(row)) == as_text(expected)
+    assert as_text(ConfluenceHistory(row.to_frame().T).confluences_at(0)) == as_text(expected)
+
+
+def test_loader_checks_the_file_at_most_once_per_interval(tmp_path):
+    path = tmp_path / "rules.json"
+    with open(DEFAULT_RULES_PATH) as f:
+        path.write_text(f.read())
+    now = [100.0]
+    loader = RuleSetLoader(str(path), check_interval=1.0, clock=lambda: now[0])
+    first = loader.get()
+
+    path.write_text(path.read_text() + "\n")
+    now[0] += 0.5
+    assert loader.get() is first  # Not stat'ed again yet
+    now[0] += 0.5
+    reloaded = loader.get()
+    assert reloaded is not first
+    assert reloaded.version != first.version
+    now[0] += 0.1
+    assert loader.get() is reloaded
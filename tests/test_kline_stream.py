@@ -0,0 +1,203 @@
+import io
+import time
+
+import numpy as np
+import pytest
+
+from kline_stream import KlineStream, ReplayServer, _record, kline_message
+from market_http import APIStatusError
+
+INTERVAL = "15m"
+SEEDED = 300  # Bars served by the REST seed; the last one is still forming
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Seed:
+    """REST stand-in serving the first `available` bars, or `reseed_available` to reseeds
+
+    Reseeds (calls after the first) raise while `failing` is set.
+    """
+
+    def __init__(self, rows, available=SEEDED, reseed_available=None):
+        self.rows = rows
+        self.available = available
+        self.reseed_available = available if reseed_available is None else reseed_available
+        self.failing = False
+        self.calls = 0
+
+    def __call__(self, symbol, interval, limit):
+        self.calls += 1
+        if self.calls == 1:
+            return self.rows[:self.available][-limit:]
+        if self.failing:
+            raise APIStatusError("API Error 503: Service Unavailable", 503)
+        return self.rows[:self.reseed_available][-limit:]
+
+
+def analyze(symbol, values):
+    return {"symbol": symbol, "close": values["Close"], "confluences": {"bullish": [], "bearish": []}}
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out waiting for the stream")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def rows(bars):
+    return np.column_stack([bars.index.as_unit("ms").asi8, bars[["Open", "High", "Low", "Close", "Volume"]].to_numpy()])
+
+
+@pytest.fixture
+def streams():
+    """Starts a ReplayServer and a KlineStream subscribed to it; stops both afterwards"""
+    started = []
+
+    def start(seed, messages, close_after=False, **kwargs):
+        server = ReplayServer(messages, close_after=close_after).start()
+        stream = KlineStream(seed, analyze, url=server.url, reconnect_delay=0.05, **kwargs)
+        stream.subscribe("BTCUSDT", INTERVAL)
+        stream.start()
+        started.append((server, stream))
+        wait_for(lambda: stream.messages >= len(messages) and stream.connected.is_set())
+        return server, stream
+
+    yield start
+    for server, stream in started:
+        stream.stop()
+        server.stop()
+
+
+def message(rows, i, closed, close=None):
+    row = rows[i].copy()
+    if close is not None:
+        row[4] = close
+    return kline_message("BTCUSDT", INTERVAL, row, closed)
+
+
+def seeded_stream(rows, count):
+    """What a fresh subscription to the first `count` bars reports"""
+    stream = KlineStream(Seed(rows, available=count), analyze)
+    stream.subscribe("BTCUSDT", INTERVAL)
+    stream.connected.set()
+    return stream
+
+
+def test_seed_serves_latest_analysis(rows, streams):
+    seed = Seed(rows)
+    _, stream = streams(seed, [])
+    assert seed.calls == 1
+    assert len(stream.frame("BTCUSDT", INTERVAL)) == SEEDED
+    assert stream.analysis("BTCUSDT", INTERVAL)["close"] == rows[SEEDED - 1, 4]
+    assert stream.stats()["messages"] == 0
+
+
+def test_forming_and_closed_events_match_a_fresh_seed(rows, streams):
+    forming = SEEDED - 1
+    messages = [
+        message(rows, forming, False, close=rows[forming, 1]),
+        message(rows, forming, True),
+        message(rows, forming + 1, True),
+        message(rows, forming + 2, False),
+    ]
+    _, stream = streams(Seed(rows), messages)
+    frame = stream.frame("BTCUSDT", INTERVAL)
+    assert len(frame) == SEEDED + 2
+    assert frame["Close"].iloc[-1] == rows[forming + 2, 4]
+    assert stream.stats()["reseeds"] == 0
+
+    expected = seeded_stream(rows, SEEDED + 2).latest_row("BTCUSDT", INTERVAL)
+    actual = stream.latest_row("BTCUSDT", INTERVAL)
+    assert actual.keys() == expected.keys()
+    for column, value in expected.items():
+        assert actual[column] == pytest.approx(value, rel=1e-9, nan_ok=True), column
+
+
+def test_sequence_gap_reseeds_from_rest(rows, streams):
+    seed = Seed(rows, reseed_available=SEEDED + 5)
+    # Bars SEEDED..SEEDED+2 were missed
+    _, stream = streams(seed, [message(rows, SEEDED + 3, False)])
+    wait_for(lambda: stream.stats()["reseeds"] == 1)
+    assert seed.calls == 2
+    assert len(stream.frame("BTCUSDT", INTERVAL)) == SEEDED + 5
+    assert stream.analysis("BTCUSDT", INTERVAL)["close"] == rows[SEEDED + 4, 4]
+
+
+def test_failed_reseed_marks_series_stale_and_retries(rows, streams):
+    clock = FakeClock()
+    seed = Seed(rows, reseed_available=SEEDED + 4)
+    seed.failing = True
+    gap = [message(rows, SEEDED + 3, False), message(rows, SEEDED + 3, False)]
+    _, stream = streams(seed, gap, reseed_retry=5.0, clock=clock)
+    # The first gap fails to reseed; the second arrives before the retry is due
+    assert seed.calls == 2
+    assert stream._thread.is_alive()
+    assert stream.connected.is_set()
+    assert stream.stats()["stale"] == 1
+    assert stream.stats()["errors"] == 1
+    assert stream.analysis("BTCUSDT", INTERVAL) is None
+    assert stream.latest_row("BTCUSDT", INTERVAL) is None
+
+    seed.failing = False
+    clock.now += 5
+    stream.handle_message(gap[0])
+    assert seed.calls == 3
+    assert stream.stats()["stale"] == 0
+    assert stream.stats()["reseeds"] == 1
+    assert stream.analysis("BTCUSDT", INTERVAL)["close"] == rows[SEEDED + 3, 4]
+
+
+def test_reconnects_after_server_drops(rows, streams):
+    messages = [message(rows, SEEDED - 1, True), message(rows, SEEDED, False)]
+    server, stream = streams(Seed(rows), messages, close_after=True)
+    wait_for(lambda: server.connections >= 2 and stream.messages >= 2 * len(messages))
+    stats = stream.stats()
+    assert stats["reconnects"] >= 1
+    # Replayed events are duplicates of what the buffer already holds, not gaps
+    assert stats["reseeds"] == 0
+    assert len(stream.frame("BTCUSDT", INTERVAL)) == SEEDED + 1
+
+
+def test_staleness_reporting(rows, streams):
+    clock = FakeClock()
+    _, stream = streams(Seed(rows), [message(rows, SEEDED - 1, False)], stale_grace=30.0, clock=clock)
+    assert stream.analysis("BTCUSDT", INTERVAL) is not None
+
+    clock.now += 15 * 60 + 29
+    assert stream.analysis("BTCUSDT", INTERVAL) is not None
+    clock.now += 2
+    assert stream.analysis("BTCUSDT", INTERVAL) is None
+    assert stream.latest_row("BTCUSDT", INTERVAL) is None
+
+    clock.now -= 31
+    stream.stop()
+    assert not stream.connected.is_set()
+    assert stream.analysis("BTCUSDT", INTERVAL) is None
+
+
+def test_analysis_is_a_copy(rows, streams):
+    _, stream = streams(Seed(rows), [])
+    first = stream.analysis("BTCUSDT", INTERVAL)
+    first["close"] = -1
+    first["confluences"]["bullish"].append("mutated")
+    second = stream.analysis("BTCUSDT", INTERVAL)
+    assert second["close"] == rows[SEEDED - 1, 4]
+    assert second["confluences"]["bullish"] == []
+
+
+def test_recording_skips_undecodable_binary_frames():
+    record = io.StringIO()
+    _record(record, '{"text": 1}')
+    _record(record, b'{"binary": 2}')
+    _record(record, b"\xff\xfe")
+    assert record.getvalue().splitlines() == ['{"text": 1}', '{"binary": 2}']
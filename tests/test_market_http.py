@@ -0,0 +1,125 @@
+import asyncio
+import time
+import types
+
+import pytest
+
+import async_http
+import market_http
+from async_http import AsyncMarketDataClient
+from market_http import BUDGETED_RETRY_STATUSES, MarketDataClient, RetryAfterError
+
+URL = "https://api.binance.com/api/v3/klines"
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeSession:
+    """requests.Session stand-in answering with scripted (status, headers) pairs"""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = 0
+
+    def get(self, url, timeout=None, **kwargs):
+        self.calls += 1
+        status, headers = self.script.pop(0)
+        return FakeResponse(status, headers)
+
+
+class FakeAiohttpSession:
+    """aiohttp.ClientSession stand-in over the same script"""
+
+    def __init__(self, script):
+        self.sync = FakeSession(script)
+
+    def get(self, url, timeout=None, **kwargs):
+        response = self.sync.get(url)
+        session = self
+
+        class Context:
+            async def __aenter__(self):
+                return types.SimpleNamespace(status=response.status_code, headers=response.headers,
+                                             read=session.read)
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Context()
+
+    async def read(self):
+        return b"[]"
+
+
+def clients(script, monkeypatch):
+    """A sync client and an aiohttp-backed async client over separate copies of `script`"""
+    sync = MarketDataClient(sleep=lambda seconds: None)
+    sync.session = FakeSession(script)
+
+    fake_aiohttp = types.SimpleNamespace(ClientError=OSError, ClientTimeout=lambda total=None: total)
+    monkeypatch.setattr(async_http, "aiohttp", fake_aiohttp)
+
+    async def no_sleep(seconds):
+        return None
+
+    monkeypatch.setattr(async_http.asyncio, "sleep", no_sleep)
+    async_sync = MarketDataClient()
+    client = AsyncMarketDataClient(sync_client=async_sync)
+    client._loop_thread = types.SimpleNamespace(session=FakeAiohttpSession(script))
+    return sync, client, async_sync
+
+
+def counters(client):
+    return client.stats()["api.binance.com"]["counters"]
+
+
+@pytest.mark.parametrize("script, final_status", [
+    ([(503, {}), (502, {}), (200, {})], 200),
+    ([(503, {}), (503, {}), (503, {}), (503, {})], 503),
+    ([(429, {"Retry-After": "1"}), (200, {"X-MBX-USED-WEIGHT-1M": "120"})], 200),
+    ([(400, {})], 400),
+])
+def test_sync_and_async_transports_share_the_retry_policy(script, final_status, monkeypatch):
+    sync, client, async_sync = clients(script, monkeypatch)
+    response = sync.get(URL, timeout=10)
+    async_response = asyncio.run(client._get(URL, 10, async_http.RETRY_STATUSES))
+    assert response.status_code == async_response.status_code == final_status
+    assert counters(sync) == counters(async_sync)
+    assert sync.stats()["api.binance.com"]["used_weight"] == async_sync.stats()["api.binance.com"]["used_weight"]
+
+
+def test_retry_after_past_the_timeout_raises(monkeypatch):
+    script = [(429, {"Retry-After": "30"}), (200, {})]
+    sync, client, async_sync = clients(script, monkeypatch)
+    with pytest.raises(RetryAfterError) as error:
+        sync.get(URL, timeout=5)
+    assert error.value.retry_after == 30
+    with pytest.raises(RetryAfterError):
+        asyncio.run(client._get(URL, 5, async_http.RETRY_STATUSES))
+    assert counters(sync)["retry_after_exceeded"] == counters(async_sync)["retry_after_exceeded"] == 1
+
+
+def test_budgeted_statuses_return_429_to_the_caller(monkeypatch):
+    sync, _, _ = clients([(429, {"Retry-After": "1"})], monkeypatch)
+    assert sync.get(URL, retry_statuses=BUDGETED_RETRY_STATUSES).status_code == 429
+    assert sync.session.calls == 1
+
+
+def test_weight_near_the_limit_waits_or_raises(monkeypatch):
+    # 10 s into a minute window, so the next window is 50 s away
+    monkeypatch.setattr(market_http, "time", types.SimpleNamespace(
+        time=lambda: 1_699_999_990.0, monotonic=time.monotonic, perf_counter=time.perf_counter))
+    slept = []
+    client = MarketDataClient(sleep=slept.append)
+    client.session = FakeSession([(200, {"X-MBX-USED-WEIGHT-1M": "5900"}), (200, {}), (200, {})])
+    client.get(URL, timeout=None)
+    client.get(URL, timeout=None)
+    assert slept == [50.0]
+    assert counters(client)["weight_waits"] == 1
+    with pytest.raises(RetryAfterError):
+        client.get(URL, timeout=5)
+    assert client.session.calls == 2
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from betterpredictormodule import TradingAnalyzer
+from conftest import synthetic_ohlcv
+from streaming_indicators import INDICATOR_COLUMNS, StreamingIndicatorEngine, StreamingIndicatorStore
+
+TOLERANCE = 1e-9
+WINDOW = 1000  # Bars in the rolling frame production analyses run on
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    return TradingAnalyzer(ohlcv_cache=None, indicator_backend="ta")
+
+
+def ta_frame(analyzer, df):
+    return analyzer.add_comprehensive_indicators(df.copy())
+
+
+def assert_close(actual, expected, label):
+    actual = np.asarray(actual, dtype=float)
+    expected = np.asarray(expected, dtype=float)
+    assert (np.isnan(actual) == np.isnan(expected)).all(), f"{label}: NaN positions differ"
+    valid = ~np.isnan(expected)
+    error = np.abs(actual[valid] - expected[valid]) / np.maximum(1, np.abs(expected[valid]))
+    assert error.max(initial=0) <= TOLERANCE, f"{label}: relative error {error.max():.3g}"
+
+
+def engine_rows(df):
+    engine = StreamingIndicatorEngine()
+    rows = [engine.update(bar.Open, bar.High, bar.Low, bar.Close, bar.Volume, bar.Index) for bar in df.itertuples()]
+    return pd.DataFrame(rows, index=df.index)
+
+
+def test_engine_rows_match_ta_frame(analyzer, bars):
+    expected = ta_frame(analyzer, bars)
+    actual = engine_rows(bars).loc[expected.index]
+    assert list(expected.columns) == ["Open", "High", "Low", "Close", "Volume"] + INDICATOR_COLUMNS
+    for column in expected.columns:
+        assert_close(actual[column], expected[column], column)
+
+
+@pytest.mark.parametrize("backend", ["ta", "numpy"])
+def test_engine_warm_up_matches_indicator_columns(bars, backend):
+    # Keep the warm-up rows the frame normally drops, so every column's NaN prefix can be compared
+    analyzer = TradingAnalyzer(ohlcv_cache=None, indicator_backend=backend)
+    expected = analyzer.add_comprehensive_indicators(bars.iloc[:80].copy(), keep_warm_up=True)
+    assert expected.index.equals(bars.index[:80])
+    actual = engine_rows(bars.iloc[:80])
+    for column in INDICATOR_COLUMNS:
+        assert_close(actual[column], expected[column], column)
+
+
+def test_store_is_none_until_every_indicator_is_warm(analyzer, bars):
+    first_ready = bars.index.get_loc(ta_frame(analyzer, bars).index[0])
+    for end in (1, 2, first_ready - 1, first_ready):
+        assert StreamingIndicatorStore().latest("BTCUSDT", "15m", bars.iloc[:end]) is None
+    latest = StreamingIndicatorStore().latest("BTCUSDT", "15m", bars.iloc[:first_ready + 1])
+    assert latest is not None
+    expected = ta_frame(analyzer, bars.iloc[:first_ready + 1]).iloc[-1]
+    assert_close(latest[expected.index], expected, "first ready row")
+
+
+def test_store_latest_matches_ta_frame_as_bars_close(analyzer, bars):
+    store = StreamingIndicatorStore()
+    for end in range(300, 320):
+        df = bars.iloc[:end]
+        expected = ta_frame(analyzer, df).iloc[-1]
+        latest = store.latest("BTCUSDT", "15m", df)
+        assert latest.name == df.index[-1]
+        assert_close(latest[expected.index], expected, f"bar {end}")
+    assert store.stats()["rebuilds"] == 1
+    assert store.stats()["bars_applied"] == 318
+
+
+def test_store_latest_matches_ta_frame_over_a_sliding_window(analyzer):
+    # The oldest bar is evicted as each new one closes, as in the rolling kline buffer
+    bars = synthetic_ohlcv(WINDOW + 20, seed=3)
+    store = StreamingIndicatorStore()
+    for end in range(WINDOW, WINDOW + 20):
+        df = bars.iloc[end - WINDOW:end]
+        expected = ta_frame(analyzer, df).iloc[-1]
+        latest = store.latest("BTCUSDT", "15m", df)
+        assert latest.name == df.index[-1]
+        assert_close(latest[expected.index], expected, f"window ending at bar {end}")
+    assert store.stats()["rebuilds"] == 1
+
+
+def test_store_preview_replaces_forming_candle(analyzer, bars):
+    store = StreamingIndicatorStore()
+    df = bars.iloc[:300].copy()
+    store.latest("BTCUSDT", "15m", df)
+    applied = store.stats()["bars_applied"]
+
+    # The forming candle ticks: same open time, new high/close/volume
+    for step in range(1, 4):
+        df.iloc[-1, df.columns.get_loc("Close")] *= 1.001
+        df.iloc[-1, df.columns.get_loc("High")] = max(df["High"].iloc[-1], df["Close"].iloc[-1])
+        df.iloc[-1, df.columns.get_loc("Volume")] += 5
+        latest = store.latest("BTCUSDT", "15m", df)
+        assert_close(latest[INDICATOR_COLUMNS], ta_frame(analyzer, df).iloc[-1][INDICATOR_COLUMNS], f"tick {step}")
+    assert store.stats()["bars_applied"] == applied
+
+    # Once the next candle opens, the forming candle is committed with its final values
+    df = pd.concat([df, bars.iloc[300:301]])
+    latest = store.latest("BTCUSDT", "15m", df)
+    assert store.stats()["bars_applied"] == applied + 1
+    assert store.stats()["rebuilds"] == 1
+    assert_close(latest[INDICATOR_COLUMNS], ta_frame(analyzer, df).iloc[-1][INDICATOR_COLUMNS], "after close")
+
+
+def test_store_rebuilds_when_history_is_replaced(analyzer, bars):
+    store = StreamingIndicatorStore()
+    store.latest("BTCUSDT", "15m", bars.iloc[:300])
+    shifted = bars.iloc[:300].copy()
+    shifted.index = shifted.index + pd.Timedelta(days=30)
+    latest = store.latest("BTCUSDT", "15m", shifted)
+    assert store.stats()["rebuilds"] == 2
+    assert_close(latest[INDICATOR_COLUMNS], ta_frame(analyzer, shifted).iloc[-1][INDICATOR_COLUMNS], "rebuilt")
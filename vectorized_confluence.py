@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+
+from confluence_rules import SIDES, CATEGORIES, get_rule_set
+
+
+class _Columns:
+    """Lazily converted float arrays for the columns a rule set reads"""
+
+    def __init__(self, source):
+        self.source = source
+        self.arrays = {}
+
+    def __getitem__(self, name):
+        array = self.arrays.get(name)
+        if array is None:
+            value = self.source[name]
+            array = value.to_numpy(dtype=np.float64) if hasattr(value, "to_numpy") else np.atleast_1d(
+                np.asarray(value, dtype=np.float64))
+            self.arrays[name] = array
+        return array
+
+    def operand(self, value):
+        return self[value] if isinstance(value, str) else value
+
+
+def classify_signal(bullish, bearish, threshold):
+    """Vectorized overall signal and strength from confluence counts"""
+    is_bull = (bullish >= threshold) & (bullish > bearish)
+    is_bear = (bearish >= threshold) & (bearish > bullish) & ~is_bull
+    signal = np.select([is_bull, is_bear], ["BULLISH", "BEARISH"], "NEUTRAL")
+    strength = np.select(
+        [is_bull & (bullish >= 5), is_bull, is_bear & (bearish >= 5), is_bear],
+        ["Strong", "Medium", "Strong", "Medium"],
+        "Weak",
+    )
+    return signal, strength
+
+
+class ConfluenceHistory:
+    """Confluence rules evaluated as masks over every bar of an indicator frame
+
+    `signals` holds per-bar bullish/bearish/neutral counts plus the overall
+    signal; `confluences_at(i)` materializes the per-rule dicts for one bar.
+    """
+
+    def __init__(self, source, rule_set=None, threshold=3, index=None):
+        self.rule_set = rule_set or get_rule_set()
+        self.columns = _Columns(source)
+        if index is None:
+            index = source.index if isinstance(source, pd.DataFrame) else [getattr(source, "name", 0)]
+        self.index = index
+        size = len(index)
+        self.branch = []    # per rule: int8 array of the matched branch (-1 = none)
+        self.side = []      # per rule: int8 array of side codes (-1 = none)
+        self.strength = []  # per rule: int8 array indexing the matched branch's strength choices
+        self.derived = {}
+        counts = np.zeros((len(SIDES), size), dtype=np.int16)
+        category_counts = {category: np.zeros((len(SIDES), size), dtype=np.int16) for category in CATEGORIES}
+
+        for rule in self.rule_set.rules:
+            for name, (func, args) in rule.derive.items():
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    self.derived[name] = func(*(self.columns.operand(a) for a in args))
+            branch = np.full(size, -1, dtype=np.int8)
+            side = np.full(size, -1, dtype=np.int8)
+            strength = np.zeros(size, dtype=np.int8)
+            unmatched = np.ones(size, dtype=bool)
+            for b, spec in enumerate(rule.branches):
+                taken = unmatched & spec.when.mask(self.columns, size, np)
+                if not taken.any():
+                    continue
+                unmatched &= ~taken
+                branch[taken] = b
+                side_codes = np.array([SIDES.index(v) for v in spec.side.values], dtype=np.int8)
+                side[taken] = side_codes[spec.side.index_array(self.columns, size, np)][taken]
+                strength[taken] = spec.strength.index_array(self.columns, size, np)[taken]
+            self.branch.append(branch)
+            self.side.append(side)
+            self.strength.append(strength)
+            for code in range(len(SIDES)):
+                hits = side == code
+                counts[code] += hits
+                category_counts[rule.category][code] += hits
+
+        self.counts = counts
+        self.category_counts = category_counts
+        self.threshold = threshold
+
+    @property
+    def signals(self):
+        """Per-bar counts and overall signal as a DataFrame"""
+        bullish, bearish, neutral = self.counts
+        signal, strength = classify_signal(bullish, bearish, self.threshold)
+        return pd.DataFrame({
+            "bullish_count": bullish,
+            "bearish_count": bearish,
+            "neutral_count": neutral,
+            "overall_signal": signal,
+            "signal_strength": strength,
+        }, index=self.index)
+
+    def confluences_at(self, i=-1, category=None):
+        """Per-row confluence dicts (the analyze_*_confluence format) for bar `i`"""
+        confluences = {side: [] for side in SIDES}
+        for rule, branch, side, strength in zip(self.rule_set.rules, self.branch, self.side, self.strength):
+            if category is not None and rule.category != category:
+                continue
+            b = branch[i]
+            if b < 0:
+                continue
+            spec = rule.branches[b]
+            side_name = SIDES[side[i]]
+            lookup = _TemplateValues(self, i, side_name).__getitem__
+            confluences[side_name].append({
+                'indicator': rule.indicator,
+                'condition': spec.condition.render(lookup),
+                'implication': spec.implication.render(lookup),
+                'strength': spec.strength.values[strength[i]],
+                'timeframe': spec.timeframe,
+            })
+        return confluences
+
+
+class _TemplateValues(dict):
+    """Template lookup of column/derived values for one bar"""
+
+    def __init__(self, history, i, side):
+        super().__init__(side=side)
+        self.history = history
+        self.i = i
+
+    def __missing__(self, key):
+        if key in self.history.derived:
+            return self.history.derived[key][self.i]
+        return self.history.columns[key][self.i]
+
+
+def evaluate_row(row, category=None, rule_set=None):
+    """Evaluate the rules for a single indicator row (a pandas Series) on the scalar fast path"""
+    return (rule_set or get_rule_set()).evaluate(row, category)